@@ -0,0 +1,37 @@
+"""add cache listing indexes
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-19
+
+Supports newest-first keyset pagination of the admin cache listings.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_vocabulary_hint_cache_created_id',
+        'vocabulary_hint_cache',
+        ['created_at', 'id'],
+        unique=False
+    )
+    op.create_index(
+        'ix_vocabulary_tts_cache_created_id',
+        'vocabulary_tts_cache',
+        ['created_at', 'id'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_vocabulary_tts_cache_created_id', table_name='vocabulary_tts_cache')
+    op.drop_index('ix_vocabulary_hint_cache_created_id', table_name='vocabulary_hint_cache')
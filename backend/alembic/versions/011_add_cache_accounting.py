@@ -0,0 +1,42 @@
+"""add cache accounting columns
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-19
+
+Adds size, hit count and last access tracking to the AI cache tables
+so they can be size-capped with an LRU/LFU eviction policy.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    for table in ('vocabulary_hint_cache', 'vocabulary_tts_cache'):
+        op.add_column(table, sa.Column('size_bytes', sa.Integer(), nullable=False, server_default='0'))
+        op.add_column(table, sa.Column('hit_count', sa.Integer(), nullable=False, server_default='0'))
+        op.add_column(table, sa.Column('last_accessed_at', sa.DateTime(), nullable=True))
+    
+    # Backfill sizes for existing entries
+    op.execute("UPDATE vocabulary_hint_cache SET size_bytes = octet_length(hint)")
+    op.execute("UPDATE vocabulary_tts_cache SET size_bytes = octet_length(audio_data)")
+    
+    # Eviction scans in policy order
+    op.create_index('ix_vocabulary_tts_cache_last_accessed', 'vocabulary_tts_cache', ['last_accessed_at'], unique=False)
+    op.create_index('ix_vocabulary_hint_cache_last_accessed', 'vocabulary_hint_cache', ['last_accessed_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_vocabulary_hint_cache_last_accessed', table_name='vocabulary_hint_cache')
+    op.drop_index('ix_vocabulary_tts_cache_last_accessed', table_name='vocabulary_tts_cache')
+    for table in ('vocabulary_tts_cache', 'vocabulary_hint_cache'):
+        op.drop_column(table, 'last_accessed_at')
+        op.drop_column(table, 'hit_count')
+        op.drop_column(table, 'size_bytes')
@@ -0,0 +1,26 @@
+"""add token_version to users
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-19
+
+Access tokens carry the user's token_version; bumping it revokes all
+outstanding tokens and invalidates cached principals on every worker.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'token_version')
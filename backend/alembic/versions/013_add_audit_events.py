@@ -0,0 +1,46 @@
+"""add audit events table
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-19
+
+Stores security audit events for querying from the admin API. Rows are
+append-only and arrive in time order, so time ranges use a BRIN index.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '013'
+down_revision = '012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'audit_events',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column('event', sa.String(50), nullable=False),
+        sa.Column('success', sa.Boolean(), nullable=False),
+        sa.Column('user_email', sa.String(255), nullable=True),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('ip_address', sa.String(45), nullable=True),
+        sa.Column('details', sa.Text(), nullable=True),
+    )
+    op.create_index(
+        'ix_audit_events_created_at_brin',
+        'audit_events',
+        ['created_at'],
+        postgresql_using='brin'
+    )
+    op.create_index('ix_audit_events_ip_created', 'audit_events', ['ip_address', 'created_at'])
+    op.create_index('ix_audit_events_event_created', 'audit_events', ['event', 'created_at'])
+    op.create_index('ix_audit_events_user_email_created', 'audit_events', ['user_email', 'created_at'])
+
+
+def downgrade() -> None:
+    op.drop_table('audit_events')
@@ -0,0 +1,41 @@
+"""add expires_at indexes
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-19
+
+Supports the batched periodic cleanup of expired MFA codes,
+verification tokens and pending invitations.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '014'
+down_revision = '013'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_mfa_codes_expires_at', 'mfa_codes', ['expires_at'], unique=False)
+    op.create_index(
+        'ix_email_verification_tokens_expires_at',
+        'email_verification_tokens',
+        ['expires_at'],
+        unique=False
+    )
+    op.create_index(
+        'ix_invitations_pending_expires_at',
+        'invitations',
+        ['expires_at'],
+        unique=False,
+        postgresql_where=sa.text('accepted = false')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_invitations_pending_expires_at', table_name='invitations')
+    op.drop_index('ix_email_verification_tokens_expires_at', table_name='email_verification_tokens')
+    op.drop_index('ix_mfa_codes_expires_at', table_name='mfa_codes')
@@ -0,0 +1,34 @@
+"""one hashed MFA code per user
+
+Revision ID: 015
+Revises: 014
+Create Date: 2026-10-19
+
+Makes mfa_codes.user_id unique so a new code replaces the previous one
+with INSERT ... ON CONFLICT, and widens the code column to hold an
+HMAC-SHA256 hex digest instead of the plain code. Pending plain-text
+codes are deleted; users simply request a new one.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '015'
+down_revision = '014'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("DELETE FROM mfa_codes")
+    op.alter_column('mfa_codes', 'code', type_=sa.String(64), existing_nullable=False)
+    op.drop_index('ix_mfa_codes_user_id', table_name='mfa_codes')
+    op.create_unique_constraint('mfa_codes_user_id_key', 'mfa_codes', ['user_id'])
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM mfa_codes")
+    op.drop_constraint('mfa_codes_user_id_key', 'mfa_codes', type_='unique')
+    op.create_index('ix_mfa_codes_user_id', 'mfa_codes', ['user_id'], unique=False)
+    op.alter_column('mfa_codes', 'code', type_=sa.String(6), existing_nullable=False)
@@ -0,0 +1,56 @@
+"""add user score summary
+
+Revision ID: 016
+Revises: 015
+Create Date: 2026-10-19
+
+One row per user and game with best score, latest day's score and days
+played, maintained by the score upsert. Backfilled from daily_highscores.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '016'
+down_revision = '015'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'user_score_summary',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('game_type', sa.String(20), nullable=False),
+        sa.Column('best_score', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('today_score', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('today_date', sa.Date(), nullable=False),
+        sa.Column('days_played', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_played_date', sa.Date(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True, server_default=sa.func.now()),
+        sa.UniqueConstraint('user_id', 'game_type', name='uix_user_score_summary_user_game'),
+    )
+    
+    op.execute("""
+        INSERT INTO user_score_summary
+            (id, user_id, game_type, best_score, today_score, today_date, days_played, last_played_date, updated_at)
+        SELECT
+            gen_random_uuid(),
+            user_id,
+            game_type,
+            MAX(score),
+            (ARRAY_AGG(score ORDER BY date DESC))[1],
+            MAX(date),
+            COUNT(*),
+            MAX(date),
+            now()
+        FROM daily_highscores
+        GROUP BY user_id, game_type
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('user_score_summary')
@@ -0,0 +1,55 @@
+"""add score rollups and streaks
+
+Revision ID: 017
+Revises: 016
+Create Date: 2026-10-19
+
+Per-user week/month score rollups and play streaks, maintained on score
+writes. Existing data is filled in with `python -m app.score_rollups`.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '017'
+down_revision = '016'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'user_score_rollups',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('period', sa.String(10), nullable=False),
+        sa.Column('period_start', sa.Date(), nullable=False),
+        sa.Column('total_score', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('days_played', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('best_score', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True, server_default=sa.func.now()),
+        sa.UniqueConstraint('user_id', 'period', 'period_start', name='uix_user_score_rollup_period'),
+    )
+    op.create_table(
+        'user_streaks',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, unique=True),
+        sa.Column('current_streak', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('longest_streak', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_played_date', sa.Date(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True, server_default=sa.func.now()),
+    )
+    op.create_index(
+        'ix_daily_highscores_user_date',
+        'daily_highscores',
+        ['user_id', 'date'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_daily_highscores_user_date', table_name='daily_highscores')
+    op.drop_table('user_streaks')
+    op.drop_table('user_score_rollups')
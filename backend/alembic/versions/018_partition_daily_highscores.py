@@ -0,0 +1,99 @@
+"""partition daily_highscores by month
+
+Revision ID: 018
+Revises: 017
+Create Date: 2026-10-19
+
+Recreates daily_highscores as a table range-partitioned by date with one
+partition per month, from the month of the oldest score up to three
+months ahead (or the month of the newest score, if later), and copies
+the existing rows over. The primary key becomes
+(id, date) because a partitioned table's keys must include the partition
+key. Later partitions are created (and old ones detached) by
+app.score_partitions.
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '018'
+down_revision = '017'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_scores_table(name: str, **kwargs) -> None:
+    op.create_table(
+        name,
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('game_type', sa.String(20), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('score', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('user_id', 'game_type', 'date', name='uix_user_game_date'),
+        **kwargs
+    )
+    op.create_index('ix_daily_highscores_user_id', name, ['user_id'], unique=False)
+    op.create_index('ix_daily_highscores_game_date', name, ['game_type', 'date', 'score'], unique=False)
+    op.create_index('ix_daily_highscores_user_date', name, ['user_id', 'date'], unique=False)
+
+
+def _rename_old_table(new_name: str) -> None:
+    # Constraint and index names must be free for the new table
+    op.rename_table('daily_highscores', new_name)
+    op.execute(f"ALTER TABLE {new_name} RENAME CONSTRAINT uix_user_game_date TO {new_name}_uix_user_game_date")
+    op.execute(f"ALTER INDEX daily_highscores_pkey RENAME TO {new_name}_pkey")
+    for index in ('ix_daily_highscores_user_id', 'ix_daily_highscores_game_date', 'ix_daily_highscores_user_date'):
+        op.execute(f"ALTER INDEX {index} RENAME TO {new_name}_{index[len('ix_daily_highscores_'):]}")
+
+
+def upgrade() -> None:
+    _rename_old_table('daily_highscores_unpartitioned')
+    _create_scores_table(
+        'daily_highscores',
+        sa.PrimaryKeyConstraint('id', 'date'),
+        postgresql_partition_by='RANGE (date)'
+    )
+    
+    this_month = date.today().replace(day=1)
+    oldest, newest = op.get_bind().execute(
+        sa.text("SELECT MIN(date), MAX(date) FROM daily_highscores_unpartitioned")
+    ).one()
+    month = min(oldest.replace(day=1), this_month) if oldest else this_month
+    # Every existing row needs a partition, including future-dated ones
+    last = max(newest.replace(day=1), _add_months(this_month, MONTHS_AHEAD)) if newest else _add_months(this_month, MONTHS_AHEAD)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE daily_highscores_y{month.year:04d}m{month.month:02d} PARTITION OF daily_highscores "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+    
+    op.execute("""
+        INSERT INTO daily_highscores (id, user_id, game_type, date, score, updated_at)
+        SELECT id, user_id, game_type, date, score, updated_at FROM daily_highscores_unpartitioned
+    """)
+    op.drop_table('daily_highscores_unpartitioned')
+
+
+def downgrade() -> None:
+    _rename_old_table('daily_highscores_partitioned')
+    _create_scores_table('daily_highscores', sa.PrimaryKeyConstraint('id'))
+    op.execute("""
+        INSERT INTO daily_highscores (id, user_id, game_type, date, score, updated_at)
+        SELECT id, user_id, game_type, date, score, updated_at FROM daily_highscores_partitioned
+    """)
+    # Drops the attached partitions with it; detached archive partitions are left alone
+    op.drop_table('daily_highscores_partitioned')
@@ -0,0 +1,36 @@
+"""add user ai usage
+
+Revision ID: 019
+Revises: 018
+Create Date: 2026-10-19
+
+Daily per-user counts of AI hint and TTS generations, used to enforce
+the daily AI quotas.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '019'
+down_revision = '018'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'user_ai_usage',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('hint_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('tts_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True, server_default=sa.func.now()),
+        sa.UniqueConstraint('user_id', 'date', name='uix_user_ai_usage_user_date'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_ai_usage')
@@ -0,0 +1,26 @@
+"""add invitation email status
+
+Revision ID: 020
+Revises: 019
+Create Date: 2026-10-19
+
+Delivery result of bulk invitation emails, so failed sends are visible
+to admins and can be resent.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '020'
+down_revision = '019'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('invitations', sa.Column('email_status', sa.String(20), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('invitations', 'email_status')
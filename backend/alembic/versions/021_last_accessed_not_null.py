@@ -0,0 +1,40 @@
+"""make cache last_accessed_at not null
+
+Revision ID: 021
+Revises: 020
+Create Date: 2026-10-19
+
+Entries never hit had a NULL last_accessed_at, so eviction ordered by
+COALESCE(last_accessed_at, created_at) and had to sort the whole table.
+Backfills it with the creation time and makes it NOT NULL, so eviction
+orders by the bare column; the indexes gain id, the eviction tie-breaker.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '021'
+down_revision = '020'
+branch_labels = None
+depends_on = None
+
+TABLES = {
+    'vocabulary_hint_cache': 'ix_vocabulary_hint_cache_last_accessed',
+    'vocabulary_tts_cache': 'ix_vocabulary_tts_cache_last_accessed',
+}
+
+
+def upgrade() -> None:
+    for table, index in TABLES.items():
+        op.execute(f"UPDATE {table} SET last_accessed_at = COALESCE(created_at, now()) WHERE last_accessed_at IS NULL")
+        op.alter_column(table, 'last_accessed_at', existing_type=sa.DateTime(), nullable=False, server_default=sa.func.now())
+        op.drop_index(index, table_name=table)
+        op.create_index(index, table, ['last_accessed_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    for table, index in TABLES.items():
+        op.drop_index(index, table_name=table)
+        op.create_index(index, table, ['last_accessed_at'], unique=False)
+        op.alter_column(table, 'last_accessed_at', existing_type=sa.DateTime(), nullable=True, server_default=None)
@@ -0,0 +1,231 @@
+"""
+Daily quotas for AI hint and TTS generations.
+
+Only cache misses count: a generation reserves one unit of the caller's
+quota for the day and is refunded if it fails. Logged-in users are
+counted per user, so users sharing an IP don't throttle each other;
+anonymous requests fall back to a smaller per-IP quota kept in memory.
+
+User counters live in memory on the request path and are added to
+user_ai_usage in one upsert every AI_USAGE_FLUSH_INTERVAL_SECONDS. The
+flush returns the combined totals of all workers, and a user's totals
+are also reloaded once they are older than the flush interval, so a user
+can exceed the quota by at most what other workers granted since then.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models import UserAIUsage
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Quota kind -> user_ai_usage column
+USAGE_COLUMNS = {
+    "hint": "hint_count",
+    "tts": "tts_count",
+}
+
+
+@dataclass
+class QuotaStatus:
+    limit: int  # 0 = unlimited
+    used: int
+    allowed: bool = True
+
+    def headers(self) -> Dict[str, str]:
+        """Response headers reporting the remaining quota."""
+        if self.limit <= 0:
+            return {}
+        tomorrow = datetime.combine(date.today() + timedelta(days=1), datetime.min.time())
+        return {
+            "X-AI-Quota-Limit": str(self.limit),
+            "X-AI-Quota-Remaining": str(max(self.limit - self.used, 0)),
+            "X-AI-Quota-Reset": str(int((tomorrow - datetime.now()).total_seconds())),
+        }
+
+
+@dataclass
+class _UserUsage:
+    day: date
+    counts: Dict[str, int] = field(default_factory=dict)  # Totals of all workers as last seen, plus ours
+    loaded_at: float = 0.0
+
+
+# user id -> today's usage
+_usage: Dict[UUID, _UserUsage] = {}
+# (user id, day) -> kind -> generations not yet written
+_pending: Dict[Tuple[UUID, date], Dict[str, int]] = {}
+# client IP -> kind -> generations today (anonymous requests, this worker only)
+_anonymous: Dict[str, Dict[str, int]] = {}
+_anonymous_day: Optional[date] = None
+
+
+def daily_quota(kind: str, anonymous: bool = False) -> int:
+    if anonymous:
+        return settings.ai_anonymous_daily_quota
+    return settings.ai_hint_daily_quota if kind == "hint" else settings.ai_tts_daily_quota
+
+
+def _load_usage(db: Session, user_id: UUID, today: date) -> _UserUsage:
+    row = db.query(UserAIUsage).filter(UserAIUsage.user_id == user_id, UserAIUsage.date == today).first()
+    pending = _pending.get((user_id, today), {})
+    usage = _UserUsage(day=today, loaded_at=time.monotonic())
+    for kind, column in USAGE_COLUMNS.items():
+        usage.counts[kind] = (getattr(row, column) if row else 0) + pending.get(kind, 0)
+    _usage[user_id] = usage
+    return usage
+
+
+def _user_usage(db: Session, user_id: UUID) -> _UserUsage:
+    today = date.today()
+    usage = _usage.get(user_id)
+    stale = usage is None or usage.day != today or (
+        time.monotonic() - usage.loaded_at > settings.ai_usage_flush_interval_seconds
+    )
+    return _load_usage(db, user_id, today) if stale else usage
+
+
+def _anonymous_counts(client_ip: str) -> Dict[str, int]:
+    global _anonymous_day
+    if _anonymous_day != date.today():
+        _anonymous.clear()
+        _anonymous_day = date.today()
+    return _anonymous.setdefault(client_ip, {})
+
+
+def check_quota(db: Session, user_id: Optional[UUID], client_ip: str, kind: str, reserve: bool = False) -> QuotaStatus:
+    """Report the caller's quota; with reserve=True, also take one generation from it if any is left."""
+    if user_id is None:
+        counts = _anonymous_counts(client_ip)
+        limit = daily_quota(kind, anonymous=True)
+    else:
+        usage = _user_usage(db, user_id)
+        counts = usage.counts
+        limit = daily_quota(kind)
+
+    status = QuotaStatus(limit=limit, used=counts.get(kind, 0))
+    if not reserve:
+        return status
+    if 0 < limit <= status.used:
+        status.allowed = False
+        return status
+
+    counts[kind] = status.used = status.used + 1
+    if user_id is not None:
+        pending = _pending.setdefault((user_id, usage.day), {})
+        pending[kind] = pending.get(kind, 0) + 1
+    return status
+
+
+def refund_quota(user_id: Optional[UUID], client_ip: str, kind: str) -> None:
+    """Give back a reserved generation that failed."""
+    if user_id is None:
+        counts = _anonymous_counts(client_ip)
+        counts[kind] = max(counts.get(kind, 0) - 1, 0)
+        return
+    usage = _usage.get(user_id)
+    pending = _pending.get((user_id, usage.day)) if usage is not None else None
+    # Only refund what hasn't been written yet; a flushed reservation stays counted
+    if pending and pending.get(kind, 0) > 0:
+        pending[kind] -= 1
+        usage.counts[kind] -= 1
+
+
+def _take_pending() -> Dict[Tuple[UUID, date], Dict[str, int]]:
+    """Swap out the unwritten counters (called on the event loop, so no lock is needed)."""
+    global _pending
+    taken = _pending
+    _pending = {}
+    return taken
+
+
+def _restore_pending(taken: Dict[Tuple[UUID, date], Dict[str, int]]) -> None:
+    """Merge counters of a failed flush back so the next flush retries them."""
+    for key, counts in taken.items():
+        pending = _pending.setdefault(key, {})
+        for kind, count in counts.items():
+            pending[kind] = pending.get(kind, 0) + count
+
+
+def write_usage(taken: Dict[Tuple[UUID, date], Dict[str, int]]) -> List[Tuple[UUID, date, int, int]]:
+    """Add counters to user_ai_usage in one upsert. Returns the new (user, day, hints, tts) totals."""
+    now = datetime.utcnow()
+    stmt = pg_insert(UserAIUsage).values([
+        {
+            "id": uuid4(),
+            "user_id": user_id,
+            "date": day,
+            "hint_count": counts.get("hint", 0),
+            "tts_count": counts.get("tts", 0),
+            "updated_at": now,
+        }
+        for (user_id, day), counts in taken.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        constraint="uix_user_ai_usage_user_date",
+        set_={
+            "hint_count": UserAIUsage.hint_count + stmt.excluded.hint_count,
+            "tts_count": UserAIUsage.tts_count + stmt.excluded.tts_count,
+            "updated_at": stmt.excluded.updated_at,
+        }
+    ).returning(UserAIUsage.user_id, UserAIUsage.date, UserAIUsage.hint_count, UserAIUsage.tts_count)
+
+    db = SessionLocal()
+    try:
+        totals = [tuple(row) for row in db.execute(stmt)]
+        db.commit()
+        return totals
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def flush_ai_usage() -> int:
+    """Write unwritten counters and refresh the flushed users' totals. Returns the number of rows written."""
+    today = date.today()
+    for user_id in [user_id for user_id, usage in _usage.items() if usage.day != today]:
+        del _usage[user_id]
+
+    taken = _take_pending()
+    if not taken:
+        return 0
+    try:
+        totals = await asyncio.to_thread(write_usage, taken)
+    except Exception as e:
+        logger.warning(f"Could not flush AI usage counters, retrying with the next flush: {e}")
+        _restore_pending(taken)
+        return 0
+
+    for user_id, day, hint_count, tts_count in totals:
+        usage = _usage.get(user_id)
+        if usage is None or usage.day != day:
+            continue
+        # Include generations reserved while the flush was running
+        pending = _pending.get((user_id, day), {})
+        usage.counts = {"hint": hint_count + pending.get("hint", 0), "tts": tts_count + pending.get("tts", 0)}
+        usage.loaded_at = time.monotonic()
+    return len(totals)
+
+
+async def run_ai_usage_flush() -> None:
+    """Background loop: write AI usage counters periodically."""
+    try:
+        while True:
+            await asyncio.sleep(settings.ai_usage_flush_interval_seconds)
+            await flush_ai_usage()
+    finally:
+        # Persist whatever was counted since the last flush on shutdown
+        await flush_ai_usage()
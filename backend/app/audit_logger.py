@@ -1,25 +1,262 @@
 """
 Audit logging module for security-relevant events.
 Provides structured logging for authentication and admin actions.
+
+Events are put on a bounded in-memory queue by the request handlers and
+written as JSON lines by a QueueListener thread, to stdout and optionally
+to a rotating file. Events are also put on a second queue whose own
+thread inserts them into the audit_events table for the admin API, so a
+slow database never holds up the log sinks. Sinks are flushed once per
+burst of events instead of once per event. When a queue is full, events
+are dropped and counted rather than blocking the request.
 """
+import ipaddress
+import json
 import logging
+import queue
+import sys
+import threading
 from datetime import datetime
-from typing import Optional
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, List, Optional
+from uuid import UUID
 from fastapi import Request
+from sqlalchemy import insert
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models import AuditEventRecord
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Column sizes of audit_events
+IP_ADDRESS_MAX_LENGTH = AuditEventRecord.__table__.c.ip_address.type.length
+USER_EMAIL_MAX_LENGTH = AuditEventRecord.__table__.c.user_email.type.length
+
+
+class JSONLineFormatter(logging.Formatter):
+    """Format audit records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.utcfromtimestamp(record.created).isoformat(timespec="milliseconds") + "Z",
+            "level": record.levelname,
+        }
+        entry.update(getattr(record, "audit", None) or {"message": record.getMessage()})
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _BatchedFlushMixin:
+    """Skip the per-record flush of StreamHandler; the listener flushes per batch."""
+
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+    def close(self):
+        self.flush_batch()
+        super().close()
+
+
+class BatchedStreamHandler(_BatchedFlushMixin, logging.StreamHandler):
+    pass
+
+
+class BatchedRotatingFileHandler(_BatchedFlushMixin, RotatingFileHandler):
+    pass
+
+
+class AuditDatabaseHandler(logging.Handler):
+    """Collect audit records and insert each batch with a single multi-row INSERT."""
+
+    def __init__(self):
+        super().__init__(level=logging.INFO)
+        self._rows: List[dict] = []
+        self.inserted = 0
+        self.failed = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        row = getattr(record, "audit_record", None)
+        if row is not None:
+            self._rows.append(dict(row, created_at=datetime.utcfromtimestamp(record.created)))
+
+    def flush_batch(self) -> None:
+        if not self._rows:
+            return
+        rows, self._rows = self._rows, []
+        db = SessionLocal()
+        try:
+            db.execute(insert(AuditEventRecord), rows)
+            db.commit()
+            self.inserted += len(rows)
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Could not store {len(rows)} audit events as a batch, storing them one by one: {e}")
+            self._insert_each(db, rows)
+        finally:
+            db.close()
+
+    def _insert_each(self, db, rows: List[dict]) -> None:
+        """Fallback after a failed batch: one bad row must not lose the others."""
+        for row in rows:
+            try:
+                db.execute(insert(AuditEventRecord), [row])
+                db.commit()
+                self.inserted += 1
+            except Exception as e:
+                # Stdout/file sinks still have this event
+                logger.warning(f"Could not store audit event {row.get('event')}: {e}")
+                db.rollback()
+                self.failed += 1
+
+    def close(self):
+        self.flush_batch()
+        super().close()
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks: events that don't fit are counted and dropped."""
+
+    def __init__(self, log_queue: queue.Queue, name: str = "Audit log"):
+        super().__init__(log_queue)
+        self.name = name
+        self.enqueued = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._dropping = False
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                first_drop = not self._dropping
+                self._dropping = True
+            if first_drop:
+                logger.warning(f"{self.name} queue is full, dropping audit events")
+            return
+        with self._lock:
+            self.enqueued += 1
+            self._dropping = False
+
+
+class BatchingQueueListener(QueueListener):
+    """QueueListener that flushes its sinks when the queue runs empty or a batch is full."""
+
+    def __init__(self, log_queue: queue.Queue, *handlers: logging.Handler, batch_size: int):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.batch_size = max(1, batch_size)
+        self.written = 0
+        self.batches = 0
+        self.running = False
+        self._unflushed = 0
+
+    def handle(self, record: logging.LogRecord) -> None:
+        super().handle(record)
+        self.written += 1
+        self._unflushed += 1
+        if self._unflushed >= self.batch_size or self.queue.empty():
+            self.flush()
+
+    def enqueue_sentinel(self) -> None:
+        # Block instead of raising queue.Full; the listener is still draining
+        self.queue.put(self._sentinel)
+
+    def flush(self) -> None:
+        for handler in self.handlers:
+            flush_batch = getattr(handler, "flush_batch", handler.flush)
+            flush_batch()
+        if self._unflushed:
+            self.batches += 1
+        self._unflushed = 0
+
+
+def _build_sinks() -> List[logging.Handler]:
+    formatter = JSONLineFormatter()
+    sinks: List[logging.Handler] = [BatchedStreamHandler(sys.stdout)]
+    if settings.audit_log_file:
+        sinks.append(BatchedRotatingFileHandler(
+            settings.audit_log_file,
+            maxBytes=settings.audit_log_max_bytes,
+            backupCount=settings.audit_log_backup_count,
+            encoding="utf-8",
+        ))
+    for sink in sinks:
+        sink.setLevel(logging.INFO)
+        sink.setFormatter(formatter)
+    return sinks
+
+
+# Configure audit logger: request handlers only enqueue, the listener threads write
+_audit_queue: queue.Queue = queue.Queue(maxsize=settings.audit_log_queue_size)
+_queue_handler = DroppingQueueHandler(_audit_queue)
+_listener: Optional[BatchingQueueListener] = None
+
+# audit_events inserts get their own queue and thread
+_db_queue: queue.Queue = queue.Queue(maxsize=settings.audit_log_queue_size)
+_db_queue_handler = DroppingQueueHandler(_db_queue, name="Audit database")
+_db_listener: Optional[BatchingQueueListener] = None
 
-# Configure audit logger
 audit_logger = logging.getLogger("audit")
 audit_logger.setLevel(logging.INFO)
+audit_logger.addHandler(_queue_handler)
+if settings.audit_log_database:
+    audit_logger.addHandler(_db_queue_handler)
+audit_logger.propagate = False
 
-# Create console handler with specific format for audit logs
-handler = logging.StreamHandler()
-handler.setLevel(logging.INFO)
-formatter = logging.Formatter(
-    '%(asctime)s - AUDIT - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
-handler.setFormatter(formatter)
-audit_logger.addHandler(handler)
+
+def _start_listener(listener: Optional[BatchingQueueListener], log_queue: queue.Queue, *handlers: logging.Handler) -> BatchingQueueListener:
+    if listener is not None and listener.running:
+        return listener
+    listener = BatchingQueueListener(log_queue, *handlers, batch_size=settings.audit_log_batch_size)
+    listener.start()
+    listener.running = True
+    return listener
+
+
+def _stop_listener(listener: Optional[BatchingQueueListener]) -> None:
+    if listener is None or not listener.running:
+        return
+    listener.stop()
+    listener.running = False
+    listener.flush()
+    for handler in listener.handlers:
+        handler.close()
+
+
+def start_audit_logging() -> None:
+    """Start the writer threads that drain the audit queues."""
+    global _listener, _db_listener
+    _listener = _start_listener(_listener, _audit_queue, *_build_sinks())
+    if settings.audit_log_database:
+        _db_listener = _start_listener(_db_listener, _db_queue, AuditDatabaseHandler())
+
+
+def stop_audit_logging() -> None:
+    """Write out everything still queued, then stop the writer threads."""
+    _stop_listener(_listener)
+    _stop_listener(_db_listener)
+
+
+def get_audit_log_stats() -> Dict[str, int]:
+    """Counters of the audit log pipeline for this worker."""
+    db_handlers = [h for h in (_db_listener.handlers if _db_listener else ()) if isinstance(h, AuditDatabaseHandler)]
+    return {
+        "enqueued": _queue_handler.enqueued,
+        "dropped": _queue_handler.dropped,
+        "written": _listener.written if _listener else 0,
+        "batches": _listener.batches if _listener else 0,
+        "stored": sum(h.inserted for h in db_handlers),
+        "store_failed": sum(h.failed for h in db_handlers),
+        "store_dropped": _db_queue_handler.dropped,
+        "pending": _audit_queue.qsize(),
+        "store_pending": _db_queue.qsize(),
+        "queue_size": settings.audit_log_queue_size,
+    }
 
 
 def get_client_ip(request: Optional[Request] = None) -> str:
@@ -64,6 +301,17 @@ class AuditEvent:
     SUSPICIOUS_ACTIVITY = "SUSPICIOUS_ACTIVITY"
 
 
+def _stored_ip(ip_address: Optional[str]) -> Optional[str]:
+    """Normalize a (possibly client-supplied) IP for the audit_events column."""
+    if not ip_address:
+        return None
+    try:
+        return str(ipaddress.ip_address(ip_address))
+    except ValueError:
+        # Not an IP (e.g. a forged X-Forwarded-For); keep what fits the column
+        return ip_address[:IP_ADDRESS_MAX_LENGTH]
+
+
 def log_audit_event(
     event: str,
     user_email: Optional[str] = None,
@@ -89,32 +337,37 @@ def log_audit_event(
     if ip_address is None and request is not None:
         ip_address = get_client_ip(request)
     
-    # Build log message
-    status = "SUCCESS" if success else "FAILED"
-    parts = [
-        f"event={event}",
-        f"status={status}",
-    ]
+    # Build structured log entry
+    entry = {
+        "event": event,
+        "status": "SUCCESS" if success else "FAILED",
+    }
     
     if user_email:
         # Mask email for privacy in logs
-        parts.append(f"user={_mask_email(user_email)}")
+        entry["user"] = _mask_email(user_email)
     
     if user_id:
-        parts.append(f"user_id={user_id}")
+        entry["user_id"] = str(user_id)
     
     if ip_address:
-        parts.append(f"ip={ip_address}")
+        entry["ip"] = ip_address
     
     if details:
-        parts.append(f"details={details}")
+        entry["details"] = details
     
-    message = " | ".join(parts)
+    # Unmasked copy for the audit_events table, which only admins can query
+    stored = {
+        "event": event,
+        "success": success,
+        "user_email": user_email.lower()[:USER_EMAIL_MAX_LENGTH] if user_email else None,
+        "user_id": UUID(str(user_id)) if user_id else None,
+        "ip_address": _stored_ip(ip_address),
+        "details": details,
+    }
     
-    if success:
-        audit_logger.info(message)
-    else:
-        audit_logger.warning(message)
+    level = logging.INFO if success else logging.WARNING
+    audit_logger.log(level, f"event={event} status={entry['status']}", extra={"audit": entry, "audit_record": stored})
 
 
 def _mask_email(email: str) -> str:
@@ -1,5 +1,11 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
+from uuid import UUID
+import asyncio
+import time
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 import bcrypt
@@ -13,8 +19,24 @@ from app.models import User
 from app.schemas import TokenData
 
 settings = get_settings()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=12)
+# min/max rounds pinned to the configured cost so hashes with any other cost need an update
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.bcrypt_rounds,
+    bcrypt__min_rounds=settings.bcrypt_rounds,
+    bcrypt__max_rounds=settings.bcrypt_rounds,
+)
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+
+# bcrypt is CPU-bound (~250 ms at 12 rounds) - run it off the event loop in a
+# small dedicated pool, and bound how many jobs may wait for it
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers,
+    thread_name_prefix="bcrypt",
+)
+_password_slots = asyncio.Semaphore(settings.password_hash_workers + settings.password_hash_max_pending)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -25,6 +47,40 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def _run_password_job(func, *args):
+    """Run a bcrypt job in the password pool, rejecting with 503 when the pool is saturated."""
+    try:
+        await asyncio.wait_for(
+            _password_slots.acquire(),
+            timeout=settings.password_hash_queue_timeout_seconds
+        )
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy. Please try again shortly.",
+            headers={"Retry-After": "5"},
+        )
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_password_executor, func, *args)
+    finally:
+        _password_slots.release()
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password off the event loop.
+    
+    Returns (valid, new_hash); new_hash is set when the stored hash uses a
+    different work factor and should be replaced.
+    """
+    return await _run_password_job(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password off the event loop."""
+    return await _run_password_job(pwd_context.hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -36,21 +92,109 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+def create_user_access_token(user: User) -> str:
+    """Create an access token carrying the claims needed to authenticate without a DB lookup."""
+    return create_access_token(
+        data={
+            "sub": user.username,
+            "uid": str(user.id),
+            "adm": user.is_admin,
+            "ver": user.token_version,
+        },
+        expires_delta=timedelta(minutes=settings.jwt_expire_minutes)
+    )
+
+
 def decode_token(token: str) -> Optional[TokenData]:
     try:
         payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
         username: str = payload.get("sub")
         if username is None:
             return None
-        return TokenData(username=username)
-    except JWTError:
+        return TokenData(
+            username=username,
+            user_id=payload.get("uid"),
+            is_admin=payload.get("adm"),
+            token_version=payload.get("ver"),
+        )
+    except (JWTError, ValueError):
+        return None
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Authenticated user as seen by request handlers.
+    
+    A detached snapshot of the user row, safe to share between requests.
+    Carries every field of UserResponse so /api/auth/me needs no query.
+    """
+    id: UUID
+    username: str
+    email: str
+    is_email_verified: bool
+    mfa_enabled: bool
+    is_admin: bool
+    created_at: datetime
+    token_version: int
+    
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            is_email_verified=user.is_email_verified,
+            mfa_enabled=user.mfa_enabled,
+            is_admin=user.is_admin,
+            created_at=user.created_at,
+            token_version=user.token_version,
+        )
+
+
+# user id -> (expires at, principal); bounded LRU with a short TTL. The cache is
+# per worker: invalidate_principal and a users.token_version bump take effect
+# immediately in the worker handling the change, while other workers keep
+# accepting the cached principal (and its old tokens) for up to
+# PRINCIPAL_CACHE_TTL_SECONDS.
+_principal_cache: "OrderedDict[UUID, Tuple[float, Principal]]" = OrderedDict()
+
+
+def _get_cached_principal(user_id: UUID) -> Optional[Principal]:
+    entry = _principal_cache.get(user_id)
+    if entry is None:
+        return None
+    expires_at, principal = entry
+    if time.monotonic() >= expires_at:
+        _principal_cache.pop(user_id, None)
         return None
+    _principal_cache.move_to_end(user_id)
+    return principal
+
+
+def _cache_principal(principal: Principal) -> None:
+    _principal_cache[principal.id] = (time.monotonic() + settings.principal_cache_ttl_seconds, principal)
+    _principal_cache.move_to_end(principal.id)
+    while len(_principal_cache) > settings.principal_cache_max_entries:
+        _principal_cache.popitem(last=False)
+
+
+def invalidate_principal(user_id: UUID) -> None:
+    """Drop a cached principal after its user was deleted, locked or had its role changed.
+
+    Only affects this worker; other workers notice once their entry expires.
+    """
+    _principal_cache.pop(user_id, None)
+
+
+def clear_principal_cache() -> None:
+    """Drop all cached principals (used after bulk user updates)."""
+    _principal_cache.clear()
 
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
-) -> User:
+) -> Principal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -61,16 +205,46 @@ async def get_current_user(
     if token_data is None or token_data.username is None:
         raise credentials_exception
     
-    user = db.query(User).filter(User.username == token_data.username).first()
-    if user is None:
-        raise credentials_exception
+    # Hot path: token issued with id and version claims that match a cached principal
+    if token_data.user_id is not None and token_data.token_version is not None:
+        principal = _get_cached_principal(token_data.user_id)
+        if principal is not None and principal.token_version == token_data.token_version:
+            return principal
+        user = db.query(User).filter(User.id == token_data.user_id).first()
+        if user is None or user.token_version != token_data.token_version:
+            # Deleted user, or token revoked by a version bump
+            invalidate_principal(token_data.user_id)
+            raise credentials_exception
+    else:
+        # Legacy token without id/version claims
+        user = db.query(User).filter(User.username == token_data.username).first()
+        if user is None:
+            raise credentials_exception
     
-    return user
+    principal = Principal.from_user(user)
+    _cache_principal(principal)
+    return principal
+
+
+async def get_optional_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    db: Session = Depends(get_db)
+) -> Optional[Principal]:
+    """
+    Dependency for endpoints that also serve anonymous requests.
+    Returns None without credentials, or if they are invalid or expired.
+    """
+    if credentials is None:
+        return None
+    try:
+        return await get_current_user(credentials, db)
+    except HTTPException:
+        return None
 
 
 async def require_admin(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
     """
     Dependency that requires the current user to be an admin.
     Use this for admin-only endpoints.
@@ -0,0 +1,170 @@
+"""
+Accounting and size-capped eviction for the AI hint and TTS caches.
+
+Cache hits are counted in memory on the request path and written to the
+database in batches by a background task, which also enforces the
+configured size caps using an LRU or LFU eviction policy.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Tuple
+from uuid import UUID
+
+from sqlalchemy import func, select, update, values, column, Integer, DateTime
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models import VocabularyHintCache, VocabularyTTSCache
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+CACHE_MODELS = {
+    "hint": VocabularyHintCache,
+    "tts": VocabularyTTSCache,
+}
+
+# Evict down to this fraction of the cap so that eviction doesn't run on every new entry
+EVICTION_TARGET_RATIO = 0.9
+
+# kind -> entry id -> (buffered hits, last access)
+_pending_hits: Dict[str, Dict[UUID, Tuple[int, datetime]]] = {kind: {} for kind in CACHE_MODELS}
+
+
+def record_cache_hit(kind: str, entry_id: UUID) -> None:
+    """Count a cache hit in memory; it is persisted by the next flush."""
+    pending = _pending_hits[kind]
+    hits, _ = pending.get(entry_id, (0, None))
+    pending[entry_id] = (hits + 1, datetime.utcnow())
+
+
+def _take_pending_hits() -> Dict[str, Dict[UUID, Tuple[int, datetime]]]:
+    """Swap out the buffered hits (called on the event loop, so no lock is needed)."""
+    global _pending_hits
+    taken = _pending_hits
+    _pending_hits = {kind: {} for kind in CACHE_MODELS}
+    return taken
+
+
+def write_cache_hits(pending: Dict[str, Dict[UUID, Tuple[int, datetime]]]) -> int:
+    """Apply buffered hits with one UPDATE ... FROM (VALUES ...) statement per cache table."""
+    written = 0
+    db = SessionLocal()
+    try:
+        for kind, hits in pending.items():
+            if not hits:
+                continue
+            model = CACHE_MODELS[kind]
+            batch = values(
+                column("id", PG_UUID(as_uuid=True)),
+                column("hits", Integer),
+                column("accessed_at", DateTime),
+                name="hits",
+            ).data([(entry_id, count, accessed_at) for entry_id, (count, accessed_at) in hits.items()])
+            db.execute(
+                update(model)
+                .where(model.id == batch.c.id)
+                .values(
+                    hit_count=model.hit_count + batch.c.hits,
+                    last_accessed_at=func.greatest(model.last_accessed_at, batch.c.accessed_at),
+                )
+            )
+            written += len(hits)
+        db.commit()
+    except Exception as e:
+        logger.warning(f"Could not flush cache hit counters: {e}")
+        db.rollback()
+    finally:
+        db.close()
+    return written
+
+
+def evict_over_cap(db: Session, kind: str, max_bytes: int, policy: str) -> int:
+    """Delete the least valuable entries until the cache is below its size cap.
+
+    Returns the number of deleted entries. A cap of 0 disables eviction.
+    """
+    if max_bytes <= 0:
+        return 0
+
+    model = CACHE_MODELS[kind]
+    total = db.query(func.coalesce(func.sum(model.size_bytes), 0)).scalar()
+    if total <= max_bytes:
+        return 0
+    excess = total - int(max_bytes * EVICTION_TARGET_RATIO)
+
+    # Bare columns, so the LRU order can be read from ix_*_last_accessed instead of sorting the table
+    if policy == "lfu":
+        order = (model.hit_count.asc(), model.last_accessed_at.asc(), model.id.asc())
+    else:
+        order = (model.last_accessed_at.asc(), model.id.asc())
+
+    # Running total in eviction order; delete rows until the excess is covered
+    ranked = select(
+        model.id,
+        (func.sum(model.size_bytes).over(order_by=order) - model.size_bytes).label("freed_before"),
+    ).subquery()
+    victims = select(ranked.c.id).where(ranked.c.freed_before < excess)
+
+    deleted = db.query(model).filter(model.id.in_(victims)).delete(synchronize_session=False)
+    db.commit()
+
+    logger.info(f"Evicted {deleted} {kind} cache entries ({policy}, cache was {total} bytes, cap {max_bytes})")
+    return deleted
+
+
+def run_cache_eviction() -> Dict[str, int]:
+    """Enforce the configured size caps on both caches."""
+    caps = {
+        "hint": settings.hint_cache_max_bytes,
+        "tts": settings.tts_cache_max_bytes,
+    }
+    evicted = {}
+    db = SessionLocal()
+    try:
+        for kind, max_bytes in caps.items():
+            evicted[kind] = evict_over_cap(db, kind, max_bytes, settings.cache_eviction_policy)
+    except Exception as e:
+        logger.warning(f"Cache eviction failed: {e}")
+        db.rollback()
+    finally:
+        db.close()
+    return evicted
+
+
+def get_cache_accounting(db: Session, kind: str) -> Tuple[int, int, int]:
+    """Return (entries, total bytes, total hits) for a cache table in one query."""
+    model = CACHE_MODELS[kind]
+    count, size, hits = db.query(
+        func.count(model.id),
+        func.coalesce(func.sum(model.size_bytes), 0),
+        func.coalesce(func.sum(model.hit_count), 0),
+    ).one()
+    return count, size, hits
+
+
+async def flush_cache_hits() -> int:
+    """Write buffered hit counters to the database without blocking the event loop."""
+    pending = _take_pending_hits()
+    if not any(pending.values()):
+        return 0
+    return await asyncio.to_thread(write_cache_hits, pending)
+
+
+async def run_cache_maintenance() -> None:
+    """Background loop: flush hit counters often, enforce size caps less often."""
+    loop = asyncio.get_running_loop()
+    next_eviction = loop.time() + settings.cache_eviction_interval_seconds
+    try:
+        while True:
+            await asyncio.sleep(settings.cache_hit_flush_interval_seconds)
+            await flush_cache_hits()
+            if loop.time() >= next_eviction:
+                await asyncio.to_thread(run_cache_eviction)
+                next_eviction = loop.time() + settings.cache_eviction_interval_seconds
+    finally:
+        # Persist whatever was counted since the last flush on shutdown
+        await flush_cache_hits()
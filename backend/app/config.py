@@ -14,6 +14,26 @@ class Settings(BaseSettings):
     jwt_algorithm: str = "HS256"
     jwt_expire_minutes: int = 60 * 24  # 1 day (reduced from 7 days)
     
+    # Password hashing
+    bcrypt_rounds: int = 12  # Work factor; existing hashes are upgraded at next login
+    password_hash_workers: int = 2  # Threads dedicated to bcrypt per worker process
+    password_hash_max_pending: int = 32  # Hash/verify jobs allowed to queue before rejecting
+    password_hash_queue_timeout_seconds: float = 5.0  # Max wait for a hashing slot
+    
+    # Authenticated principal cache (skips the users lookup on hot paths)
+    principal_cache_ttl_seconds: float = 10.0  # Keep short: other workers see lockouts/role changes only after this
+    principal_cache_max_entries: int = 10000
+    
+    # Rate limiting storage shared between workers:
+    # "memory://" (per process), "shm:///dev/shm/nihongowow-ratelimit.db" (all workers
+    # on one host) or "redis://host:6379" (all replicas)
+    rate_limit_storage_uri: str = "memory://"
+    rate_limit_strategy: str = "sliding-window-counter"
+    # Overrides for RATE_LIMITS, e.g. "login=10/minute;hint=40/minute". Admins can
+    # also change them at runtime through settings named "rate_limit_<name>".
+    rate_limit_overrides: str = ""
+    rate_limit_refresh_seconds: float = 30.0
+    
     # CORS Settings
     cors_origins: str = "http://localhost:3000"
     
@@ -22,6 +42,28 @@ class Settings(BaseSettings):
     
     # OpenAI Settings (optional)
     openai_api_key: str = ""
+    openai_timeout_seconds: float = 30.0  # HTTP timeout of the underlying client
+    openai_hint_deadline_seconds: float = 15.0  # Total latency budget per hint call
+    openai_tts_deadline_seconds: float = 20.0  # Total latency budget per TTS call
+    openai_hint_concurrency: int = 8  # Max concurrent hint completions per worker
+    openai_tts_concurrency: int = 4  # Max concurrent TTS generations per worker
+    openai_queue_timeout_seconds: float = 2.0  # Max wait for a free concurrency slot
+    openai_circuit_failure_threshold: int = 5  # Consecutive failures before failing fast
+    openai_circuit_reset_seconds: float = 30.0  # Cool-down before a trial call is allowed
+    openai_hint_batch_size: int = 10  # Words per completion when warming the hint cache
+    
+    # Daily AI quotas: generations on a cache miss; cached hints and audio are free (0 = unlimited)
+    ai_hint_daily_quota: int = 50  # Per user
+    ai_tts_daily_quota: int = 100  # Per user
+    ai_anonymous_daily_quota: int = 20  # Per client IP, per kind and per worker, for requests without a login
+    ai_usage_flush_interval_seconds: float = 10.0  # How often usage counters are written (and reloaded)
+    
+    # AI cache accounting and eviction
+    cache_hit_flush_interval_seconds: float = 10.0  # How often buffered hit counters are written
+    cache_eviction_interval_seconds: float = 300.0  # How often size caps are enforced
+    cache_eviction_policy: str = "lru"  # "lru" (least recently used) or "lfu" (least frequently used)
+    hint_cache_max_bytes: int = 0  # 0 = unbounded
+    tts_cache_max_bytes: int = 500 * 1024 * 1024  # 500 MB of audio
     
     # SMTP Settings for MFA emails
     smtp_host: str = ""
@@ -30,6 +72,47 @@ class Settings(BaseSettings):
     smtp_password: str = ""
     smtp_from_email: str = "noreply@nihongowow.com"
     smtp_from_name: str = "NihongoWOW"
+    smtp_use_tls: bool = True  # STARTTLS; disable only for a local SMTP stand-in
+    smtp_timeout_seconds: float = 10.0
+    smtp_pool_size: int = 2  # Persistent SMTP connections per worker process
+    smtp_queue_size: int = 1000  # Mails that may wait for delivery before new ones are dropped
+    smtp_max_attempts: int = 3
+    smtp_retry_backoff_seconds: float = 1.0  # Doubles with every retry
+    smtp_idle_check_seconds: float = 30.0  # NOOP-check connections idle longer than this
+    smtp_batch_max_seconds: float = 300.0  # Bulk sends give up on the remaining recipients after this
+    
+    # Audit Log Settings
+    audit_log_file: str = ""  # JSON lines file with rotation; empty logs to stdout only
+    audit_log_max_bytes: int = 10 * 1024 * 1024  # Rotate the audit log file at this size
+    audit_log_backup_count: int = 5  # Rotated audit log files to keep
+    audit_log_queue_size: int = 10000  # Events buffered for the writer thread; overflow is dropped
+    audit_log_batch_size: int = 100  # Sinks are flushed at least every this many events
+    audit_log_database: bool = True  # Also store events in the audit_events table for the admin API
+    
+    # Score writes
+    score_write_mode: str = "immediate"  # "immediate" or "buffered" (write-behind, see app.score_writes)
+    score_flush_interval_seconds: float = 5.0  # Buffered mode: max age of unflushed scores (lost on crash)
+    score_buffer_max_entries: int = 10000  # Buffered mode: flush early once this many scores are buffered
+    
+    # Monthly partitions of daily_highscores (see app.score_partitions)
+    score_partition_months_ahead: int = 3  # Future months with a partition created in advance
+    score_retention_months: int = 0  # Detach partitions older than this many months; 0 = keep all
+    score_partition_maintenance_seconds: float = 86400.0  # Runs at startup, then at this interval
+    score_partition_lock_timeout_ms: int = 5000  # Partition DDL gives up (and retries next pass) after this wait
+    
+    # Leaderboards
+    leaderboard_size: int = 100  # Players kept per game and period
+    leaderboard_refresh_seconds: float = 60.0  # Reseed interval, picks up other workers' scores
+    leaderboard_push_interval_seconds: float = 1.0  # Live boards: changes are coalesced into one push per interval
+    leaderboard_live_entries: int = 10  # Live boards: entries per pushed snapshot
+    leaderboard_keepalive_seconds: float = 20.0  # Live boards: comment sent to idle streams to detect dead connections
+    
+    # Dashboard
+    dashboard_cache_ttl_seconds: float = 60.0  # How long vocabulary tags and settings are reused across requests
+    
+    # Expired token cleanup
+    token_cleanup_interval_seconds: float = 3600.0  # Runs at startup, then at this interval
+    token_cleanup_batch_size: int = 1000  # Rows deleted per transaction
     
     # MFA Settings
     mfa_code_expire_minutes: int = 10
@@ -1,4 +1,6 @@
-import smtplib
+import asyncio
+import hashlib
+import hmac
 import random
 import string
 import secrets
@@ -6,9 +8,10 @@ import logging
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, List, Tuple, Dict
 
 from app.config import get_settings
+from app.mail_delivery import OutgoingMail, mail_service
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
@@ -20,6 +23,11 @@ def generate_mfa_code(length: int = 6) -> str:
     return ''.join(secrets.choice(string.digits) for _ in range(length))
 
 
+def hash_mfa_code(code: str) -> str:
+    """Keyed hash of an MFA code; only the hash is stored in the database."""
+    return hmac.new(settings.jwt_secret.encode(), code.encode(), hashlib.sha256).hexdigest()
+
+
 def generate_verification_token(length: int = 32) -> str:
     """Generate a cryptographically secure random verification token for email confirmation.
     
@@ -39,6 +47,29 @@ def get_mfa_expiry() -> datetime:
     return datetime.utcnow() + timedelta(minutes=settings.mfa_code_expire_minutes)
 
 
+def _build_message(subject: str, email: str, text: str, html: str) -> MIMEMultipart:
+    """Build a multipart message with plain text and HTML versions."""
+    message = MIMEMultipart("alternative")
+    message["Subject"] = subject
+    message["From"] = f"{settings.smtp_from_name} <{settings.smtp_from_email}>"
+    message["To"] = email
+    message.attach(MIMEText(text, "plain"))
+    message.attach(MIMEText(html, "html"))
+    return message
+
+
+async def _deliver(mail: OutgoingMail) -> bool:
+    """Hand a message to the delivery queue.
+    
+    Outside the running app (e.g. scripts) the queue has no workers, so the
+    message is sent directly in a worker thread instead.
+    """
+    if mail_service.running:
+        return mail_service.enqueue(mail)
+    results = await asyncio.to_thread(mail_service.send_batch_blocking, [mail])
+    return results.get(mail.recipient, False)
+
+
 def create_mfa_email_html(code: str, username: str) -> str:
     """Create HTML email template for MFA code."""
     return f"""
@@ -246,33 +277,13 @@ async def send_verification_email(email: str, token: str, username: str, fronten
             logger.info(f"[DEV MODE] Verification email would be sent to {email}")
         return True
     
-    try:
-        # Create message
-        message = MIMEMultipart("alternative")
-        message["Subject"] = "NihongoWOW - Confirm Your Email Address"
-        message["From"] = f"{settings.smtp_from_name} <{settings.smtp_from_email}>"
-        message["To"] = email
-        
-        # Add plain text and HTML versions
-        text_part = MIMEText(create_verification_email_text(verification_url, username), "plain")
-        html_part = MIMEText(create_verification_email_html(verification_url, username), "html")
-        
-        message.attach(text_part)
-        message.attach(html_part)
-        
-        # Send email
-        with smtplib.SMTP(settings.smtp_host, settings.smtp_port) as server:
-            server.starttls()
-            if settings.smtp_user and settings.smtp_password:
-                server.login(settings.smtp_user, settings.smtp_password)
-            server.sendmail(settings.smtp_from_email, email, message.as_string())
-        
-        logger.info(f"Verification email sent successfully to {email}")
-        return True
-        
-    except Exception as e:
-        logger.error(f"Failed to send verification email: {e}")
-        return False
+    message = _build_message(
+        "NihongoWOW - Confirm Your Email Address",
+        email,
+        create_verification_email_text(verification_url, username),
+        create_verification_email_html(verification_url, username)
+    )
+    return await _deliver(OutgoingMail(recipient=email, message=message, description="Verification email"))
 
 
 async def send_mfa_code(email: str, code: str, username: str) -> bool:
@@ -286,34 +297,14 @@ async def send_mfa_code(email: str, code: str, username: str) -> bool:
             logger.info(f"[DEV MODE] MFA code generated for {email}")
         return True
     
-    try:
-        # Create message
-        message = MIMEMultipart("alternative")
+    message = _build_message(
         # SECURITY: Don't include the code in the subject line (visible in logs, previews)
-        message["Subject"] = "NihongoWOW - Your Login Verification Code"
-        message["From"] = f"{settings.smtp_from_name} <{settings.smtp_from_email}>"
-        message["To"] = email
-        
-        # Add plain text and HTML versions
-        text_part = MIMEText(create_mfa_email_text(code, username), "plain")
-        html_part = MIMEText(create_mfa_email_html(code, username), "html")
-        
-        message.attach(text_part)
-        message.attach(html_part)
-        
-        # Send email
-        with smtplib.SMTP(settings.smtp_host, settings.smtp_port) as server:
-            server.starttls()
-            if settings.smtp_user and settings.smtp_password:
-                server.login(settings.smtp_user, settings.smtp_password)
-            server.sendmail(settings.smtp_from_email, email, message.as_string())
-        
-        logger.info(f"MFA code email sent successfully to {email}")
-        return True
-        
-    except Exception as e:
-        logger.error(f"Failed to send MFA email: {e}")
-        return False
+        "NihongoWOW - Your Login Verification Code",
+        email,
+        create_mfa_email_text(code, username),
+        create_mfa_email_html(code, username)
+    )
+    return await _deliver(OutgoingMail(recipient=email, message=message, description="MFA code email"))
 
 
 def generate_invitation_token(length: int = 32) -> str:
@@ -439,46 +430,63 @@ NihongoWOW - Learn Japanese the fun way!
 """
 
 
+def _invitation_url(email: str, token: str, frontend_url: str) -> str:
+    # URL includes email and token for pre-filling the registration form
+    return f"{frontend_url}/register?email={email}&invitation_token={token}"
+
+
+def _build_invitation_message(email: str, token: str, inviter_name: str, frontend_url: str) -> MIMEMultipart:
+    invitation_url = _invitation_url(email, token, frontend_url)
+    return _build_message(
+        "NihongoWOW - You're Invited!",
+        email,
+        create_invitation_email_text(invitation_url, inviter_name),
+        create_invitation_email_html(invitation_url, inviter_name)
+    )
+
+
 async def send_invitation_email(email: str, token: str, inviter_name: str, frontend_url: str = "http://localhost:3000") -> bool:
     """
     Send invitation email with registration link.
     Returns True if email was sent successfully, False otherwise.
     """
-    # URL includes email and token for pre-filling the registration form
-    invitation_url = f"{frontend_url}/register?email={email}&invitation_token={token}"
-    
     if not settings.smtp_host:
         # SMTP not configured - log for development
         if settings.debug:
             logger.info(f"[DEV MODE] Invitation email would be sent to {email}")
-            logger.info(f"[DEV MODE] Invitation URL: {invitation_url}")
+            logger.info(f"[DEV MODE] Invitation URL: {_invitation_url(email, token, frontend_url)}")
         return True
     
-    try:
-        # Create message
-        message = MIMEMultipart("alternative")
-        message["Subject"] = "NihongoWOW - You're Invited!"
-        message["From"] = f"{settings.smtp_from_name} <{settings.smtp_from_email}>"
-        message["To"] = email
-        
-        # Add plain text and HTML versions
-        text_part = MIMEText(create_invitation_email_text(invitation_url, inviter_name), "plain")
-        html_part = MIMEText(create_invitation_email_html(invitation_url, inviter_name), "html")
-        
-        message.attach(text_part)
-        message.attach(html_part)
-        
-        # Send email
-        with smtplib.SMTP(settings.smtp_host, settings.smtp_port) as server:
-            server.starttls()
-            if settings.smtp_user and settings.smtp_password:
-                server.login(settings.smtp_user, settings.smtp_password)
-            server.sendmail(settings.smtp_from_email, email, message.as_string())
-        
-        logger.info(f"Invitation email sent successfully to {email}")
-        return True
-        
-    except Exception as e:
-        logger.error(f"Failed to send invitation email: {e}")
-        return False
+    message = _build_invitation_message(email, token, inviter_name, frontend_url)
+    return await _deliver(OutgoingMail(recipient=email, message=message, description="Invitation email"))
+
 
+async def send_invitation_emails_bulk(
+    invitations: List[Tuple[str, str]],
+    inviter_name: str,
+    frontend_url: str = "http://localhost:3000"
+) -> Dict[str, bool]:
+    """
+    Send several invitation emails over a single SMTP session.
+    Takes (email, token) pairs and returns whether each email was sent.
+    """
+    if not settings.smtp_host:
+        if settings.debug:
+            logger.info(f"[DEV MODE] {len(invitations)} invitation emails would be sent")
+        return {email: True for email, _ in invitations}
+    
+    mails = [
+        OutgoingMail(
+            recipient=email,
+            message=_build_invitation_message(email, token, inviter_name, frontend_url),
+            description="Invitation email"
+        )
+        for email, token in invitations
+    ]
+    results = await asyncio.to_thread(mail_service.send_batch_blocking, mails)
+    
+    failed = [email for email, sent in results.items() if not sent]
+    logger.info(f"Bulk invitation emails: {len(results) - len(failed)} sent, {len(failed)} failed")
+    if failed:
+        logger.warning(f"Invitation emails not delivered to: {', '.join(failed)}")
+    return results
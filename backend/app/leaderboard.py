@@ -0,0 +1,348 @@
+"""
+In-memory top-N leaderboards per game type and period.
+
+Each board keeps the best `leaderboard_size` players of one game for the
+current day, week or all time. Boards are seeded lazily with a top-N
+query over ix_daily_highscores_game_date (all-time boards read the best
+scores kept in user_score_summary, which outlive detached daily_highscores
+partitions) and then updated incrementally
+by score updates, so reading a leaderboard never touches the database.
+Scores only ever increase within a period, so offering the new score is
+enough to keep a board exact. A background task reseeds the boards
+periodically to pick up scores written by other workers; scores this
+worker has buffered but not written yet are merged into the new board.
+
+Live watchers subscribe to a board and get the top entries pushed when
+it changes. Changes are coalesced to at most one push per board every
+LEADERBOARD_PUSH_INTERVAL_SECONDS, and each watcher has a one-slot queue
+that only ever holds the latest snapshot, so slow or idle watchers cost
+no more than a waiting task.
+
+Ranks beyond the top N come from DailyRanks: every player's score of the
+day kept in a sorted list, so a rank is a binary search instead of a
+COUNT(*) over daily_highscores.
+"""
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+from sortedcontainers import SortedList
+from sqlalchemy import func
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models import DailyHighscore, User, UserScoreSummary
+from app.score_writes import buffered_best_scores
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+PERIODS = ("day", "week", "all")
+
+
+@dataclass
+class LeaderboardEntry:
+    user_id: UUID
+    username: str
+    score: int
+
+
+def period_start(period: str, today: Optional[date] = None) -> Optional[date]:
+    """First day counted by a period (None for all time); also identifies the period."""
+    today = today or date.today()
+    if period == "day":
+        return today
+    if period == "week":
+        return today - timedelta(days=today.weekday())
+    return None
+
+
+class TopN:
+    """The best `size` scores of one board, one entry per user."""
+
+    def __init__(self, size: int, starts: Optional[date], entries: List[LeaderboardEntry]):
+        self.size = size
+        self.starts = starts
+        self._entries: Dict[UUID, LeaderboardEntry] = {entry.user_id: entry for entry in entries}
+        self._ranked: Optional[List[Tuple[int, LeaderboardEntry]]] = None
+
+    @staticmethod
+    def _order(entry: LeaderboardEntry) -> Tuple[int, str]:
+        return -entry.score, entry.username
+
+    def _last(self) -> LeaderboardEntry:
+        return max(self._entries.values(), key=self._order)
+
+    def offer(self, user_id: UUID, username: str, score: int) -> bool:
+        """Record a user's new best score. Returns True if the board changed."""
+        current = self._entries.get(user_id)
+        if current is not None:
+            if score <= current.score:
+                return False
+            current.score = score
+        else:
+            if len(self._entries) >= self.size and score <= self._last().score:
+                return False
+            self._entries[user_id] = LeaderboardEntry(user_id=user_id, username=username, score=score)
+            if len(self._entries) > self.size:
+                del self._entries[self._last().user_id]
+        self._ranked = None
+        return True
+
+    def ranked(self) -> List[Tuple[int, LeaderboardEntry]]:
+        """Entries best first with competition ranks (1, 2, 2, 4, ...)."""
+        if self._ranked is None:
+            ordered = sorted(self._entries.values(), key=self._order)
+            ranked = []
+            for position, entry in enumerate(ordered, start=1):
+                if ranked and ranked[-1][1].score == entry.score:
+                    ranked.append((ranked[-1][0], entry))
+                else:
+                    ranked.append((position, entry))
+            self._ranked = ranked
+        return self._ranked
+
+
+class DailyRanks:
+    """Every player's score of one game and day, for O(log n) rank lookups."""
+
+    def __init__(self, day: date, scores: Dict[UUID, int]):
+        self.day = day
+        self._scores = dict(scores)
+        self._sorted = SortedList(self._scores.values())
+
+    def __len__(self) -> int:
+        return len(self._sorted)
+
+    def offer(self, user_id: UUID, score: int) -> None:
+        """Record a user's new best score of the day."""
+        current = self._scores.get(user_id)
+        if current is not None:
+            if score <= current:
+                return
+            self._sorted.remove(current)
+        self._scores[user_id] = score
+        self._sorted.add(score)
+
+    def score(self, user_id: UUID) -> Optional[int]:
+        return self._scores.get(user_id)
+
+    def rank(self, score: int) -> int:
+        """Competition rank of a score: 1 + the number of strictly higher scores."""
+        return len(self._sorted) - self._sorted.bisect_right(score) + 1
+
+
+# (game type, period) -> board
+_boards: Dict[Tuple[str, str], TopN] = {}
+_seed_locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+
+# (game type, period) -> live watcher queues, and the last snapshot pushed to them
+_subscribers: Dict[Tuple[str, str], Set[asyncio.Queue]] = {}
+_last_pushed: Dict[Tuple[str, str], str] = {}
+
+# game type -> today's ranks
+_ranks: Dict[str, DailyRanks] = {}
+_rank_locks: Dict[str, asyncio.Lock] = {}
+
+
+def load_top_scores(game_type: str, starts: Optional[date], size: int) -> List[LeaderboardEntry]:
+    """Query the best score per user for a game since `starts` (all time if None)."""
+    db = SessionLocal()
+    try:
+        if starts is None:
+            best = UserScoreSummary.best_score.label("best")
+            query = db.query(UserScoreSummary.user_id, best).filter(UserScoreSummary.game_type == game_type)
+        else:
+            best = func.max(DailyHighscore.score).label("best")
+            query = db.query(DailyHighscore.user_id, best).filter(
+                DailyHighscore.game_type == game_type,
+                DailyHighscore.date >= starts
+            ).group_by(DailyHighscore.user_id)
+        top = query.order_by(best.desc()).limit(size).subquery()
+        rows = db.query(top.c.user_id, User.username, top.c.best).join(User, User.id == top.c.user_id).all()
+        return [LeaderboardEntry(user_id=row.user_id, username=row.username, score=row.best) for row in rows]
+    finally:
+        db.close()
+
+
+def load_usernames(user_ids: List[UUID]) -> Dict[UUID, str]:
+    """Query the usernames of users that still exist."""
+    db = SessionLocal()
+    try:
+        return {row.id: row.username for row in db.query(User.id, User.username).filter(User.id.in_(user_ids))}
+    finally:
+        db.close()
+
+
+def load_day_scores(game_type: str, day: date) -> Dict[UUID, int]:
+    """Query every player's score of a game on one day."""
+    db = SessionLocal()
+    try:
+        rows = db.query(DailyHighscore.user_id, DailyHighscore.score).filter(
+            DailyHighscore.game_type == game_type,
+            DailyHighscore.date == day
+        ).all()
+        return {row.user_id: row.score for row in rows}
+    finally:
+        db.close()
+
+
+async def _seed(game_type: str, period: str) -> TopN:
+    starts = period_start(period)
+    entries = await asyncio.to_thread(load_top_scores, game_type, starts, settings.leaderboard_size)
+    board = TopN(settings.leaderboard_size, starts, entries)
+    # Add scores buffered here that the database doesn't have yet; only the best can make the board
+    buffered = sorted(buffered_best_scores(game_type, starts).items(), key=lambda item: -item[1])
+    buffered = buffered[:settings.leaderboard_size]
+    if buffered:
+        usernames = await asyncio.to_thread(load_usernames, [user_id for user_id, _ in buffered])
+        for user_id, score in buffered:
+            # Users deleted since are left out
+            if user_id in usernames:
+                board.offer(user_id, usernames[user_id], score)
+    _boards[(game_type, period)] = board
+    return board
+
+
+async def get_leaderboard(game_type: str, period: str) -> TopN:
+    """Return a board, seeding it first if it is missing or its period has rolled over."""
+    key = (game_type, period)
+    board = _boards.get(key)
+    if board is not None and board.starts == period_start(period):
+        return board
+    lock = _seed_locks.setdefault(key, asyncio.Lock())
+    async with lock:
+        board = _boards.get(key)
+        if board is None or board.starts != period_start(period):
+            board = await _seed(game_type, period)
+    return board
+
+
+async def _seed_ranks(game_type: str) -> DailyRanks:
+    today = date.today()
+    scores = await asyncio.to_thread(load_day_scores, game_type, today)
+    # Add scores buffered here that the database doesn't have yet
+    for user_id, score in buffered_best_scores(game_type, today).items():
+        if score > scores.get(user_id, -1):
+            scores[user_id] = score
+    ranks = DailyRanks(today, scores)
+    _ranks[game_type] = ranks
+    return ranks
+
+
+async def get_daily_ranks(game_type: str) -> DailyRanks:
+    """Return today's ranks of a game, seeding them first if missing or from a past day."""
+    ranks = _ranks.get(game_type)
+    if ranks is not None and ranks.day == date.today():
+        return ranks
+    async with _rank_locks.setdefault(game_type, asyncio.Lock()):
+        ranks = _ranks.get(game_type)
+        if ranks is None or ranks.day != date.today():
+            ranks = await _seed_ranks(game_type)
+    return ranks
+
+
+def record_score(user_id: UUID, username: str, game_type: str, score: int) -> None:
+    """Offer a user's best score of today to every loaded board of the game."""
+    for period in PERIODS:
+        board = _boards.get((game_type, period))
+        # Boards of a past period are reseeded on their next read
+        if board is not None and board.starts == period_start(period):
+            board.offer(user_id, username, score)
+    ranks = _ranks.get(game_type)
+    if ranks is not None and ranks.day == date.today():
+        ranks.offer(user_id, score)
+
+
+async def run_leaderboard_refresh() -> None:
+    """Background loop: reseed loaded boards to include other workers' scores."""
+    while True:
+        await asyncio.sleep(settings.leaderboard_refresh_seconds)
+        for game_type, period in list(_boards):
+            try:
+                async with _seed_locks.setdefault((game_type, period), asyncio.Lock()):
+                    await _seed(game_type, period)
+            except Exception as e:
+                logger.warning(f"Could not refresh {period} leaderboard for {game_type}: {e}")
+        for game_type in list(_ranks):
+            try:
+                async with _rank_locks.setdefault(game_type, asyncio.Lock()):
+                    await _seed_ranks(game_type)
+            except Exception as e:
+                logger.warning(f"Could not refresh daily ranks for {game_type}: {e}")
+
+
+def leaderboard_snapshot(game_type: str, period: str, board: TopN) -> str:
+    """Top entries of a board as JSON, as pushed to live watchers."""
+    return json.dumps({
+        "game_type": game_type,
+        "period": period,
+        "entries": [
+            {"rank": rank, "username": entry.username, "score": entry.score}
+            for rank, entry in board.ranked()[:settings.leaderboard_live_entries]
+        ],
+    }, ensure_ascii=False)
+
+
+def _offer_latest(queue: asyncio.Queue, snapshot: str) -> None:
+    """Replace whatever the watcher hasn't consumed yet with the newest snapshot."""
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(snapshot)
+
+
+async def subscribe(game_type: str, period: str) -> asyncio.Queue:
+    """Register a live watcher; its queue starts with the current snapshot."""
+    key = (game_type, period)
+    board = await get_leaderboard(game_type, period)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+    snapshot = leaderboard_snapshot(game_type, period, board)
+    queue.put_nowait(snapshot)
+    if key not in _subscribers:
+        _subscribers[key] = set()
+        _last_pushed[key] = snapshot
+    _subscribers[key].add(queue)
+    return queue
+
+
+def unsubscribe(game_type: str, period: str, queue: asyncio.Queue) -> None:
+    key = (game_type, period)
+    watchers = _subscribers.get(key)
+    if watchers is None:
+        return
+    watchers.discard(queue)
+    if not watchers:
+        del _subscribers[key]
+        _last_pushed.pop(key, None)
+
+
+async def push_leaderboard_changes() -> int:
+    """Push one snapshot per watched board that changed since the last push."""
+    pushed = 0
+    for key in list(_subscribers):
+        try:
+            # Also rolls day/week boards over to the new period
+            board = await get_leaderboard(*key)
+        except Exception as e:
+            logger.warning(f"Could not load {key[1]} leaderboard for {key[0]}: {e}")
+            continue
+        # Comparing snapshots also skips reseeds and changes below the pushed entries
+        snapshot = leaderboard_snapshot(key[0], key[1], board)
+        if _last_pushed.get(key) == snapshot:
+            continue
+        _last_pushed[key] = snapshot
+        for queue in _subscribers.get(key, ()):
+            _offer_latest(queue, snapshot)
+            pushed += 1
+    return pushed
+
+
+async def run_leaderboard_push() -> None:
+    """Background loop: coalesce board changes into periodic pushes to live watchers."""
+    while True:
+        await asyncio.sleep(settings.leaderboard_push_interval_seconds)
+        await push_leaderboard_changes()
@@ -0,0 +1,275 @@
+"""
+Asynchronous mail delivery with a persistent SMTP connection pool.
+
+Request handlers enqueue ready-made messages; a fixed number of worker
+tasks deliver them, each over its own long-lived SMTP connection that is
+driven from a dedicated thread so the event loop never blocks on SMTP.
+Failed deliveries are retried with exponential backoff.
+"""
+import asyncio
+import logging
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from email.message import Message
+from typing import Dict, List, Optional
+
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OutgoingMail:
+    """A message waiting for delivery."""
+    recipient: str
+    message: Message
+    description: str  # Used in logs, e.g. "MFA code email"
+    attempts: int = 0
+
+
+@dataclass
+class MailMetrics:
+    """Delivery counters, updated from the event loop and the SMTP threads."""
+    queued: int = 0
+    sent: int = 0
+    failed: int = 0
+    retried: int = 0
+    dropped: int = 0
+    connections_opened: int = 0
+    last_error: Optional[str] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def increment(self, counter: str, amount: int = 1) -> None:
+        # += on an attribute is not atomic across threads
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def record_error(self, error: Exception) -> None:
+        with self._lock:
+            self.last_error = str(error)
+
+    def as_dict(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "queued": self.queued,
+                "sent": self.sent,
+                "failed": self.failed,
+                "retried": self.retried,
+                "dropped": self.dropped,
+                "connections_opened": self.connections_opened,
+                "last_error": self.last_error,
+            }
+
+
+class SMTPConnection:
+    """One persistent SMTP session, reconnected lazily when it goes stale.
+
+    All methods block and must run in this connection's own thread.
+    """
+
+    def __init__(self, metrics: MailMetrics):
+        self._metrics = metrics
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+
+    def _connect(self) -> smtplib.SMTP:
+        smtp = smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=settings.smtp_timeout_seconds)
+        if settings.smtp_use_tls:
+            smtp.starttls()
+        if settings.smtp_user and settings.smtp_password:
+            smtp.login(settings.smtp_user, settings.smtp_password)
+        self._metrics.increment("connections_opened")
+        return smtp
+
+    def _ensure_connected(self) -> smtplib.SMTP:
+        if self._smtp is not None and time.monotonic() - self._last_used > settings.smtp_idle_check_seconds:
+            # Servers drop idle sessions; check before reusing
+            try:
+                if self._smtp.noop()[0] != 250:
+                    self.close()
+            except (smtplib.SMTPException, OSError):
+                self.close()
+        if self._smtp is None:
+            self._smtp = self._connect()
+        return self._smtp
+
+    def send(self, mail: OutgoingMail) -> None:
+        smtp = self._ensure_connected()
+        try:
+            smtp.sendmail(settings.smtp_from_email, mail.recipient, mail.message.as_string())
+        except (smtplib.SMTPServerDisconnected, OSError):
+            # Connection broke mid-session; drop it so the retry reconnects
+            self.close()
+            raise
+        self._last_used = time.monotonic()
+
+    def close(self) -> None:
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            pass
+        self._smtp = None
+
+
+class MailDeliveryService:
+    """Bounded mail queue drained by a pool of SMTP connections."""
+
+    def __init__(self, pool_size: int, queue_size: int, max_attempts: int, backoff_seconds: float):
+        self.pool_size = pool_size
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.metrics = MailMetrics()
+        self._queue: "asyncio.Queue[OutgoingMail]" = asyncio.Queue(maxsize=queue_size)
+        self._workers: List[asyncio.Task] = []
+        self._executors: List[ThreadPoolExecutor] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    def start(self) -> None:
+        if self._workers:
+            return
+        for index in range(self.pool_size):
+            # One thread per connection keeps each SMTP session single-threaded
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"smtp-{index}")
+            self._executors.append(executor)
+            self._workers.append(asyncio.create_task(self._worker(executor)))
+
+    def enqueue(self, mail: OutgoingMail) -> bool:
+        """Queue a message for delivery. Returns False if the queue is full."""
+        try:
+            self._queue.put_nowait(mail)
+        except asyncio.QueueFull:
+            self.metrics.increment("dropped")
+            logger.error(f"Mail queue full, dropped {mail.description} to {mail.recipient}")
+            return False
+        self.metrics.increment("queued")
+        return True
+
+    def send_batch_blocking(self, mails: List[OutgoingMail]) -> Dict[str, bool]:
+        """Deliver several messages over a single SMTP session (blocking).
+
+        Used for bulk sends that must report a per-recipient result. The
+        batch is abandoned when the server can't be reached or after
+        SMTP_BATCH_MAX_SECONDS; the remaining recipients are reported as
+        not delivered.
+        """
+        connection = SMTPConnection(self.metrics)
+        results: Dict[str, bool] = {}
+        deadline = time.monotonic() + settings.smtp_batch_max_seconds
+        abort_reason: Optional[str] = None
+        skipped = 0
+        try:
+            for mail in mails:
+                if abort_reason is None and time.monotonic() >= deadline:
+                    abort_reason = f"batch exceeded {settings.smtp_batch_max_seconds:.0f}s"
+                if abort_reason is not None:
+                    results[mail.recipient] = False
+                    skipped += 1
+                    continue
+                delivered = False
+                error: Optional[Exception] = None
+                for attempt in range(1, self.max_attempts + 1):
+                    try:
+                        connection.send(mail)
+                        delivered = True
+                        break
+                    except Exception as e:
+                        error = e
+                        self.metrics.record_error(e)
+                        delay = self.backoff_seconds * 2 ** (attempt - 1)
+                        if attempt >= self.max_attempts or time.monotonic() + delay >= deadline:
+                            break
+                        self.metrics.increment("retried")
+                        time.sleep(delay)
+                if delivered:
+                    self.metrics.increment("sent")
+                else:
+                    self.metrics.increment("failed")
+                    logger.error(f"Failed to send {mail.description} to {mail.recipient}: {error}")
+                    if error is not None and _is_connection_failure(error):
+                        abort_reason = f"SMTP server unavailable ({error})"
+                results[mail.recipient] = delivered
+        finally:
+            connection.close()
+        if skipped:
+            self.metrics.increment("failed", skipped)
+            logger.error(f"Gave up on {skipped} remaining message(s) of a batch: {abort_reason}")
+        return results
+
+    async def _worker(self, executor: ThreadPoolExecutor) -> None:
+        loop = asyncio.get_running_loop()
+        connection = SMTPConnection(self.metrics)
+        try:
+            while True:
+                mail = await self._queue.get()
+                try:
+                    await self._deliver(loop, executor, connection, mail)
+                finally:
+                    self._queue.task_done()
+        finally:
+            await loop.run_in_executor(executor, connection.close)
+
+    async def _deliver(self, loop, executor, connection: SMTPConnection, mail: OutgoingMail) -> None:
+        while True:
+            mail.attempts += 1
+            try:
+                await loop.run_in_executor(executor, connection.send, mail)
+                self.metrics.increment("sent")
+                logger.info(f"{mail.description} sent successfully to {mail.recipient}")
+                return
+            except Exception as e:
+                self.metrics.record_error(e)
+                if mail.attempts >= self.max_attempts:
+                    self.metrics.increment("failed")
+                    logger.error(f"Failed to send {mail.description} after {mail.attempts} attempts: {e}")
+                    return
+                self.metrics.increment("retried")
+                delay = self.backoff_seconds * 2 ** (mail.attempts - 1)
+                logger.warning(f"Sending {mail.description} failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def stop(self, drain_timeout: float) -> None:
+        """Let queued mail drain for up to drain_timeout seconds, then stop the workers."""
+        if not self._workers:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Stopping mail delivery with {self._queue.qsize()} message(s) undelivered")
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        for executor in self._executors:
+            executor.shutdown(wait=False)
+        self._workers = []
+        self._executors = []
+
+    def stats(self) -> Dict[str, object]:
+        stats = self.metrics.as_dict()
+        stats["pending"] = self._queue.qsize()
+        stats["pool_size"] = self.pool_size
+        return stats
+
+
+def _is_connection_failure(error: Exception) -> bool:
+    """Whether the error means the server is unusable, not just this recipient."""
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, smtplib.SMTPAuthenticationError)):
+        return True
+    # SMTPException subclasses OSError; a plain OSError is a socket failure
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+mail_service = MailDeliveryService(
+    pool_size=settings.smtp_pool_size,
+    queue_size=settings.smtp_queue_size,
+    max_attempts=settings.smtp_max_attempts,
+    backoff_seconds=settings.smtp_retry_backoff_seconds,
+)
@@ -1,5 +1,5 @@
 from contextlib import asynccontextmanager
-from datetime import datetime
+import asyncio
 import logging
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
@@ -8,11 +8,19 @@ from slowapi.errors import RateLimitExceeded
 
 from app.config import get_settings
 from app.database import SessionLocal
-from app.models import User, MFACode, EmailVerificationToken, Invitation
-from app.routers import auth, vocabulary, quiz, kana, scores, admin, user_preferences
+from app.models import User
+from app.routers import auth, vocabulary, quiz, kana, scores, admin, user_preferences, dashboard
 from app.routers import settings as settings_router
-from app.rate_limiter import limiter, rate_limit_exceeded_handler
+from app.rate_limiter import limiter, rate_limit_exceeded_handler, run_rate_limit_refresh
 from app.security_headers import SecurityHeadersMiddleware
+from app.cache_maintenance import run_cache_maintenance
+from app.token_cleanup import run_token_cleanup_loop
+from app.leaderboard import run_leaderboard_push, run_leaderboard_refresh
+from app.score_writes import run_score_flush
+from app.score_partitions import run_partition_maintenance_loop
+from app.ai_quota import run_ai_usage_flush
+from app.mail_delivery import mail_service
+from app.audit_logger import start_audit_logging, stop_audit_logging
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
@@ -33,7 +41,11 @@ def sync_admin_emails():
         updated = db.query(User).filter(
             User.email.in_(admin_emails),
             User.is_admin == False
-        ).update({User.is_admin: True}, synchronize_session=False)
+        ).update(
+            # Bump token_version so tokens issued without the admin claim are reissued
+            {User.is_admin: True, User.token_version: User.token_version + 1},
+            synchronize_session=False
+        )
         
         if updated > 0:
             db.commit()
@@ -45,45 +57,31 @@ def sync_admin_emails():
         db.close()
 
 
-def cleanup_expired_tokens():
-    """Remove expired MFA codes, verification tokens, and invitations from the database."""
-    db = SessionLocal()
-    try:
-        now = datetime.utcnow()
-        
-        # Delete expired MFA codes
-        deleted_mfa = db.query(MFACode).filter(
-            MFACode.expires_at < now
-        ).delete(synchronize_session=False)
-        
-        # Delete expired verification tokens
-        deleted_tokens = db.query(EmailVerificationToken).filter(
-            EmailVerificationToken.expires_at < now
-        ).delete(synchronize_session=False)
-        
-        # Delete expired invitations that haven't been accepted
-        deleted_invitations = db.query(Invitation).filter(
-            Invitation.expires_at < now,
-            Invitation.accepted == False
-        ).delete(synchronize_session=False)
-        
-        if deleted_mfa > 0 or deleted_tokens > 0 or deleted_invitations > 0:
-            db.commit()
-            logger.info(f"Cleaned up {deleted_mfa} expired MFA codes, {deleted_tokens} expired verification tokens, and {deleted_invitations} expired invitations")
-    except Exception as e:
-        logger.warning(f"Could not cleanup expired tokens: {e}")
-        db.rollback()
-    finally:
-        db.close()
-
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup tasks
+    start_audit_logging()
     sync_admin_emails()
-    cleanup_expired_tokens()
+    background_tasks = [
+        asyncio.create_task(run_token_cleanup_loop()),
+        asyncio.create_task(run_cache_maintenance()),
+        asyncio.create_task(run_rate_limit_refresh()),
+        asyncio.create_task(run_leaderboard_refresh()),
+        asyncio.create_task(run_leaderboard_push()),
+        asyncio.create_task(run_score_flush()),
+        asyncio.create_task(run_partition_maintenance_loop()),
+        asyncio.create_task(run_ai_usage_flush()),
+    ]
+    if settings.smtp_host:
+        mail_service.start()
     yield
-    # Shutdown: nothing to do
+    # Shutdown: give queued mail a chance to go out, then stop background loops
+    # (they flush buffered state on cancellation)
+    await mail_service.stop(drain_timeout=10.0)
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    stop_audit_logging()
 
 
 app = FastAPI(
@@ -111,6 +109,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["Authorization", "Content-Type", "X-Requested-With"],
+    # Remaining AI quota, readable by the frontend
+    expose_headers=["X-AI-Quota-Limit", "X-AI-Quota-Remaining", "X-AI-Quota-Reset"],
 )
 
 # Include routers
@@ -122,6 +122,7 @@ app.include_router(kana.router)
 app.include_router(scores.router)
 app.include_router(admin.router)
 app.include_router(user_preferences.router)
+app.include_router(dashboard.router)
 
 
 @app.get("/")
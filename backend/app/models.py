@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime, date
-from sqlalchemy import Column, String, DateTime, Boolean, Integer, Date, ForeignKey, UniqueConstraint, Text, LargeBinary
+from sqlalchemy import Column, String, DateTime, Boolean, Integer, Date, ForeignKey, UniqueConstraint, Index, Text, LargeBinary
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -21,6 +21,9 @@ class User(Base):
     # Account lockout fields for brute-force protection
     failed_login_attempts = Column(Integer, default=0, nullable=False)
     locked_until = Column(DateTime, nullable=True)
+    
+    # Bumped on lockout or role change; tokens carrying an older version are rejected
+    token_version = Column(Integer, default=0, nullable=False)
 
     # Relationships
     mfa_codes = relationship("MFACode", back_populates="user", cascade="all, delete-orphan")
@@ -45,9 +48,10 @@ class MFACode(Base):
     __tablename__ = "mfa_codes"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    code = Column(String(6), nullable=False)
-    expires_at = Column(DateTime, nullable=False)
+    # One pending code per user, replaced in place by INSERT ... ON CONFLICT
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, unique=True)
+    code = Column(String(64), nullable=False)  # HMAC-SHA256 of the code, see hash_mfa_code
+    expires_at = Column(DateTime, nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationship
@@ -60,7 +64,7 @@ class EmailVerificationToken(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     token = Column(String(64), unique=True, nullable=False, index=True)
-    expires_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationship
@@ -73,19 +77,90 @@ class DailyHighscore(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     game_type = Column(String(20), nullable=False)  # "quiz", "salad", "lines"
-    date = Column(Date, nullable=False, default=date.today)
+    # Partition key: part of the primary key, as Postgres requires for partitioned tables
+    date = Column(Date, primary_key=True, nullable=False, default=date.today)
     score = Column(Integer, nullable=False, default=0)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Unique constraint: one score per user per game per day
     __table_args__ = (
         UniqueConstraint('user_id', 'game_type', 'date', name='uix_user_game_date'),
+        # A user's scores of a date range, e.g. to recompute rollups
+        Index('ix_daily_highscores_user_date', 'user_id', 'date'),
+        Index('ix_daily_highscores_game_date', 'game_type', 'date', 'score'),
+        # One partition per month, managed by app.score_partitions
+        {"postgresql_partition_by": "RANGE (date)"},
     )
 
     # Relationship
     user = relationship("User", back_populates="highscores")
 
 
+class UserScoreSummary(Base):
+    """Per-user, per-game score aggregates, updated in the same statement as the daily score upsert."""
+    __tablename__ = "user_score_summary"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    game_type = Column(String(20), nullable=False)
+    best_score = Column(Integer, nullable=False, default=0)
+    today_score = Column(Integer, nullable=False, default=0)  # Score of today_date
+    today_date = Column(Date, nullable=False)
+    days_played = Column(Integer, nullable=False, default=0)
+    last_played_date = Column(Date, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'game_type', name='uix_user_score_summary_user_game'),
+    )
+
+
+class UserScoreRollup(Base):
+    """Per-user score totals of one week or month, kept current by app.score_rollups."""
+    __tablename__ = "user_score_rollups"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    period = Column(String(10), nullable=False)  # "week" (starts Monday) or "month"
+    period_start = Column(Date, nullable=False)
+    total_score = Column(Integer, nullable=False, default=0)  # Sum of daily scores over all games
+    days_played = Column(Integer, nullable=False, default=0)
+    best_score = Column(Integer, nullable=False, default=0)  # Best daily score of any game
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'period', 'period_start', name='uix_user_score_rollup_period'),
+    )
+
+
+class UserStreak(Base):
+    """Consecutive days with at least one score, kept current by app.score_rollups."""
+    __tablename__ = "user_streaks"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, unique=True)
+    current_streak = Column(Integer, nullable=False, default=0)  # Run ending at last_played_date
+    longest_streak = Column(Integer, nullable=False, default=0)
+    last_played_date = Column(Date, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class UserAIUsage(Base):
+    """AI generations (cache misses) per user and day, flushed from in-memory counters by app.ai_quota."""
+    __tablename__ = "user_ai_usage"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    date = Column(Date, nullable=False)
+    hint_count = Column(Integer, nullable=False, default=0)
+    tts_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'date', name='uix_user_ai_usage_user_date'),
+    )
+
+
 class Vocabulary(Base):
     __tablename__ = "vocabulary"
 
@@ -121,6 +196,12 @@ class Invitation(Base):
     accepted_at = Column(DateTime, nullable=True)
     expires_at = Column(DateTime, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    email_status = Column(String(20), nullable=True)  # "sent" / "failed" for bulk invitations, NULL = not recorded
+
+    # Only pending invitations expire; used by the periodic cleanup
+    __table_args__ = (
+        Index('ix_invitations_pending_expires_at', 'expires_at', postgresql_where=(accepted == False)),
+    )
 
     # Relationship
     inviter = relationship("User", back_populates="sent_invitations")
@@ -135,6 +216,11 @@ class VocabularyHintCache(Base):
     mode = Column(String(20), nullable=False)  # "to_japanese" or "to_english"
     hint = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Cache accounting, updated in batches by app.cache_maintenance
+    size_bytes = Column(Integer, nullable=False, default=0)
+    hit_count = Column(Integer, nullable=False, default=0)
+    last_accessed_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # Starts at creation
 
     # Unique constraint: one hint per vocabulary per mode
     __table_args__ = (
@@ -153,6 +239,11 @@ class VocabularyTTSCache(Base):
     text = Column(String(500), unique=True, nullable=False, index=True)  # The spoken text
     audio_data = Column(LargeBinary, nullable=False)  # MP3 bytes
     created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Cache accounting, updated in batches by app.cache_maintenance
+    size_bytes = Column(Integer, nullable=False, default=0)
+    hit_count = Column(Integer, nullable=False, default=0)
+    last_accessed_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # Starts at creation
 
 
 class UserPreferences(Base):
@@ -167,3 +258,26 @@ class UserPreferences(Base):
 
     # Relationship
     user = relationship("User", back_populates="preferences")
+
+
+class AuditEventRecord(Base):
+    """Security audit events, written in batches by the audit log pipeline."""
+    __tablename__ = "audit_events"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    event = Column(String(50), nullable=False)
+    success = Column(Boolean, nullable=False)
+    user_email = Column(String(255), nullable=True)  # Lowercased
+    user_id = Column(UUID(as_uuid=True), nullable=True)  # No foreign key: events outlive deleted users
+    ip_address = Column(String(45), nullable=True)
+    details = Column(Text, nullable=True)
+
+    # Append-only and inserted in time order, so a BRIN index covers time ranges cheaply;
+    # the composite indexes serve filtered newest-first keyset pages
+    __table_args__ = (
+        Index('ix_audit_events_created_at_brin', 'created_at', postgresql_using='brin'),
+        Index('ix_audit_events_ip_created', 'ip_address', 'created_at'),
+        Index('ix_audit_events_event_created', 'event', 'created_at'),
+        Index('ix_audit_events_user_email_created', 'user_email', 'created_at'),
+    )
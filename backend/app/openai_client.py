@@ -1,17 +1,150 @@
 from openai import AsyncOpenAI
-from typing import Optional
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, List, Callable, Awaitable, AsyncIterator, TypeVar
+import asyncio
 import io
+import json
 import logging
+import time
 
 from app.config import get_settings
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 # Singleton async client instance
 _async_client: Optional[AsyncOpenAI] = None
 
 
+class OpenAIUnavailableError(Exception):
+    """Raised when a call is rejected before reaching OpenAI (breaker open or no free slot)."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker shared by all OpenAI operations.
+    
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    fail fast for `reset_seconds`. Afterwards a single trial call is let through
+    (half-open); its outcome closes or re-opens the circuit.
+    """
+    
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+    
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+    
+    def allow_request(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+    
+    def release_trial(self) -> None:
+        """Give back a half-open trial slot when the call was never attempted."""
+        self._trial_in_flight = False
+    
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+    
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._trial_in_flight = False
+        if self.opened_at is not None or self.consecutive_failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning(
+                    f"OpenAI circuit opened after {self.consecutive_failures} consecutive failures"
+                )
+            self.opened_at = time.monotonic()
+
+
+_circuit_breaker = CircuitBreaker(
+    failure_threshold=settings.openai_circuit_failure_threshold,
+    reset_seconds=settings.openai_circuit_reset_seconds,
+)
+
+# Per-operation concurrency caps (created lazily inside the running event loop)
+_OPERATION_LIMITS: Dict[str, int] = {
+    "hint": settings.openai_hint_concurrency,
+    "tts": settings.openai_tts_concurrency,
+}
+_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+def _get_semaphore(operation: str) -> asyncio.Semaphore:
+    if operation not in _semaphores:
+        _semaphores[operation] = asyncio.Semaphore(_OPERATION_LIMITS.get(operation, 1))
+    return _semaphores[operation]
+
+
+def is_openai_available() -> bool:
+    """Check whether a call would currently be attempted (configured and circuit not open)."""
+    return bool(settings.openai_api_key) and _circuit_breaker.state != "open"
+
+
+@asynccontextmanager
+async def _openai_slot(operation: str) -> AsyncIterator[None]:
+    """Hold a concurrency slot for `operation` and report the outcome to the circuit breaker."""
+    is_trial = _circuit_breaker.state == "half_open"
+    if not _circuit_breaker.allow_request():
+        raise OpenAIUnavailableError("OpenAI circuit is open")
+    
+    semaphore = _get_semaphore(operation)
+    try:
+        await asyncio.wait_for(semaphore.acquire(), timeout=settings.openai_queue_timeout_seconds)
+    except asyncio.TimeoutError:
+        # Not an upstream failure - release a possible half-open trial slot without counting it
+        if is_trial:
+            _circuit_breaker.release_trial()
+        raise OpenAIUnavailableError(f"Too many concurrent {operation} requests")
+    except BaseException:
+        if is_trial:
+            _circuit_breaker.release_trial()
+        raise
+    
+    completed = False
+    try:
+        yield
+        completed = True
+    except Exception:
+        _circuit_breaker.record_failure()
+        raise
+    finally:
+        semaphore.release()
+        # Cancelled or abandoned (client disconnected mid-stream): neither a success
+        # nor a failure, but the half-open trial slot must not stay taken
+        if not completed and is_trial:
+            _circuit_breaker.release_trial()
+    
+    _circuit_breaker.record_success()
+
+
+async def call_openai(operation: str, deadline: float, call: Callable[[], Awaitable[T]]) -> T:
+    """Run an OpenAI call under the operation's concurrency cap, circuit breaker and deadline.
+    
+    Raises OpenAIUnavailableError when the call is rejected without being attempted,
+    asyncio.TimeoutError when the deadline is exceeded, or whatever the call raises.
+    """
+    async with _openai_slot(operation):
+        return await asyncio.wait_for(call(), timeout=deadline)
+
+
 def get_openai_client() -> Optional[AsyncOpenAI]:
     """Get async OpenAI client if API key is configured.
     
@@ -25,22 +158,19 @@ def get_openai_client() -> Optional[AsyncOpenAI]:
     if _async_client is None:
         _async_client = AsyncOpenAI(
             api_key=settings.openai_api_key,
-            timeout=30.0,  # 30 second timeout
-            max_retries=2,  # Retry failed requests up to 2 times
+            timeout=settings.openai_timeout_seconds,
+            # Retries happen inside the per-call deadline enforced by call_openai
+            max_retries=1,
         )
     
     return _async_client
 
 
-async def generate_hint(expression: str, reading: str, meaning: str, mode: str) -> str:
-    """Generate a learning hint for a vocabulary word using ChatGPT.
-    
-    Uses async OpenAI client to avoid blocking the event loop.
-    """
-    client = get_openai_client()
-    if not client:
-        return "AI hints are not available. Please configure OPENAI_API_KEY."
-    
+_HINT_SYSTEM_PROMPT = "You are a concise Japanese language tutor. Keep hints short and helpful."
+
+
+def _build_hint_prompt(expression: str, reading: str, meaning: str, mode: str) -> str:
+    """Build the single-word hint prompt for the given quiz mode."""
     if mode == "to_japanese":
         # User needs to translate English to Japanese - give hints about how to WRITE it
         prompt = f"""You are a helpful Japanese language learning assistant. 
@@ -69,23 +199,180 @@ Do NOT reveal the exact answer. You can:
 - Give a contextual clue
 
 Respond in English only."""
+    return prompt
+
+
+async def generate_hint(expression: str, reading: str, meaning: str, mode: str) -> str:
+    """Generate a learning hint for a vocabulary word using ChatGPT.
+    
+    Uses async OpenAI client to avoid blocking the event loop.
+    """
+    client = get_openai_client()
+    if not client:
+        return "AI hints are not available. Please configure OPENAI_API_KEY."
+    
+    prompt = _build_hint_prompt(expression, reading, meaning, mode)
 
     try:
-        response = await client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a concise Japanese language tutor. Keep hints short and helpful."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=100,
-            temperature=0.7
+        response = await call_openai(
+            "hint",
+            settings.openai_hint_deadline_seconds,
+            lambda: client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": _HINT_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=100,
+                temperature=0.7
+            ),
         )
         return response.choices[0].message.content.strip()
+    except OpenAIUnavailableError as e:
+        logger.warning(f"Hint generation skipped: {e}")
+        return "Could not generate hint: AI hints are temporarily unavailable"
+    except asyncio.TimeoutError:
+        logger.error("Hint generation timed out")
+        return "Could not generate hint: request timed out"
     except Exception as e:
         logger.error(f"Hint generation failed: {e}")
         return f"Could not generate hint: {str(e)}"
 
 
+async def stream_hint(expression: str, reading: str, meaning: str, mode: str) -> AsyncIterator[str]:
+    """Stream a learning hint token by token from the chat completions streaming API.
+    
+    Holds a hint concurrency slot for the whole stream and enforces the hint
+    deadline across all chunks. Raises OpenAIUnavailableError, asyncio.TimeoutError
+    or the upstream error; callers must not cache a partial hint in that case.
+    """
+    client = get_openai_client()
+    if not client:
+        raise OpenAIUnavailableError("AI hints are not available. Please configure OPENAI_API_KEY.")
+    
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.openai_hint_deadline_seconds
+    
+    async with _openai_slot("hint"):
+        stream = await asyncio.wait_for(
+            client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": _HINT_SYSTEM_PROMPT},
+                    {"role": "user", "content": _build_hint_prompt(expression, reading, meaning, mode)}
+                ],
+                max_tokens=100,
+                temperature=0.7,
+                stream=True,
+            ),
+            timeout=settings.openai_hint_deadline_seconds,
+        )
+        chunks = stream.__aiter__()
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout=max(0.0, deadline - loop.time()))
+                except StopAsyncIteration:
+                    break
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await stream.response.aclose()
+
+
+async def generate_hints_batch(words: List[Dict[str, str]], mode: str) -> Dict[str, str]:
+    """Generate hints for several vocabulary words in a single chat completion.
+    
+    Each word is a dict with "id", "expression", "reading" and "meaning".
+    Returns a mapping of word id to hint for every word the model answered
+    validly; words that are missing or malformed in the response are omitted
+    so the caller can retry them. Returns an empty dict on failure.
+    """
+    client = get_openai_client()
+    if not client or not words:
+        return {}
+    
+    # Short positional keys keep the prompt compact and make validation trivial
+    keyed = {str(index): word for index, word in enumerate(words, start=1)}
+    
+    if mode == "to_japanese":
+        task = (
+            "For each word the student sees the English meaning and must TYPE the Japanese reading in hiragana.\n"
+            "Give a SHORT hint (max 2 sentences) about HOW TO WRITE/SPELL it: first 1-2 syllables, "
+            "number of characters, a phonetic clue, or patterns like っ (small tsu) or ん.\n"
+            "Do NOT reveal the full answer."
+        )
+        lines = [
+            f'{key}: meaning "{word["meaning"]}", answer {word["reading"]} (kanji: {word["expression"]})'
+            for key, word in keyed.items()
+        ]
+    else:
+        task = (
+            "For each word the student sees the Japanese word and must translate it to English.\n"
+            "Give a SHORT hint (max 2 sentences): a usage situation, a related word or category, "
+            "the word type, or a contextual clue.\n"
+            "Do NOT reveal the exact answer."
+        )
+        lines = [
+            f'{key}: {word["expression"]} ({word["reading"]}), meaning "{word["meaning"]}"'
+            for key, word in keyed.items()
+        ]
+    
+    prompt = f"""You are a helpful Japanese language learning assistant.
+{task}
+
+Words:
+{chr(10).join(lines)}
+
+Respond in English only, as a JSON object of the form
+{{"hints": [{{"id": "<word number>", "hint": "<hint>"}}]}} with exactly one entry per word."""
+    
+    try:
+        response = await call_openai(
+            "hint",
+            settings.openai_hint_deadline_seconds * 2,
+            lambda: client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": _HINT_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=80 * len(keyed),
+                temperature=0.7,
+                response_format={"type": "json_object"},
+            ),
+        )
+        payload = json.loads(response.choices[0].message.content)
+    except OpenAIUnavailableError as e:
+        logger.warning(f"Batch hint generation skipped: {e}")
+        return {}
+    except asyncio.TimeoutError:
+        logger.error("Batch hint generation timed out")
+        return {}
+    except Exception as e:
+        logger.error(f"Batch hint generation failed: {e}")
+        return {}
+    
+    entries = payload.get("hints") if isinstance(payload, dict) else None
+    if not isinstance(entries, list):
+        logger.error("Batch hint generation returned an unexpected payload")
+        return {}
+    
+    hints: Dict[str, str] = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        key = str(entry.get("id", "")).strip()
+        hint = entry.get("hint")
+        if key in keyed and key not in hints and isinstance(hint, str) and hint.strip():
+            hints[keyed[key]["id"]] = hint.strip()
+    
+    missing = len(keyed) - len(hints)
+    if missing:
+        logger.warning(f"Batch hint generation returned no valid hint for {missing} of {len(keyed)} words")
+    return hints
+
+
 async def generate_tts(text: str) -> Optional[bytes]:
     """Generate Japanese speech audio using OpenAI TTS.
     
@@ -100,7 +387,7 @@ async def generate_tts(text: str) -> Optional[bytes]:
     # Prefix with English intro to prevent audio clipping on short words
     tts_input = f"It sounds like: {text}"
     
-    try:
+    async def _synthesize() -> bytes:
         response = await client.audio.speech.create(
             model="tts-1",
             voice="nova",  # Good for Japanese pronunciation
@@ -112,8 +399,16 @@ async def generate_tts(text: str) -> Optional[bytes]:
         audio_bytes = io.BytesIO()
         async for chunk in response.iter_bytes():
             audio_bytes.write(chunk)
-        audio_bytes.seek(0)
         return audio_bytes.getvalue()
+    
+    try:
+        return await call_openai("tts", settings.openai_tts_deadline_seconds, _synthesize)
+    except OpenAIUnavailableError as e:
+        logger.warning(f"TTS generation skipped: {e}")
+        return None
+    except asyncio.TimeoutError:
+        logger.error("TTS generation timed out")
+        return None
     except Exception as e:
         logger.error(f"TTS generation failed: {e}")
         return None
@@ -0,0 +1,156 @@
+"""
+Host-local shared rate limit storage for the `limits` library.
+
+Registers the `shm://` scheme: counters live in a SQLite database on a
+tmpfs path (default /dev/shm), so all uvicorn workers on one host share
+the same counters. Every check-and-increment runs in a single
+`BEGIN IMMEDIATE` transaction, which makes it atomic across processes.
+Expired counters (old windows, clients that never came back) are swept
+at most every SWEEP_INTERVAL_SECONDS so the table doesn't grow unbounded.
+
+Usage: RATE_LIMIT_STORAGE_URI=shm:///dev/shm/nihongowow-ratelimit.db
+"""
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from math import floor
+from typing import Iterator, Optional, Tuple
+
+from limits.storage import Storage, SlidingWindowCounterSupport
+
+DEFAULT_PATH = "/dev/shm/nihongowow-ratelimit.db"
+SWEEP_INTERVAL_SECONDS = 60.0
+
+
+class SharedMemoryStorage(Storage, SlidingWindowCounterSupport):
+    """Rate limit counters shared between processes through SQLite on tmpfs."""
+
+    STORAGE_SCHEME = ["shm"]
+
+    def __init__(self, uri: Optional[str] = None, wrap_exceptions: bool = False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        path = uri.split("://", 1)[1] if uri and "://" in uri else ""
+        self.path = path or DEFAULT_PATH
+        self._local = threading.local()
+        self._next_sweep = 0.0
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS counters ("
+                "key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _get(conn: sqlite3.Connection, key: str, now: float) -> Tuple[int, float]:
+        row = conn.execute(
+            "SELECT count, expires_at FROM counters WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        return (row[0], row[1]) if row else (0, now)
+
+    @staticmethod
+    def _incr(conn: sqlite3.Connection, key: str, expiry: float, amount: int, now: float) -> int:
+        conn.execute("DELETE FROM counters WHERE key = ? AND expires_at <= ?", (key, now))
+        conn.execute(
+            "INSERT INTO counters (key, count, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET count = count + excluded.count",
+            (key, amount, now + expiry),
+        )
+        return conn.execute("SELECT count FROM counters WHERE key = ?", (key,)).fetchone()[0]
+
+    def _sweep_expired(self, conn: sqlite3.Connection, now: float) -> None:
+        """Delete every expired counter, throttled to once per SWEEP_INTERVAL_SECONDS per process."""
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + SWEEP_INTERVAL_SECONDS
+        conn.execute("DELETE FROM counters WHERE expires_at <= ?", (now,))
+
+    def incr(self, key: str, expiry: int, amount: int = 1) -> int:
+        now = time.time()
+        with self._transaction() as conn:
+            self._sweep_expired(conn, now)
+            return self._incr(conn, key, expiry, amount, now)
+
+    def get(self, key: str) -> int:
+        with self._transaction() as conn:
+            return self._get(conn, key, time.time())[0]
+
+    def get_expiry(self, key: str) -> float:
+        now = time.time()
+        with self._transaction() as conn:
+            return self._get(conn, key, now)[1]
+
+    def check(self) -> bool:
+        try:
+            self._connection().execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self) -> Optional[int]:
+        with self._transaction() as conn:
+            return conn.execute("DELETE FROM counters").rowcount
+
+    def clear(self, key: str) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM counters WHERE key = ?", (key,))
+
+    def _window_keys(self, key: str, expiry: int, now: float) -> Tuple[str, str]:
+        window = floor(now / expiry)
+        return f"{key}/{window - 1}", f"{key}/{window}"
+
+    def _sliding_window(self, conn: sqlite3.Connection, key: str, expiry: int, now: float) -> Tuple[int, float, int, float]:
+        previous_key, current_key = self._window_keys(key, expiry, now)
+        previous_count = self._get(conn, previous_key, now)[0]
+        current_count = self._get(conn, current_key, now)[0]
+        previous_ttl = 0.0 if previous_count == 0 else (1 - ((now - expiry) / expiry) % 1) * expiry
+        current_ttl = (1 - (now / expiry) % 1) * expiry + expiry
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def acquire_sliding_window_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+        now = time.time()
+        with self._transaction() as conn:
+            self._sweep_expired(conn, now)
+            previous_count, previous_ttl, current_count, _ = self._sliding_window(conn, key, expiry, now)
+            weighted = previous_count * previous_ttl / expiry + current_count
+            if floor(weighted) + amount > limit:
+                return False
+            # The current window key must outlive the next window, where it is the "previous" one
+            self._incr(conn, self._window_keys(key, expiry, now)[1], 2 * expiry, amount, now)
+            return True
+
+    def get_sliding_window(self, key: str, expiry: int) -> Tuple[int, float, int, float]:
+        now = time.time()
+        with self._transaction() as conn:
+            return self._sliding_window(conn, key, expiry, now)
+
+    def clear_sliding_window(self, key: str, expiry: int) -> None:
+        previous_key, current_key = self._window_keys(key, expiry, time.time())
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM counters WHERE key IN (?, ?)", (previous_key, current_key))
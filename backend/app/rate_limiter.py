@@ -2,11 +2,28 @@
 Rate limiting configuration for the NihongoWOW API.
 Protects against brute-force attacks on authentication endpoints.
 """
+import asyncio
+import logging
+from typing import Callable, Dict
+
+from limits import parse
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from fastapi import Request
 from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models import Setting
+import app.rate_limit_storage  # noqa: F401 - registers the shm:// storage scheme
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Settings rows with this key prefix override RATE_LIMITS entries at runtime
+RATE_LIMIT_SETTING_PREFIX = "rate_limit_"
 
 
 def get_client_ip(request: Request) -> str:
@@ -20,8 +37,13 @@ def get_client_ip(request: Request) -> str:
     return get_remote_address(request)
 
 
-# Create the limiter instance
-limiter = Limiter(key_func=get_client_ip)
+# Create the limiter instance; counters live in the configured shared storage
+limiter = Limiter(
+    key_func=get_client_ip,
+    storage_uri=settings.rate_limit_storage_uri,
+    strategy=settings.rate_limit_strategy,
+    key_prefix="nihongowow",
+)
 
 
 def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded) -> JSONResponse:
@@ -58,6 +80,78 @@ RATE_LIMITS = {
 }
 
 
+def _parse_overrides(raw: str) -> Dict[str, str]:
+    """Parse "name=limit;name=limit" into a dict."""
+    overrides = {}
+    for entry in raw.split(";"):
+        if "=" in entry:
+            name, value = entry.split("=", 1)
+            overrides[name.strip()] = value.strip()
+    return overrides
+
+
+def is_valid_rate_limit(value: str) -> bool:
+    """Check whether a string is a valid rate limit such as "5/minute"."""
+    try:
+        parse(value)
+        return True
+    except ValueError:
+        return False
+
+
+_overrides: Dict[str, str] = {}
+
+
+def set_rate_limit_overrides(overrides: Dict[str, str]) -> None:
+    """Replace the active overrides, ignoring unknown names and invalid limits."""
+    global _overrides
+    valid = {}
+    for name, value in overrides.items():
+        if name not in RATE_LIMITS:
+            logger.warning(f"Ignoring override for unknown rate limit '{name}'")
+        elif not is_valid_rate_limit(value):
+            logger.warning(f"Ignoring invalid rate limit '{value}' for '{name}'")
+        else:
+            valid[name] = value
+    _overrides = valid
+
+
+def get_rate_limit(name: str) -> str:
+    """Current limit for a RATE_LIMITS entry, taking overrides into account."""
+    return _overrides.get(name, RATE_LIMITS[name])
+
+
+def rate_limit(name: str) -> Callable[[], str]:
+    """Limit provider for @limiter.limit that is re-evaluated on every request."""
+    return lambda: get_rate_limit(name)
+
+
+def load_rate_limit_overrides(db: Session) -> Dict[str, str]:
+    """Read overrides from the environment and from settings rows (settings win)."""
+    overrides = _parse_overrides(settings.rate_limit_overrides)
+    rows = db.query(Setting.key, Setting.value).filter(
+        Setting.key.startswith(RATE_LIMIT_SETTING_PREFIX)
+    ).all()
+    for key, value in rows:
+        overrides[key[len(RATE_LIMIT_SETTING_PREFIX):]] = value
+    return overrides
+
+
+def refresh_rate_limit_overrides() -> None:
+    db = SessionLocal()
+    try:
+        set_rate_limit_overrides(load_rate_limit_overrides(db))
+    except Exception as e:
+        logger.warning(f"Could not refresh rate limit overrides: {e}")
+    finally:
+        db.close()
+
 
+async def run_rate_limit_refresh() -> None:
+    """Background loop picking up rate limit changes made by other workers."""
+    while True:
+        await asyncio.to_thread(refresh_rate_limit_overrides)
+        await asyncio.sleep(settings.rate_limit_refresh_seconds)
 
 
+set_rate_limit_overrides(_parse_overrides(settings.rate_limit_overrides))
@@ -1,23 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Query
 from fastapi.responses import Response
+from sqlalchemy import or_, and_, func
+from pydantic import validate_email
+from pydantic_core import PydanticCustomError
 from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from datetime import datetime
-from typing import List
+from typing import Dict, List, Optional, Tuple
+import re
 from uuid import UUID
+import asyncio
 import logging
 
-from app.database import get_db
-from app.models import User, Invitation, EmailVerificationToken, VocabularyHintCache, VocabularyTTSCache, Vocabulary
+from app.database import get_db, SessionLocal
+from app.models import (
+    User, Invitation, EmailVerificationToken, VocabularyHintCache, VocabularyTTSCache, Vocabulary,
+    AuditEventRecord
+)
 from app.schemas import (
     InvitationCreate, InvitationResponse, InvitationListResponse,
+    InvitationBulkCreate, InvitationBulkResult, InvitationBulkResponse,
     UserAdminResponse, UserListResponse,
     HintCacheResponse, HintCacheListResponse, HintCacheUpdate,
-    TTSCacheResponse, TTSCacheListResponse, CacheStatsResponse
+    HintCacheWarmRequest, HintCacheWarmResponse,
+    TTSCacheResponse, TTSCacheListResponse, CacheStatsResponse,
+    MailStatsResponse, AuditLogStatsResponse, AuditEventResponse, AuditEventListResponse,
+    TokenCleanupStatsResponse
 )
-from app.auth import require_admin
+from app.auth import require_admin, invalidate_principal, Principal
 from app.config import get_settings
+from app.openai_client import generate_hints_batch, get_openai_client
+from app.cache_maintenance import get_cache_accounting
+from app.mail_delivery import mail_service
+from app.audit_logger import get_audit_log_stats
+from app.token_cleanup import get_cleanup_stats
+from app.routers.vocabulary import escape_like_pattern
 from app.email_service import (
     generate_invitation_token, get_invitation_token_expiry, send_invitation_email,
+    send_invitation_emails_bulk,
     generate_verification_token, get_verification_token_expiry, send_verification_email
 )
 
@@ -28,12 +48,40 @@ logger = logging.getLogger(__name__)
 
 # ============== INVITATION ENDPOINTS ==============
 
+def _store_invitation_email_status(results: Dict[str, bool]) -> None:
+    """Record bulk delivery results (invitation token -> sent) on the invitations."""
+    db = SessionLocal()
+    try:
+        for email_status, delivered in (("sent", True), ("failed", False)):
+            tokens = [token for token, sent in results.items() if sent == delivered]
+            if tokens:
+                db.query(Invitation).filter(Invitation.token.in_(tokens)).update(
+                    {Invitation.email_status: email_status}, synchronize_session=False
+                )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"Could not record invitation email status: {e}")
+    finally:
+        db.close()
+
+
+async def _send_bulk_invitations(invitations: List[Tuple[str, str]], inviter_name: str, frontend_url: str) -> None:
+    """Background task: send bulk invitation emails and record which ones failed."""
+    results = await send_invitation_emails_bulk(invitations, inviter_name, frontend_url)
+    # Keyed by token: a resend in the meantime issues a new token and isn't overwritten
+    await asyncio.to_thread(
+        _store_invitation_email_status,
+        {token: results.get(email, False) for email, token in invitations}
+    )
+
+
 @router.post("/invitations", response_model=InvitationResponse, status_code=status.HTTP_201_CREATED)
 async def create_invitation(
     invitation_data: InvitationCreate,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    admin: User = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
     """Create a new invitation and send email to the invitee."""
     email = invitation_data.email.lower()
@@ -88,10 +136,104 @@ async def create_invitation(
     )
 
 
+@router.post("/invitations/bulk", response_model=InvitationBulkResponse, status_code=status.HTTP_201_CREATED)
+async def create_invitations_bulk(
+    bulk_data: InvitationBulkCreate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    admin: Principal = Depends(require_admin)
+):
+    """Invite many addresses at once and send all invitation emails over one SMTP session."""
+    raw = list(bulk_data.emails)
+    if bulk_data.csv:
+        raw.extend(re.split(r"[,;\s]+", bulk_data.csv))
+    raw = [e.strip() for e in raw if e and e.strip()]
+    
+    if len(raw) > 500:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At most 500 addresses can be invited at once"
+        )
+    
+    results: List[InvitationBulkResult] = []
+    candidates: List[str] = []
+    seen = set()
+    for entry in raw:
+        try:
+            _, email = validate_email(entry)
+        except PydanticCustomError:
+            results.append(InvitationBulkResult(email=entry, status="invalid"))
+            continue
+        email = email.lower()
+        if email in seen:
+            results.append(InvitationBulkResult(email=email, status="duplicate"))
+            continue
+        seen.add(email)
+        candidates.append(email)
+    
+    # Two set queries instead of two lookups per address
+    registered = {
+        row.email.lower()
+        for row in db.query(User.email).filter(func.lower(User.email).in_(candidates))
+    } if candidates else set()
+    invited = {
+        row.email
+        for row in db.query(Invitation.email).filter(
+            Invitation.email.in_(candidates),
+            Invitation.accepted == False,
+            Invitation.expires_at > datetime.utcnow()
+        )
+    } if candidates else set()
+    
+    new_invitations: List[Invitation] = []
+    expires_at = get_invitation_token_expiry()
+    for email in candidates:
+        if email in registered:
+            results.append(InvitationBulkResult(email=email, status="already_registered"))
+        elif email in invited:
+            results.append(InvitationBulkResult(email=email, status="already_invited"))
+        else:
+            new_invitations.append(Invitation(
+                email=email,
+                token=generate_invitation_token(),
+                invited_by=admin.id,
+                expires_at=expires_at
+            ))
+    
+    created: List[Tuple[UUID, str, str]] = []
+    if new_invitations:
+        # One flush; SQLAlchemy batches the INSERTs into multi-row statements
+        db.add_all(new_invitations)
+        db.flush()
+        # Capture values before commit expires the instances
+        created = [(inv.id, inv.email, inv.token) for inv in new_invitations]
+        db.commit()
+        
+        background_tasks.add_task(
+            _send_bulk_invitations,
+            [(email, token) for _, email, token in created],
+            admin.username,
+            settings.frontend_url
+        )
+    
+    results.extend(
+        InvitationBulkResult(email=email, status="invited", invitation_id=invitation_id)
+        for invitation_id, email, _ in created
+    )
+    
+    logger.info(f"Admin {admin.username} bulk-invited {len(new_invitations)} of {len(raw)} addresses")
+    
+    return InvitationBulkResponse(
+        results=results,
+        invited=len(new_invitations),
+        skipped=len(results) - len(new_invitations)
+    )
+
+
 @router.get("/invitations", response_model=InvitationListResponse)
 async def list_invitations(
     db: Session = Depends(get_db),
-    admin: User = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
     """List all invitations."""
     invitations = db.query(Invitation).order_by(Invitation.created_at.desc()).all()
@@ -109,7 +251,8 @@ async def list_invitations(
             accepted_at=inv.accepted_at,
             expires_at=inv.expires_at,
             created_at=inv.created_at,
-            invited_by_username=inviter_username
+            invited_by_username=inviter_username,
+            email_status=inv.email_status
         ))
     
     return InvitationListResponse(
@@ -122,7 +265,7 @@ async def list_invitations(
 async def delete_invitation(
     invitation_id: UUID,
     db: Session = Depends(get_db),
-    admin: User = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
     """Delete an invitation."""
     invitation = db.query(Invitation).filter(Invitation.id == invitation_id).first()
@@ -144,7 +287,7 @@ async def resend_invitation(
     invitation_id: UUID,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    admin: User = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
     """Resend an invitation email with a new token."""
     invitation = db.query(Invitation).filter(Invitation.id == invitation_id).first()
@@ -164,6 +307,7 @@ async def resend_invitation(
     # Generate new token and extend expiry
     invitation.token = generate_invitation_token()
     invitation.expires_at = get_invitation_token_expiry()
+    invitation.email_status = None
     
     db.commit()
     db.refresh(invitation)
@@ -189,7 +333,7 @@ async def resend_invitation(
 @router.get("/users", response_model=UserListResponse)
 async def list_users(
     db: Session = Depends(get_db),
-    admin: User = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
     """List all users."""
     users = db.query(User).order_by(User.created_at.desc()).all()
@@ -217,7 +361,7 @@ async def list_users(
 async def delete_user(
     user_id: UUID,
     db: Session = Depends(get_db),
-    admin: User = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
     """Delete a user and all their data."""
     user = db.query(User).filter(User.id == user_id).first()
@@ -239,6 +383,7 @@ async def delete_user(
     
     db.delete(user)
     db.commit()
+    invalidate_principal(user_id)
 
 
 @router.post("/users/{user_id}/resend-verification", response_model=UserAdminResponse)
@@ -246,7 +391,7 @@ async def resend_user_verification(
     user_id: UUID,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    admin: User = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
     """Resend verification email for a user who hasn't verified their email yet."""
     user = db.query(User).filter(User.id == user_id).first()
@@ -294,49 +439,266 @@ async def resend_user_verification(
     )
 
 
+# ============== MAIL DELIVERY ENDPOINTS ==============
+
+@router.get("/mail/stats", response_model=MailStatsResponse)
+async def get_mail_stats(admin: Principal = Depends(require_admin)):
+    """Get mail delivery queue and SMTP pool metrics for this worker."""
+    return MailStatsResponse(**mail_service.stats())
+
+
+@router.get("/audit/stats", response_model=AuditLogStatsResponse)
+async def get_audit_stats(admin: Principal = Depends(require_admin)):
+    """Get audit log queue and writer metrics for this worker."""
+    return AuditLogStatsResponse(**get_audit_log_stats())
+
+
+@router.get("/cleanup/stats", response_model=TokenCleanupStatsResponse)
+async def get_token_cleanup_stats(admin: Principal = Depends(require_admin)):
+    """Get metrics of the last expired-token cleanup pass run by this worker."""
+    return TokenCleanupStatsResponse(**get_cleanup_stats())
+
+
+@router.get("/audit/events", response_model=AuditEventListResponse)
+async def list_audit_events(
+    event: Optional[str] = None,
+    ip: Optional[str] = None,
+    user: Optional[str] = Query(None, description="User email"),
+    user_id: Optional[UUID] = None,
+    success: Optional[bool] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    admin: Principal = Depends(require_admin)
+):
+    """List audit events, newest first, with keyset pagination and filters by time, IP, event type and user."""
+    query = db.query(AuditEventRecord)
+    
+    if event:
+        query = query.filter(AuditEventRecord.event == event.upper())
+    if ip:
+        query = query.filter(AuditEventRecord.ip_address == ip)
+    if user:
+        query = query.filter(AuditEventRecord.user_email == user.strip().lower())
+    if user_id:
+        query = query.filter(AuditEventRecord.user_id == user_id)
+    if success is not None:
+        query = query.filter(AuditEventRecord.success == success)
+    if since:
+        query = query.filter(AuditEventRecord.created_at >= since)
+    if until:
+        query = query.filter(AuditEventRecord.created_at < until)
+    
+    rows = _apply_keyset(
+        query, AuditEventRecord.created_at, AuditEventRecord.id, cursor
+    ).order_by(
+        AuditEventRecord.created_at.desc(), AuditEventRecord.id.desc()
+    ).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1].created_at, rows[-1].id)
+    
+    return AuditEventListResponse(
+        items=[AuditEventResponse.model_validate(row) for row in rows],
+        next_cursor=next_cursor
+    )
+
+
 # ============== AI CACHE MANAGEMENT ENDPOINTS ==============
 
 @router.get("/cache/stats", response_model=CacheStatsResponse)
 async def get_cache_stats(
     db: Session = Depends(get_db),
-    admin: User = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
-    """Get cache statistics."""
-    hint_count = db.query(VocabularyHintCache).count()
-    tts_count = db.query(VocabularyTTSCache).count()
+    """Get cache statistics including size and hit ratio.
+    
+    Every entry was created by exactly one miss, so the hit ratio is
+    hits / (hits + entries) over the lifetime of the current entries.
+    """
+    hint_count, hint_bytes, hint_hits = get_cache_accounting(db, "hint")
+    tts_count, tts_bytes, tts_hits = get_cache_accounting(db, "tts")
     
     return CacheStatsResponse(
         hint_count=hint_count,
-        tts_count=tts_count
+        tts_count=tts_count,
+        hint_bytes=hint_bytes,
+        tts_bytes=tts_bytes,
+        hint_hits=hint_hits,
+        tts_hits=tts_hits,
+        hint_hit_ratio=hint_hits / (hint_hits + hint_count) if hint_count else 0.0,
+        tts_hit_ratio=tts_hits / (tts_hits + tts_count) if tts_count else 0.0,
+        tts_max_bytes=settings.tts_cache_max_bytes,
+        eviction_policy=settings.cache_eviction_policy
     )
 
 
+def _encode_cursor(created_at: datetime, row_id: UUID) -> str:
+    """Encode a (created_at, id) keyset position as an opaque cursor."""
+    return f"{created_at.isoformat()}|{row_id}"
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Decode a cursor produced by _encode_cursor."""
+    try:
+        created_at, row_id = cursor.split("|", 1)
+        return datetime.fromisoformat(created_at), UUID(row_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def _apply_keyset(query, created_col, id_col, cursor: Optional[str]):
+    """Restrict a newest-first query to rows after the cursor position."""
+    if not cursor:
+        return query
+    created_at, row_id = _decode_cursor(cursor)
+    return query.filter(or_(
+        created_col < created_at,
+        and_(created_col == created_at, id_col < row_id)
+    ))
+
+
 @router.get("/cache/hints", response_model=HintCacheListResponse)
 async def list_hint_cache(
+    search: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    include_total: bool = Query(False, description="Also count matches on pages after the first"),
     db: Session = Depends(get_db),
-    admin: User = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
-    """List all cached hints."""
-    cached_hints = db.query(VocabularyHintCache).order_by(VocabularyHintCache.created_at.desc()).all()
+    """List cached hints, newest first, with keyset pagination and optional search by expression/reading."""
+    query = db.query(
+        VocabularyHintCache.id,
+        VocabularyHintCache.vocabulary_id,
+        VocabularyHintCache.mode,
+        VocabularyHintCache.hint,
+        VocabularyHintCache.created_at,
+        Vocabulary.expression,
+        Vocabulary.reading,
+        Vocabulary.meaning,
+    ).join(Vocabulary, Vocabulary.id == VocabularyHintCache.vocabulary_id)
+    
+    if search:
+        pattern = f"%{escape_like_pattern(search)}%"
+        query = query.filter(or_(
+            Vocabulary.expression.ilike(pattern),
+            Vocabulary.reading.ilike(pattern)
+        ))
     
-    result = []
-    for hint in cached_hints:
-        vocab = db.query(Vocabulary).filter(Vocabulary.id == hint.vocabulary_id).first()
-        if vocab:
-            result.append(HintCacheResponse(
-                id=hint.id,
-                vocabulary_id=hint.vocabulary_id,
-                expression=vocab.expression,
-                reading=vocab.reading,
-                meaning=vocab.meaning,
-                mode=hint.mode,
-                hint=hint.hint,
-                created_at=hint.created_at
-            ))
+    # Counting every match is a full scan; do it for the first page only unless asked
+    total = query.count() if cursor is None or include_total else None
+    
+    rows = _apply_keyset(
+        query, VocabularyHintCache.created_at, VocabularyHintCache.id, cursor
+    ).order_by(
+        VocabularyHintCache.created_at.desc(), VocabularyHintCache.id.desc()
+    ).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1].created_at, rows[-1].id)
     
     return HintCacheListResponse(
-        items=result,
-        total=len(result)
+        items=[
+            HintCacheResponse(
+                id=row.id,
+                vocabulary_id=row.vocabulary_id,
+                expression=row.expression,
+                reading=row.reading,
+                meaning=row.meaning,
+                mode=row.mode,
+                hint=row.hint,
+                created_at=row.created_at
+            )
+            for row in rows
+        ],
+        total=total,
+        next_cursor=next_cursor
+    )
+
+
+@router.post("/cache/hints/warm", response_model=HintCacheWarmResponse)
+async def warm_hint_cache(
+    warm_request: HintCacheWarmRequest,
+    db: Session = Depends(get_db),
+    admin: Principal = Depends(require_admin)
+):
+    """Generate missing hints in batches (several words per OpenAI call) and bulk-insert them."""
+    if not get_openai_client():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="AI hints are not available. Please configure OPENAI_API_KEY."
+        )
+    
+    # Vocabulary without a cached hint for this mode
+    cached = db.query(VocabularyHintCache.vocabulary_id).filter(
+        VocabularyHintCache.mode == warm_request.mode
+    )
+    query = db.query(
+        Vocabulary.id, Vocabulary.expression, Vocabulary.reading, Vocabulary.meaning
+    ).filter(~Vocabulary.id.in_(cached))
+    
+    if warm_request.tags:
+        for tag in [t.strip() for t in warm_request.tags.split(",") if t.strip()]:
+            query = query.filter(Vocabulary.tags.ilike(f"%{tag}%"))
+    
+    words = [
+        {"id": str(row.id), "expression": row.expression, "reading": row.reading, "meaning": row.meaning}
+        for row in query.order_by(Vocabulary.created_at).limit(warm_request.limit).all()
+    ]
+    
+    # Don't hold a pooled connection while waiting on OpenAI
+    db.close()
+    
+    batch_size = max(1, settings.openai_hint_batch_size)
+    batches = [words[i:i + batch_size] for i in range(0, len(words), batch_size)]
+    # Leave half of the hint concurrency budget for interactive quiz hints
+    parallel = max(1, settings.openai_hint_concurrency // 2)
+    
+    generated = 0
+    for i in range(0, len(batches), parallel):
+        results = await asyncio.gather(
+            *(generate_hints_batch(batch, warm_request.mode) for batch in batches[i:i + parallel])
+        )
+        rows = [
+            {
+                "vocabulary_id": UUID(vocab_id),
+                "mode": warm_request.mode,
+                "hint": hint,
+                "size_bytes": len(hint.encode("utf-8"))
+            }
+            for result in results
+            for vocab_id, hint in result.items()
+        ]
+        if rows:
+            # Bulk insert; hints generated concurrently by quiz requests win
+            db.execute(
+                pg_insert(VocabularyHintCache)
+                .values(rows)
+                .on_conflict_do_nothing(constraint="uix_vocab_hint_mode")
+            )
+            db.commit()
+            db.close()
+            generated += len(rows)
+    
+    logger.info(
+        f"Admin {admin.username} warmed hint cache ({warm_request.mode}): "
+        f"{generated}/{len(words)} hints generated"
+    )
+    
+    return HintCacheWarmResponse(
+        requested=len(words),
+        generated=generated,
+        failed=len(words) - generated
     )
 
 
@@ -345,7 +707,7 @@ async def update_hint_cache(
     hint_id: UUID,
     update_data: HintCacheUpdate,
     db: Session = Depends(get_db),
-    admin: User = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
     """Update a cached hint."""
     cached_hint = db.query(VocabularyHintCache).filter(VocabularyHintCache.id == hint_id).first()
@@ -357,6 +719,7 @@ async def update_hint_cache(
         )
     
     cached_hint.hint = update_data.hint
+    cached_hint.size_bytes = len(update_data.hint.encode("utf-8"))
     db.commit()
     db.refresh(cached_hint)
     
@@ -380,7 +743,7 @@ async def update_hint_cache(
 async def delete_hint_cache(
     hint_id: UUID,
     db: Session = Depends(get_db),
-    admin: User = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
     """Delete a cached hint."""
     cached_hint = db.query(VocabularyHintCache).filter(VocabularyHintCache.id == hint_id).first()
@@ -400,7 +763,7 @@ async def delete_hint_cache(
 @router.delete("/cache/hints", status_code=status.HTTP_204_NO_CONTENT)
 async def clear_all_hints_cache(
     db: Session = Depends(get_db),
-    admin: User = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
     """Clear all cached hints."""
     count = db.query(VocabularyHintCache).delete()
@@ -411,24 +774,51 @@ async def clear_all_hints_cache(
 
 @router.get("/cache/tts", response_model=TTSCacheListResponse)
 async def list_tts_cache(
+    search: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    include_total: bool = Query(False, description="Also count matches on pages after the first"),
     db: Session = Depends(get_db),
-    admin: User = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
-    """List all cached TTS entries (without audio data)."""
-    cached_tts = db.query(VocabularyTTSCache).order_by(VocabularyTTSCache.created_at.desc()).all()
+    """List cached TTS entries (without audio data), newest first, with keyset pagination."""
+    # Project only the listed columns so audio bytes are never loaded
+    query = db.query(
+        VocabularyTTSCache.id,
+        VocabularyTTSCache.text,
+        VocabularyTTSCache.created_at,
+    )
     
-    result = [
-        TTSCacheResponse(
-            id=tts.id,
-            text=tts.text,
-            created_at=tts.created_at
+    if search:
+        query = query.filter(
+            VocabularyTTSCache.text.ilike(f"%{escape_like_pattern(search)}%")
         )
-        for tts in cached_tts
-    ]
+    
+    # Counting every match is a full scan; do it for the first page only unless asked
+    total = query.count() if cursor is None or include_total else None
+    
+    rows = _apply_keyset(
+        query, VocabularyTTSCache.created_at, VocabularyTTSCache.id, cursor
+    ).order_by(
+        VocabularyTTSCache.created_at.desc(), VocabularyTTSCache.id.desc()
+    ).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1].created_at, rows[-1].id)
     
     return TTSCacheListResponse(
-        items=result,
-        total=len(result)
+        items=[
+            TTSCacheResponse(
+                id=row.id,
+                text=row.text,
+                created_at=row.created_at
+            )
+            for row in rows
+        ],
+        total=total,
+        next_cursor=next_cursor
     )
 
 
@@ -436,7 +826,7 @@ async def list_tts_cache(
 async def get_tts_audio(
     tts_id: UUID,
     db: Session = Depends(get_db),
-    admin: User = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
     """Get the audio data for a cached TTS entry."""
     cached_tts = db.query(VocabularyTTSCache).filter(VocabularyTTSCache.id == tts_id).first()
@@ -458,7 +848,7 @@ async def get_tts_audio(
 async def delete_tts_cache(
     tts_id: UUID,
     db: Session = Depends(get_db),
-    admin: User = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
     """Delete a cached TTS entry."""
     cached_tts = db.query(VocabularyTTSCache).filter(VocabularyTTSCache.id == tts_id).first()
@@ -478,7 +868,7 @@ async def delete_tts_cache(
 @router.delete("/cache/tts", status_code=status.HTTP_204_NO_CONTENT)
 async def clear_all_tts_cache(
     db: Session = Depends(get_db),
-    admin: User = Depends(require_admin)
+    admin: Principal = Depends(require_admin)
 ):
     """Clear all cached TTS entries."""
     count = db.query(VocabularyTTSCache).delete()
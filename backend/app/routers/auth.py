@@ -1,7 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Request
+from sqlalchemy import update, delete, case
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
 from datetime import datetime, timedelta
-from typing import Union
+from typing import Optional, Union
+from uuid import UUID, uuid4
 import logging
 
 from app.database import get_db
@@ -12,13 +16,16 @@ from app.schemas import (
     EmailConfirm, EmailConfirmResponse, ResendVerification, ResendVerificationResponse,
     RegisterResponse
 )
-from app.auth import get_password_hash, verify_password, create_access_token, get_current_user
+from app.auth import (
+    get_password_hash_async, verify_password_async, create_user_access_token,
+    get_current_user, invalidate_principal, Principal
+)
 from app.config import get_settings
 from app.email_service import (
-    generate_mfa_code, get_mfa_expiry, send_mfa_code,
+    generate_mfa_code, hash_mfa_code, get_mfa_expiry, send_mfa_code,
     generate_verification_token, get_verification_token_expiry, send_verification_email
 )
-from app.rate_limiter import limiter, RATE_LIMITS
+from app.rate_limiter import limiter, rate_limit
 from app.audit_logger import (
     log_login_success, log_login_failed, log_account_locked,
     log_mfa_event, log_registration, AuditEvent, log_audit_event
@@ -33,8 +40,69 @@ MAX_FAILED_ATTEMPTS = 10
 LOCKOUT_DURATION_MINUTES = 15
 
 
+def record_failed_attempt(db: Session, user_id: UUID) -> bool:
+    """Count a failed login/MFA attempt in a single UPDATE ... RETURNING statement.
+    
+    The increment and the conditional lock happen in the database, so
+    concurrent attempts cannot lose updates. Reaching MAX_FAILED_ATTEMPTS
+    locks the account and bumps token_version to revoke its tokens.
+    Returns True if the account is locked by this attempt.
+    """
+    lock_until = datetime.utcnow() + timedelta(minutes=LOCKOUT_DURATION_MINUTES)
+    reaches_limit = User.failed_login_attempts + 1 >= MAX_FAILED_ATTEMPTS
+    
+    locked_until = db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(
+            failed_login_attempts=User.failed_login_attempts + 1,
+            locked_until=case((reaches_limit, lock_until), else_=User.locked_until),
+            token_version=case((reaches_limit, User.token_version + 1), else_=User.token_version),
+        )
+        .returning(User.locked_until)
+        .execution_options(synchronize_session=False)
+    ).scalar_one()
+    db.commit()
+    
+    locked = locked_until == lock_until
+    if locked:
+        invalidate_principal(user_id)
+    return locked
+
+
+def issue_mfa_code(db: Session, user_id: UUID, prelude: Optional[UpdateBase] = None) -> str:
+    """Create or replace the user's MFA code and commit; returns the plain code.
+    
+    A single INSERT ... ON CONFLICT (user_id) DO UPDATE replaces any pending
+    code. An optional prelude statement (e.g. resetting failed attempts) runs
+    in the same statement as a data-modifying CTE, saving a round trip.
+    """
+    code = generate_mfa_code()
+    now = datetime.utcnow()
+    stmt = pg_insert(MFACode).values(
+        id=uuid4(),
+        user_id=user_id,
+        code=hash_mfa_code(code),
+        expires_at=get_mfa_expiry(),
+        created_at=now
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[MFACode.user_id],
+        set_={
+            "code": stmt.excluded.code,
+            "expires_at": stmt.excluded.expires_at,
+            "created_at": stmt.excluded.created_at,
+        }
+    )
+    if prelude is not None:
+        stmt = stmt.add_cte(prelude.cte("prelude"))
+    db.execute(stmt)
+    db.commit()
+    return code
+
+
 @router.post("/register", response_model=RegisterResponse, status_code=status.HTTP_201_CREATED)
-@limiter.limit(RATE_LIMITS["register"])
+@limiter.limit(rate_limit("register"))
 async def register(
     request: Request,
     user_data: UserCreate,
@@ -89,7 +157,7 @@ async def register(
     is_admin = user_data.email.lower() in admin_emails
     
     # Create new user (not verified yet)
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     new_user = User(
         username=user_data.username,
         email=user_data.email,
@@ -134,7 +202,7 @@ async def register(
 
 
 @router.post("/login", response_model=Union[Token, MFARequired])
-@limiter.limit(RATE_LIMITS["login"])
+@limiter.limit(rate_limit("login"))
 async def login(
     request: Request,
     user_data: UserLogin,
@@ -174,19 +242,18 @@ async def login(
             detail=f"Account temporarily locked. Try again in {remaining_time + 1} minutes."
         )
     
-    # Check if password is correct
-    if not verify_password(user_data.password, user.password_hash):
-        # Increment failed attempts
-        user.failed_login_attempts += 1
-        
-        # Check if we should lock the account
-        if user.failed_login_attempts >= MAX_FAILED_ATTEMPTS:
-            user.locked_until = datetime.utcnow() + timedelta(minutes=LOCKOUT_DURATION_MINUTES)
+    # Release the pooled connection while bcrypt runs; the loaded attributes stay usable
+    db.close()
+    
+    # Check if password is correct (bcrypt runs in the password pool)
+    password_valid, upgraded_hash = await verify_password_async(user_data.password, user.password_hash)
+    if not password_valid:
+        # Increment failed attempts and lock the account if needed (one statement)
+        if record_failed_attempt(db, user.id):
             log_account_locked(user.email, request)
         else:
             log_login_failed(user.email, request, "Invalid password")
         
-        db.commit()
         raise credentials_error
     
     # Check if email is verified (Double Opt-In)
@@ -195,23 +262,20 @@ async def login(
         raise credentials_error
     
     # Successful authentication - reset failed attempts
-    user.reset_failed_attempts()
-    db.commit()
+    user_updates = {}
+    if user.failed_login_attempts or user.locked_until:
+        user_updates.update(failed_login_attempts=0, locked_until=None)
+    
+    # Transparently rehash when the configured bcrypt cost has changed
+    if upgraded_hash:
+        user_updates["password_hash"] = upgraded_hash
+    
+    reset = update(User).where(User.id == user.id).values(**user_updates) if user_updates else None
     
     # If MFA is enabled, send code and return MFA required response
     if user.mfa_enabled:
-        # Delete any existing MFA codes for this user
-        db.query(MFACode).filter(MFACode.user_id == user.id).delete()
-        
-        # Generate new MFA code
-        code = generate_mfa_code()
-        mfa_code = MFACode(
-            user_id=user.id,
-            code=code,
-            expires_at=get_mfa_expiry()
-        )
-        db.add(mfa_code)
-        db.commit()
+        # Reset and code issuance go to the database as one statement
+        code = issue_mfa_code(db, user.id, prelude=reset)
         
         # Send email in background
         background_tasks.add_task(send_mfa_code, user.email, code, user.username)
@@ -226,10 +290,10 @@ async def login(
         )
     
     # MFA not enabled - return token directly
-    access_token = create_access_token(
-        data={"sub": user.username},
-        expires_delta=timedelta(minutes=settings.jwt_expire_minutes)
-    )
+    if reset is not None:
+        db.execute(reset)
+        db.commit()
+    access_token = create_user_access_token(user)
     
     # Audit log successful login
     log_login_success(user.email, request, is_admin=user.is_admin)
@@ -237,7 +301,7 @@ async def login(
 
 
 @router.post("/verify-mfa", response_model=Token)
-@limiter.limit(RATE_LIMITS["mfa_verify"])
+@limiter.limit(rate_limit("mfa_verify"))
 async def verify_mfa(request: Request, mfa_data: MFAVerify, db: Session = Depends(get_db)):
     """Verify MFA code and return JWT token."""
     # Find user by email
@@ -256,46 +320,49 @@ async def verify_mfa(request: Request, mfa_data: MFAVerify, db: Session = Depend
             detail=f"Account temporarily locked. Try again in {remaining_time + 1} minutes."
         )
     
-    # Find valid MFA code
-    mfa_code = db.query(MFACode).filter(
+    # Detach the user so the commits below don't expire (and reload) its attributes
+    db.expunge(user)
+    
+    # Consume the code and reset failed attempts in one statement: the UPDATE
+    # only matches if the DELETE of a valid, unexpired code did
+    used_code = delete(MFACode).where(
         MFACode.user_id == user.id,
-        MFACode.code == mfa_data.code,
+        MFACode.code == hash_mfa_code(mfa_data.code),
         MFACode.expires_at > datetime.utcnow()
+    ).returning(MFACode.user_id).cte("used_code")
+    
+    verified = db.execute(
+        update(User)
+        .where(User.id == used_code.c.user_id)
+        .values(
+            failed_login_attempts=0,
+            locked_until=None,
+            # First successful login marks the email as verified
+            is_email_verified=True
+        )
+        .returning(User.id)
+        .execution_options(synchronize_session=False)
     ).first()
     
-    if not mfa_code:
+    if not verified:
         # Increment failed attempts for MFA too
-        user.failed_login_attempts += 1
-        
-        if user.failed_login_attempts >= MAX_FAILED_ATTEMPTS:
-            user.locked_until = datetime.utcnow() + timedelta(minutes=LOCKOUT_DURATION_MINUTES)
+        if record_failed_attempt(db, user.id):
             log_account_locked(user.email, request)
         else:
             log_mfa_event(user.email, "failed", request, success=False)
         
-        db.commit()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid or expired verification code"
         )
     
-    # Delete the used MFA code
-    db.delete(mfa_code)
+    db.commit()
     
-    # Mark email as verified if first successful login
     if not user.is_email_verified:
-        user.is_email_verified = True
         log_audit_event(AuditEvent.EMAIL_VERIFIED, user_email=user.email, request=request)
     
-    # Reset failed attempts on successful MFA
-    user.reset_failed_attempts()
-    db.commit()
-    
     # Generate access token
-    access_token = create_access_token(
-        data={"sub": user.username},
-        expires_delta=timedelta(minutes=settings.jwt_expire_minutes)
-    )
+    access_token = create_user_access_token(user)
     
     # Audit log successful MFA verification
     log_mfa_event(user.email, "verified", request)
@@ -304,7 +371,7 @@ async def verify_mfa(request: Request, mfa_data: MFAVerify, db: Session = Depend
 
 
 @router.post("/resend-mfa", response_model=MFAResendResponse)
-@limiter.limit(RATE_LIMITS["mfa_resend"])
+@limiter.limit(rate_limit("mfa_resend"))
 async def resend_mfa(
     request: Request,
     mfa_data: MFAResend,
@@ -321,18 +388,8 @@ async def resend_mfa(
             message="If the email exists, a new code has been sent"
         )
     
-    # Delete existing codes
-    db.query(MFACode).filter(MFACode.user_id == user.id).delete()
-    
-    # Generate new code
-    code = generate_mfa_code()
-    mfa_code = MFACode(
-        user_id=user.id,
-        code=code,
-        expires_at=get_mfa_expiry()
-    )
-    db.add(mfa_code)
-    db.commit()
+    # Generate new code, replacing any existing one
+    code = issue_mfa_code(db, user.id)
     
     # Send email in background
     background_tasks.add_task(send_mfa_code, user.email, code, user.username)
@@ -344,13 +401,13 @@ async def resend_mfa(
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: Principal = Depends(get_current_user)):
     """Get current authenticated user info."""
     return current_user
 
 
 @router.post("/confirm-email", response_model=EmailConfirmResponse)
-@limiter.limit(RATE_LIMITS["mfa_verify"])
+@limiter.limit(rate_limit("mfa_verify"))
 async def confirm_email(request: Request, data: EmailConfirm, db: Session = Depends(get_db)):
     """Confirm email address using verification token."""
     # Find the verification token
@@ -387,7 +444,7 @@ async def confirm_email(request: Request, data: EmailConfirm, db: Session = Depe
 
 
 @router.post("/resend-verification", response_model=ResendVerificationResponse)
-@limiter.limit(RATE_LIMITS["resend_verification"])
+@limiter.limit(rate_limit("resend_verification"))
 async def resend_verification(
     request: Request,
     data: ResendVerification,
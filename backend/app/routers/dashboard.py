@@ -0,0 +1,72 @@
+import time
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models import User, UserPreferences, UserScoreSummary
+from app.schemas import DashboardResponse, UserResponse
+from app.auth import get_current_user, Principal
+from app.config import get_settings
+from app.routers.scores import summary_scores, merge_buffered_scores
+from app.routers.settings import load_settings_cached
+from app.routers.user_preferences import preferences_response
+from app.routers.vocabulary import load_tags
+
+router = APIRouter(prefix="/api/dashboard", tags=["Dashboard"])
+settings = get_settings()
+
+# (expires at, vocabulary tags) shared by all users
+_shared_cache: Optional[Tuple[float, List[str]]] = None
+
+
+def _shared_data(db: Session) -> Tuple[List[str], Dict[str, str]]:
+    global _shared_cache
+    if _shared_cache is None or time.monotonic() >= _shared_cache[0]:
+        _shared_cache = (time.monotonic() + settings.dashboard_cache_ttl_seconds, load_tags(db))
+    return _shared_cache[1], load_settings_cached(db)
+
+
+@router.get("", response_model=DashboardResponse)
+async def get_dashboard(
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get everything the home page needs after login in one request:
+    the user, today's and best scores, preferences, vocabulary tags and settings.
+    Tags and settings are cached for DASHBOARD_CACHE_TTL_SECONDS; a settings
+    change clears the settings cache of the worker that handled it, other
+    workers show it once their copy expires.
+    """
+    # Preferences and score summaries in one query: one row per played game
+    rows = db.query(
+        UserPreferences.selected_tags,
+        UserScoreSummary.game_type,
+        UserScoreSummary.today_score,
+        UserScoreSummary.today_date,
+        UserScoreSummary.best_score
+    ).select_from(User).outerjoin(
+        UserPreferences, UserPreferences.user_id == User.id
+    ).outerjoin(
+        UserScoreSummary, UserScoreSummary.user_id == User.id
+    ).filter(User.id == current_user.id).all()
+    
+    games = [row for row in rows if row.game_type is not None]
+    today = date.today()
+    tags, site_settings = _shared_data(db)
+    
+    return DashboardResponse(
+        user=UserResponse.model_validate(current_user),
+        today=merge_buffered_scores(
+            summary_scores([row for row in games if row.today_date == today], "today_score"),
+            current_user.id,
+            today
+        ),
+        best=merge_buffered_scores(summary_scores(games, "best_score"), current_user.id),
+        preferences=preferences_response(rows[0].selected_tags if rows else None),
+        tags=tags,
+        settings=site_settings
+    )
@@ -1,17 +1,23 @@
 import re
+import json
 import random
+import logging
 import unicodedata
 from typing import Optional, List
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy.sql.expression import func
 
-from app.database import get_db
+from app.database import get_db, SessionLocal
 from app.models import Vocabulary, VocabularyHintCache, VocabularyTTSCache
 from app.schemas import QuizQuestion, QuizAnswer, QuizResult, HintRequest, HintResponse, TTSRequest
-from app.openai_client import generate_hint, generate_tts, get_openai_client
+from app.cache_maintenance import record_cache_hit
+from app.ai_quota import QuotaStatus, check_quota, refund_quota
+from app.auth import get_optional_user, Principal
+from app.rate_limiter import get_client_ip
+from app.openai_client import generate_hint, generate_tts, get_openai_client, is_openai_available, stream_hint
 
 
 def normalize_japanese(text: str) -> str:
@@ -25,6 +31,7 @@ def normalize_japanese(text: str) -> str:
     return normalized
 
 router = APIRouter(prefix="/api/quiz", tags=["Quiz"])
+logger = logging.getLogger(__name__)
 
 # Fullwidth underscore for Japanese gap display
 GAP_CHAR = "＿"
@@ -262,12 +269,34 @@ async def check_answer(
     )
 
 
+def _reserve_generation(db: Session, user_id: Optional[UUID], client_ip: str, kind: str) -> QuotaStatus:
+    """Take one AI generation from the caller's daily quota, or fail with 429."""
+    quota = check_quota(db, user_id, client_ip, kind, reserve=True)
+    if not quota.allowed:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Daily AI {kind} limit reached. Cached content is still available; try again tomorrow.",
+            headers=quota.headers()
+        )
+    return quota
+
+
 @router.post("/hint", response_model=HintResponse)
 async def get_hint(
     hint_request: HintRequest,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    user: Optional[Principal] = Depends(get_optional_user)
 ):
-    """Get an AI-generated hint for the current question."""
+    """Get an AI-generated hint for the current question.
+    
+    Generating a hint that isn't cached counts against the caller's daily quota,
+    reported in the X-AI-Quota-* headers.
+    """
+    user_id = user.id if user else None
+    client_ip = get_client_ip(request)
+    
     # Get the vocabulary
     vocab = db.query(Vocabulary).filter(Vocabulary.id == hint_request.vocabulary_id).first()
     if not vocab:
@@ -283,6 +312,8 @@ async def get_hint(
     ).first()
     
     if cached_hint:
+        record_cache_hit("hint", cached_hint.id)
+        response.headers.update(check_quota(db, user_id, client_ip, "hint").headers())
         return HintResponse(hint=cached_hint.hint, available=True)
     
     # Check if OpenAI is configured
@@ -292,20 +323,30 @@ async def get_hint(
             available=False
         )
     
+    response.headers.update(_reserve_generation(db, user_id, client_ip, "hint").headers())
+    expression, reading, meaning = vocab.expression, vocab.reading, vocab.meaning
+    
+    # Return the pooled connection while waiting on OpenAI; the session
+    # transparently checks out a new one for the cache write below
+    db.close()
+    
     # Generate hint via OpenAI
     hint = await generate_hint(
-        expression=vocab.expression,
-        reading=vocab.reading,
-        meaning=vocab.meaning,
+        expression=expression,
+        reading=reading,
+        meaning=meaning,
         mode=hint_request.mode
     )
     
-    # Save to cache (only if generation was successful)
-    if not hint.startswith("Could not generate hint"):
+    if hint.startswith("Could not generate hint"):
+        refund_quota(user_id, client_ip, "hint")
+    else:
+        # Save to cache (only if generation was successful)
         cache_entry = VocabularyHintCache(
             vocabulary_id=hint_request.vocabulary_id,
             mode=hint_request.mode,
-            hint=hint
+            hint=hint,
+            size_bytes=len(hint.encode("utf-8"))
         )
         db.add(cache_entry)
         db.commit()
@@ -313,22 +354,141 @@ async def get_hint(
     return HintResponse(hint=hint, available=True)
 
 
+def _sse(event: str, data: dict) -> str:
+    """Format a single Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.get("/hint/stream")
+async def stream_hint_events(
+    vocabulary_id: UUID,
+    request: Request,
+    mode: str = Query(..., regex="^(to_japanese|to_english|fill_in_blank)$"),
+    db: Session = Depends(get_db),
+    user: Optional[Principal] = Depends(get_optional_user)
+):
+    """Stream an AI-generated hint as Server-Sent Events.
+    
+    Emits `token` events while the hint is generated and a final `done` event
+    with the complete hint; cached hints are replayed as a single `done` event.
+    Failures are reported as an `error` event. Generation counts against the
+    caller's daily quota like POST /hint.
+    """
+    user_id = user.id if user else None
+    client_ip = get_client_ip(request)
+    
+    vocab = db.query(Vocabulary).filter(Vocabulary.id == vocabulary_id).first()
+    if not vocab:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Vocabulary not found"
+        )
+    
+    cached_hint = db.query(VocabularyHintCache).filter(
+        VocabularyHintCache.vocabulary_id == vocabulary_id,
+        VocabularyHintCache.mode == mode
+    ).first()
+    cached_text = cached_hint.hint if cached_hint else None
+    if cached_hint:
+        record_cache_hit("hint", cached_hint.id)
+        quota = check_quota(db, user_id, client_ip, "hint")
+    elif get_openai_client():
+        quota = _reserve_generation(db, user_id, client_ip, "hint")
+    else:
+        quota = None
+    expression, reading, meaning = vocab.expression, vocab.reading, vocab.meaning
+    
+    # The stream can outlive the request's session; release it now
+    db.close()
+    
+    async def events():
+        if cached_text is not None:
+            yield _sse("done", {"hint": cached_text, "cached": True, "available": True})
+            return
+        
+        if not get_openai_client():
+            yield _sse("done", {
+                "hint": "AI hints are not available. Please configure OPENAI_API_KEY.",
+                "cached": False,
+                "available": False
+            })
+            return
+        
+        parts: List[str] = []
+        try:
+            async for token in stream_hint(expression, reading, meaning, mode):
+                parts.append(token)
+                yield _sse("token", {"token": token})
+        except Exception as e:
+            logger.error(f"Hint streaming failed: {e}")
+            refund_quota(user_id, client_ip, "hint")
+            yield _sse("error", {"detail": "Could not generate hint"})
+            return
+        
+        hint = "".join(parts).strip()
+        yield _sse("done", {"hint": hint, "cached": False, "available": True})
+        
+        if not hint:
+            refund_quota(user_id, client_ip, "hint")
+            return
+        
+        cache_db = SessionLocal()
+        try:
+            # Another request may have cached this hint while we were streaming
+            exists = cache_db.query(VocabularyHintCache.id).filter(
+                VocabularyHintCache.vocabulary_id == vocabulary_id,
+                VocabularyHintCache.mode == mode
+            ).first()
+            if not exists:
+                cache_db.add(VocabularyHintCache(
+                    vocabulary_id=vocabulary_id,
+                    mode=mode,
+                    hint=hint,
+                    size_bytes=len(hint.encode("utf-8"))
+                ))
+                cache_db.commit()
+        except Exception as e:
+            logger.warning(f"Could not cache streamed hint: {e}")
+            cache_db.rollback()
+        finally:
+            cache_db.close()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", **(quota.headers() if quota else {})}
+    )
+
+
 @router.post("/tts")
 async def get_text_to_speech(
     tts_request: TTSRequest,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: Session = Depends(get_db),
+    user: Optional[Principal] = Depends(get_optional_user)
 ):
-    """Generate Japanese text-to-speech audio."""
+    """Generate Japanese text-to-speech audio.
+    
+    Generating audio that isn't cached counts against the caller's daily quota,
+    reported in the X-AI-Quota-* headers.
+    """
+    user_id = user.id if user else None
+    client_ip = get_client_ip(request)
+    
     # Check cache first
     cached_tts = db.query(VocabularyTTSCache).filter(
         VocabularyTTSCache.text == tts_request.text
     ).first()
     
     if cached_tts:
+        record_cache_hit("tts", cached_tts.id)
         return Response(
             content=cached_tts.audio_data,
             media_type="audio/mpeg",
-            headers={"Content-Disposition": "inline; filename=tts.mp3"}
+            headers={
+                "Content-Disposition": "inline; filename=tts.mp3",
+                **check_quota(db, user_id, client_ip, "tts").headers()
+            }
         )
     
     # Check if OpenAI is configured
@@ -338,10 +498,23 @@ async def get_text_to_speech(
             detail="TTS is not available. Please configure OPENAI_API_KEY."
         )
     
+    # Fail fast while the OpenAI circuit breaker is open
+    if not is_openai_available():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="TTS is temporarily unavailable. Please try again later."
+        )
+    
+    quota = _reserve_generation(db, user_id, client_ip, "tts")
+    
+    # Return the pooled connection while waiting on OpenAI
+    db.close()
+    
     # Generate audio via OpenAI
     audio_bytes = await generate_tts(tts_request.text)
     
     if not audio_bytes:
+        refund_quota(user_id, client_ip, "tts")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to generate audio"
@@ -350,7 +523,8 @@ async def get_text_to_speech(
     # Save to cache
     cache_entry = VocabularyTTSCache(
         text=tts_request.text,
-        audio_data=audio_bytes
+        audio_data=audio_bytes,
+        size_bytes=len(audio_bytes)
     )
     db.add(cache_entry)
     db.commit()
@@ -358,6 +532,6 @@ async def get_text_to_speech(
     return Response(
         content=audio_bytes,
         media_type="audio/mpeg",
-        headers={"Content-Disposition": "inline; filename=tts.mp3"}
+        headers={"Content-Disposition": "inline; filename=tts.mp3", **quota.headers()}
     )
 
@@ -1,89 +1,96 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import or_, and_
 from sqlalchemy.orm import Session
 from datetime import date, datetime
 from typing import Optional
+from uuid import UUID
 
 from app.database import get_db
-from app.models import User, DailyHighscore
-from app.schemas import ScoreUpdate, ScoreResponse, TodayScoresResponse, ScoreHistoryResponse
-from app.auth import get_current_user
+from app.models import DailyHighscore, UserScoreSummary, UserScoreRollup, UserStreak
+from app.schemas import (
+    ScoreUpdate, ScoreResponse, TodayScoresResponse, ScoreHistoryResponse,
+    LeaderboardResponse, LeaderboardEntryResponse, ScoreRankResponse, GameSummaryResponse, ScoreSummaryResponse,
+    ScoreRollupResponse, ScoreRollupListResponse, ScoreStatsResponse
+)
+from app.auth import get_current_user, Principal
+from app.config import get_settings
+from app.leaderboard import get_leaderboard, get_daily_ranks, record_score, subscribe, unsubscribe
+from app.score_rollups import period_bounds, current_streak
+from app.score_writes import upsert_score, buffer_score, get_buffered_scores
 
 router = APIRouter(prefix="/api/scores", tags=["Scores"])
+settings = get_settings()
+
+
+def summary_scores(rows, field: str) -> TodayScoresResponse:
+    result = TodayScoresResponse()
+    for row in rows:
+        setattr(result, row.game_type, getattr(row, field))
+    return result
+
+
+def merge_buffered_scores(result: TodayScoresResponse, user_id: UUID, day: Optional[date] = None) -> TodayScoresResponse:
+    """Raise scores to the user's not yet flushed buffered scores (of one day, or any day)."""
+    for (game_type, buffered_day), score in get_buffered_scores(user_id).items():
+        if day is None or buffered_day == day:
+            setattr(result, game_type, max(getattr(result, game_type), score))
+    return result
 
 
 @router.post("/update", response_model=ScoreResponse)
 async def update_score(
     score_data: ScoreUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Update score for a game type.
     Only updates if the new score is higher than the existing one.
+    In buffered write mode the score is written by the next buffer flush.
     """
     today = date.today()
     
-    # Find existing score for today
-    existing_score = db.query(DailyHighscore).filter(
-        DailyHighscore.user_id == current_user.id,
-        DailyHighscore.game_type == score_data.game_type,
-        DailyHighscore.date == today
-    ).first()
-    
-    if existing_score:
-        # Only update if new score is higher
-        if score_data.score > existing_score.score:
-            existing_score.score = score_data.score
-            existing_score.updated_at = datetime.utcnow()
-            db.commit()
-            db.refresh(existing_score)
-        return existing_score
-    else:
-        # Create new score entry
-        new_score = DailyHighscore(
-            user_id=current_user.id,
+    if settings.score_write_mode == "buffered":
+        best = buffer_score(current_user.id, score_data.game_type, today, score_data.score)
+        record_score(current_user.id, current_user.username, score_data.game_type, best)
+        return ScoreResponse(
             game_type=score_data.game_type,
             date=today,
-            score=score_data.score
+            score=best,
+            updated_at=datetime.utcnow()
         )
-        db.add(new_score)
-        db.commit()
-        db.refresh(new_score)
-        return new_score
+    
+    score = upsert_score(db, current_user.id, score_data.game_type, score_data.score, today)
+    # Serialize before committing so the commit doesn't expire (and reload) the row
+    response = ScoreResponse.model_validate(score)
+    db.commit()
+    
+    record_score(current_user.id, current_user.username, response.game_type, response.score)
+    return response
 
 
 @router.get("/today", response_model=TodayScoresResponse)
 async def get_today_scores(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get today's scores for all games."""
-    today = date.today()
-    
-    scores = db.query(DailyHighscore).filter(
-        DailyHighscore.user_id == current_user.id,
-        DailyHighscore.date == today
+    rows = db.query(UserScoreSummary.game_type, UserScoreSummary.today_score).filter(
+        UserScoreSummary.user_id == current_user.id,
+        UserScoreSummary.today_date == date.today()
     ).all()
     
-    result = TodayScoresResponse()
-    for score in scores:
-        if score.game_type == "quiz":
-            result.quiz = score.score
-        elif score.game_type == "salad":
-            result.salad = score.score
-        elif score.game_type == "lines":
-            result.lines = score.score
-        elif score.game_type == "memory":
-            result.memory = score.score
-    
-    return result
+    return merge_buffered_scores(summary_scores(rows, "today_score"), current_user.id, date.today())
 
 
 @router.get("/me", response_model=ScoreHistoryResponse)
 async def get_my_scores(
     game_type: Optional[str] = None,
     limit: int = 30,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get user's score history."""
@@ -94,29 +101,191 @@ async def get_my_scores(
     if game_type:
         query = query.filter(DailyHighscore.game_type == game_type)
     
-    scores = query.order_by(DailyHighscore.date.desc()).limit(limit).all()
+    scores = [
+        ScoreResponse.model_validate(score)
+        for score in query.order_by(DailyHighscore.date.desc()).limit(limit).all()
+    ]
+    
+    buffered = get_buffered_scores(current_user.id)
+    if buffered:
+        history = {(score.game_type, score.date): score for score in scores}
+        for (buffered_game, day), score in buffered.items():
+            if game_type and buffered_game != game_type:
+                continue
+            entry = history.get((buffered_game, day))
+            if entry is None:
+                history[(buffered_game, day)] = ScoreResponse(
+                    game_type=buffered_game, date=day, score=score, updated_at=datetime.utcnow()
+                )
+            elif score > entry.score:
+                entry.score = score
+        scores = sorted(history.values(), key=lambda score: score.date, reverse=True)[:limit]
     
     return ScoreHistoryResponse(scores=scores)
 
 
 @router.get("/best", response_model=TodayScoresResponse)
 async def get_best_scores(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get user's all-time best scores for each game."""
-    from sqlalchemy import func
+    rows = db.query(UserScoreSummary.game_type, UserScoreSummary.best_score).filter(
+        UserScoreSummary.user_id == current_user.id
+    ).all()
     
-    result = TodayScoresResponse()
+    return merge_buffered_scores(summary_scores(rows, "best_score"), current_user.id)
+
+
+@router.get("/summary", response_model=ScoreSummaryResponse)
+async def get_score_summary(
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get today's and best scores plus play statistics for all games in one read."""
+    rows = db.query(UserScoreSummary).filter(
+        UserScoreSummary.user_id == current_user.id
+    ).all()
+    
+    today = date.today()
+    return ScoreSummaryResponse(
+        today=merge_buffered_scores(
+            summary_scores([row for row in rows if row.today_date == today], "today_score"),
+            current_user.id,
+            today
+        ),
+        best=merge_buffered_scores(summary_scores(rows, "best_score"), current_user.id),
+        games=[GameSummaryResponse.model_validate(row) for row in rows]
+    )
+
+
+@router.get("/stats", response_model=ScoreStatsResponse)
+async def get_score_stats(
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the current and longest streak plus this week's and this month's rollups."""
+    today = date.today()
+    bounds = period_bounds(today)
     
-    for game_type in ["quiz", "salad", "lines", "memory"]:
-        best = db.query(func.max(DailyHighscore.score)).filter(
-            DailyHighscore.user_id == current_user.id,
-            DailyHighscore.game_type == game_type
-        ).scalar()
-        
-        if best:
-            setattr(result, game_type, best)
+    streak = db.query(UserStreak).filter(UserStreak.user_id == current_user.id).first()
+    rollups = {
+        rollup.period: rollup
+        for rollup in db.query(UserScoreRollup).filter(
+            UserScoreRollup.user_id == current_user.id,
+            or_(*(
+                and_(UserScoreRollup.period == period, UserScoreRollup.period_start == start)
+                for period, (start, _) in bounds.items()
+            ))
+        ).all()
+    }
     
-    return result
+    def rollup_or_empty(period: str) -> ScoreRollupResponse:
+        if period in rollups:
+            return ScoreRollupResponse.model_validate(rollups[period])
+        return ScoreRollupResponse(period=period, period_start=bounds[period][0])
+    
+    return ScoreStatsResponse(
+        current_streak=current_streak(streak, today) if streak else 0,
+        longest_streak=streak.longest_streak if streak else 0,
+        last_played_date=streak.last_played_date if streak else None,
+        week=rollup_or_empty("week"),
+        month=rollup_or_empty("month")
+    )
+
+
+@router.get("/rollups", response_model=ScoreRollupListResponse)
+async def get_score_rollups(
+    period: str = Query("week", pattern="^(week|month)$"),
+    limit: int = Query(12, ge=1, le=104),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the user's most recent weekly or monthly rollups, newest first (periods without play are omitted)."""
+    rollups = db.query(UserScoreRollup).filter(
+        UserScoreRollup.user_id == current_user.id,
+        UserScoreRollup.period == period
+    ).order_by(UserScoreRollup.period_start.desc()).limit(limit).all()
+    
+    return ScoreRollupListResponse(rollups=rollups)
+
+
+@router.get("/leaderboard", response_model=LeaderboardResponse)
+async def get_leaderboard_scores(
+    game_type: str = Query(..., pattern="^(quiz|salad|lines|memory)$"),
+    period: str = Query("day", pattern="^(day|week|all)$"),
+    limit: int = Query(10, ge=1),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Get the best players of a game for today, this week (since Monday) or all time.
+    Served from an in-memory top-N board; ties share a rank.
+    """
+    board = await get_leaderboard(game_type, period)
+    limit = min(limit, settings.leaderboard_size)
+    
+    return LeaderboardResponse(
+        game_type=game_type,
+        period=period,
+        entries=[
+            LeaderboardEntryResponse(rank=rank, username=entry.username, score=entry.score)
+            for rank, entry in board.ranked()[:limit]
+        ]
+    )
+
+
+@router.get("/rank", response_model=ScoreRankResponse)
+async def get_my_rank(
+    game_type: str = Query(..., pattern="^(quiz|salad|lines|memory)$"),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Get the user's rank among today's players of a game.
+    Answered from in-memory sorted scores; ties share a rank.
+    """
+    ranks = await get_daily_ranks(game_type)
+    response = ScoreRankResponse(game_type=game_type, date=ranks.day, players=len(ranks))
+    
+    score = ranks.score(current_user.id)
+    if score is not None:
+        response.score = score
+        response.rank = ranks.rank(score)
+        response.percentile = round(100 * (len(ranks) - response.rank + 1) / len(ranks), 1)
+    return response
+
 
+@router.get("/live")
+async def stream_leaderboard(
+    game_type: str = Query(..., pattern="^(quiz|salad|lines|memory)$"),
+    period: str = Query("day", pattern="^(day|week|all)$"),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream the top of a leaderboard as Server-Sent Events.
+    Emits a `leaderboard` event with the current top entries on connect and
+    again whenever they change (at most once per push interval).
+    """
+    # The stream outlives the request; don't hold a connection for it
+    db.close()
+    queue = await subscribe(game_type, period)
+    
+    async def events():
+        try:
+            while True:
+                try:
+                    snapshot = await asyncio.wait_for(
+                        queue.get(), timeout=settings.leaderboard_keepalive_seconds
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: leaderboard\ndata: {snapshot}\n\n"
+        finally:
+            unsubscribe(game_type, period, queue)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,11 +1,17 @@
-from typing import Dict
+import time
+from typing import Dict, Optional, Tuple
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.database import get_db
-from app.models import Setting, User
+from app.models import Setting
 from app.schemas import SettingResponse, SettingUpdate, SettingsListResponse
-from app.auth import get_current_user, require_admin
+from app.auth import get_current_user, require_admin, Principal
+from app.config import get_settings
+from app.rate_limiter import (
+    RATE_LIMITS, RATE_LIMIT_SETTING_PREFIX, is_valid_rate_limit,
+    load_rate_limit_overrides, set_rate_limit_overrides
+)
 
 router = APIRouter(prefix="/api/settings", tags=["Settings"])
 
@@ -15,6 +21,9 @@ DEFAULT_SETTINGS = {
     "salad_kana_per_round": "20",
 }
 
+# (expires at, settings) reused by the dashboard; cleared when this worker writes a setting
+_settings_cache: Optional[Tuple[float, Dict[str, str]]] = None
+
 
 def init_default_settings(db: Session):
     """Initialize default settings if they don't exist."""
@@ -26,16 +35,36 @@ def init_default_settings(db: Session):
     db.commit()
 
 
-@router.get("", response_model=SettingsListResponse)
-async def get_all_settings(db: Session = Depends(get_db)):
-    """Get all settings as a dictionary."""
+def load_settings(db: Session) -> Dict[str, str]:
+    """All settings as a dictionary, creating missing defaults first."""
     # Ensure defaults exist
     init_default_settings(db)
     
     settings = db.query(Setting).all()
-    settings_dict = {s.key: s.value for s in settings}
+    return {s.key: s.value for s in settings}
+
+
+def load_settings_cached(db: Session) -> Dict[str, str]:
+    """load_settings, reused for DASHBOARD_CACHE_TTL_SECONDS.
     
-    return SettingsListResponse(settings=settings_dict)
+    A write through this worker clears the cache; other workers pick the
+    change up when their copy expires.
+    """
+    global _settings_cache
+    if _settings_cache is None or time.monotonic() >= _settings_cache[0]:
+        _settings_cache = (time.monotonic() + get_settings().dashboard_cache_ttl_seconds, load_settings(db))
+    return _settings_cache[1]
+
+
+def clear_settings_cache() -> None:
+    global _settings_cache
+    _settings_cache = None
+
+
+@router.get("", response_model=SettingsListResponse)
+async def get_all_settings(db: Session = Depends(get_db)):
+    """Get all settings as a dictionary."""
+    return SettingsListResponse(settings=load_settings(db))
 
 
 @router.get("/{key}", response_model=SettingResponse)
@@ -66,9 +95,22 @@ async def update_setting(
     key: str,
     update_data: SettingUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
-    """Update a setting (requires admin privileges)."""
+    """Update a setting (requires admin privileges).
+    
+    Keys named rate_limit_<name> override the corresponding rate limit;
+    other workers pick the change up within RATE_LIMIT_REFRESH_SECONDS.
+    """
+    is_rate_limit = key.startswith(RATE_LIMIT_SETTING_PREFIX)
+    if is_rate_limit:
+        name = key[len(RATE_LIMIT_SETTING_PREFIX):]
+        if name not in RATE_LIMITS or not is_valid_rate_limit(update_data.value):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid rate limit setting '{key}'"
+            )
+    
     setting = db.query(Setting).filter(Setting.key == key).first()
     
     if not setting:
@@ -80,6 +122,10 @@ async def update_setting(
     
     db.commit()
     db.refresh(setting)
+    clear_settings_cache()
+    
+    if is_rate_limit:
+        set_rate_limit_overrides(load_rate_limit_overrides(db))
     
     return setting
 
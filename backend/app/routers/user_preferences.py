@@ -1,42 +1,43 @@
+from typing import Optional
+
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
 from app.database import get_db
-from app.models import User, UserPreferences
+from app.models import UserPreferences
 from app.schemas import UserPreferencesResponse, UserPreferencesUpdate
-from app.auth import get_current_user
+from app.auth import get_current_user, Principal
 
 router = APIRouter(prefix="/api/user", tags=["User Preferences"])
 
 
+def preferences_response(selected_tags: Optional[str]) -> UserPreferencesResponse:
+    """Parse stored comma-separated tags (None if no preferences are set)."""
+    if selected_tags:
+        tags = [t.strip() for t in selected_tags.split(",") if t.strip()]
+    else:
+        tags = []
+    
+    return UserPreferencesResponse(selected_tags=tags)
+
+
 @router.get("/preferences", response_model=UserPreferencesResponse)
 async def get_preferences(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get current user's preferences (selected tags)."""
-    prefs = db.query(UserPreferences).filter(
+    selected_tags = db.query(UserPreferences.selected_tags).filter(
         UserPreferences.user_id == current_user.id
-    ).first()
-    
-    if not prefs:
-        # Return empty list if no preferences set
-        return UserPreferencesResponse(selected_tags=[])
-    
-    # Parse comma-separated tags
-    if prefs.selected_tags:
-        tags = [t.strip() for t in prefs.selected_tags.split(",") if t.strip()]
-    else:
-        tags = []
-    
-    return UserPreferencesResponse(selected_tags=tags)
+    ).scalar()
+    return preferences_response(selected_tags)
 
 
 @router.put("/preferences", response_model=UserPreferencesResponse)
 async def update_preferences(
     update_data: UserPreferencesUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Update current user's preferences (selected tags)."""
     prefs = db.query(UserPreferences).filter(
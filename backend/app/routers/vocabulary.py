@@ -7,7 +7,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 
 from app.database import get_db
-from app.models import Vocabulary, User
+from app.models import Vocabulary
 from app.schemas import (
     VocabularyCreate, 
     VocabularyUpdate, 
@@ -15,7 +15,7 @@ from app.schemas import (
     VocabularyListResponse,
     CSVImportResult
 )
-from app.auth import get_current_user, require_admin
+from app.auth import get_current_user, require_admin, Principal
 
 router = APIRouter(prefix="/api/vocabulary", tags=["Vocabulary"])
 
@@ -78,15 +78,8 @@ async def get_vocabulary(
     )
 
 
-@router.get("/tags", response_model=List[str])
-async def get_all_tags(response: Response, db: Session = Depends(get_db)):
-    """Get all unique tags from vocabulary.
-    
-    Cached for 5 minutes as tags change infrequently.
-    """
-    # Set cache headers - cache for 5 minutes
-    response.headers["Cache-Control"] = f"public, max-age={TAGS_CACHE_MAX_AGE}"
-    
+def load_tags(db: Session) -> List[str]:
+    """All unique vocabulary tags, sorted."""
     all_tags = db.query(Vocabulary.tags).filter(Vocabulary.tags.isnot(None)).all()
     
     # Extract and deduplicate tags
@@ -101,6 +94,18 @@ async def get_all_tags(response: Response, db: Session = Depends(get_db)):
     return sorted(list(tag_set))
 
 
+@router.get("/tags", response_model=List[str])
+async def get_all_tags(response: Response, db: Session = Depends(get_db)):
+    """Get all unique tags from vocabulary.
+    
+    Cached for 5 minutes as tags change infrequently.
+    """
+    # Set cache headers - cache for 5 minutes
+    response.headers["Cache-Control"] = f"public, max-age={TAGS_CACHE_MAX_AGE}"
+    
+    return load_tags(db)
+
+
 @router.get("/random", response_model=List[VocabularyResponse])
 async def get_random_vocabulary(
     count: int = Query(10, ge=1, le=50),
@@ -141,7 +146,7 @@ async def get_vocabulary_by_id(vocab_id: UUID, db: Session = Depends(get_db)):
 async def create_vocabulary(
     vocab_data: VocabularyCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """Create a new vocabulary entry (requires admin privileges)."""
     new_vocab = Vocabulary(
@@ -163,7 +168,7 @@ async def update_vocabulary(
     vocab_id: UUID,
     vocab_data: VocabularyUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """Update a vocabulary entry (requires admin privileges)."""
     vocab = db.query(Vocabulary).filter(Vocabulary.id == vocab_id).first()
@@ -187,7 +192,7 @@ async def update_vocabulary(
 async def delete_vocabulary(
     vocab_id: UUID,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """Delete a vocabulary entry (requires admin privileges)."""
     vocab = db.query(Vocabulary).filter(Vocabulary.id == vocab_id).first()
@@ -205,7 +210,7 @@ async def delete_vocabulary(
 async def import_csv(
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """Import vocabulary from CSV file (requires admin privileges)."""
     if not file.filename or not file.filename.endswith('.csv'):
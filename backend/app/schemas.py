@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, EmailStr, field_validator
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime, date
 from uuid import UUID
 import re
@@ -72,6 +72,9 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username: Optional[str] = None
+    user_id: Optional[UUID] = None
+    is_admin: Optional[bool] = None
+    token_version: Optional[int] = None
 
 
 # MFA schemas
@@ -127,7 +130,7 @@ class ScoreUpdate(BaseModel):
 
 
 class ScoreResponse(BaseModel):
-    id: UUID
+    id: Optional[UUID] = None  # None while the score is only in the write-behind buffer
     game_type: str
     date: date
     score: int
@@ -148,6 +151,66 @@ class ScoreHistoryResponse(BaseModel):
     scores: List[ScoreResponse]
 
 
+class GameSummaryResponse(BaseModel):
+    game_type: str
+    best_score: int
+    days_played: int
+    last_played_date: date
+
+    class Config:
+        from_attributes = True
+
+
+class ScoreSummaryResponse(BaseModel):
+    today: TodayScoresResponse
+    best: TodayScoresResponse
+    games: List[GameSummaryResponse]
+
+
+class ScoreRollupResponse(BaseModel):
+    period: str
+    period_start: date
+    total_score: int = 0
+    days_played: int = 0
+    best_score: int = 0
+
+    class Config:
+        from_attributes = True
+
+
+class ScoreRollupListResponse(BaseModel):
+    rollups: List[ScoreRollupResponse]
+
+
+class ScoreStatsResponse(BaseModel):
+    current_streak: int
+    longest_streak: int
+    last_played_date: Optional[date] = None
+    week: ScoreRollupResponse
+    month: ScoreRollupResponse
+
+
+class LeaderboardEntryResponse(BaseModel):
+    rank: int
+    username: str
+    score: int
+
+
+class LeaderboardResponse(BaseModel):
+    game_type: str
+    period: str
+    entries: List[LeaderboardEntryResponse]
+
+
+class ScoreRankResponse(BaseModel):
+    game_type: str
+    date: date
+    players: int
+    score: Optional[int] = None  # None if the user hasn't played the game today
+    rank: Optional[int] = None
+    percentile: Optional[float] = None  # Share of players ranked at or below the user
+
+
 # Vocabulary schemas
 class VocabularyBase(BaseModel):
     expression: str = Field(..., min_length=1, max_length=255)
@@ -274,6 +337,7 @@ class InvitationResponse(BaseModel):
     expires_at: datetime
     created_at: datetime
     invited_by_username: str
+    email_status: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -284,6 +348,23 @@ class InvitationListResponse(BaseModel):
     total: int
 
 
+class InvitationBulkCreate(BaseModel):
+    emails: List[str] = Field(default_factory=list, max_length=500)
+    csv: Optional[str] = Field(None, max_length=100_000)  # Addresses separated by commas, semicolons or newlines
+
+
+class InvitationBulkResult(BaseModel):
+    email: str
+    status: str  # "invited", "invalid", "duplicate", "already_registered" or "already_invited"
+    invitation_id: Optional[UUID] = None
+
+
+class InvitationBulkResponse(BaseModel):
+    results: List[InvitationBulkResult]
+    invited: int
+    skipped: int
+
+
 # Admin schemas - User Management
 class UserAdminResponse(BaseModel):
     id: UUID
@@ -320,13 +401,26 @@ class HintCacheResponse(BaseModel):
 
 class HintCacheListResponse(BaseModel):
     items: List[HintCacheResponse]
-    total: int
+    total: Optional[int] = None  # Only on the first page, or with include_total
+    next_cursor: Optional[str] = None  # Pass as `cursor` to fetch the next page
 
 
 class HintCacheUpdate(BaseModel):
     hint: str = Field(..., min_length=1)
 
 
+class HintCacheWarmRequest(BaseModel):
+    mode: str = Field(..., pattern="^(to_japanese|to_english)$")
+    tags: Optional[str] = None  # Comma-separated tag filter, empty for all vocabulary
+    limit: int = Field(200, ge=1, le=2000)  # Max words to generate hints for in this run
+
+
+class HintCacheWarmResponse(BaseModel):
+    requested: int  # Words without a cached hint that were sent to OpenAI
+    generated: int  # Hints written to the cache
+    failed: int  # Words that got no valid hint (can be retried)
+
+
 class TTSCacheResponse(BaseModel):
     id: UUID
     text: str
@@ -339,12 +433,72 @@ class TTSCacheResponse(BaseModel):
 
 class TTSCacheListResponse(BaseModel):
     items: List[TTSCacheResponse]
-    total: int
+    total: Optional[int] = None  # Only on the first page, or with include_total
+    next_cursor: Optional[str] = None  # Pass as `cursor` to fetch the next page
 
 
 class CacheStatsResponse(BaseModel):
     hint_count: int
     tts_count: int
+    hint_bytes: int = 0
+    tts_bytes: int = 0
+    hint_hits: int = 0
+    tts_hits: int = 0
+    hint_hit_ratio: float = 0.0
+    tts_hit_ratio: float = 0.0
+    tts_max_bytes: int = 0  # 0 = unbounded
+    eviction_policy: str = "lru"
+
+
+# Admin schemas - Mail delivery
+class MailStatsResponse(BaseModel):
+    pending: int
+    pool_size: int
+    queued: int
+    sent: int
+    failed: int
+    retried: int
+    dropped: int
+    connections_opened: int
+    last_error: Optional[str] = None
+
+
+class AuditLogStatsResponse(BaseModel):
+    enqueued: int
+    dropped: int
+    written: int
+    batches: int
+    stored: int
+    store_failed: int
+    store_dropped: int
+    pending: int
+    store_pending: int
+    queue_size: int
+
+
+class TokenCleanupStatsResponse(BaseModel):
+    finished_at: Optional[datetime] = None  # None until this worker has run a pass
+    duration_ms: int = 0
+    deleted: Dict[str, int] = {}
+
+
+class AuditEventResponse(BaseModel):
+    id: UUID
+    created_at: datetime
+    event: str
+    success: bool
+    user_email: Optional[str] = None
+    user_id: Optional[UUID] = None
+    ip_address: Optional[str] = None
+    details: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class AuditEventListResponse(BaseModel):
+    items: List[AuditEventResponse]
+    next_cursor: Optional[str] = None  # Pass as `cursor` to fetch the next page
 
 
 # User Preferences schemas
@@ -357,3 +511,13 @@ class UserPreferencesResponse(BaseModel):
 
 class UserPreferencesUpdate(BaseModel):
     selected_tags: List[str]
+
+
+# Dashboard schemas
+class DashboardResponse(BaseModel):
+    user: UserResponse
+    today: TodayScoresResponse
+    best: TodayScoresResponse
+    preferences: UserPreferencesResponse
+    tags: List[str]
+    settings: Dict[str, str]
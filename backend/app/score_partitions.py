@@ -0,0 +1,150 @@
+"""
+Monthly partitions of daily_highscores.
+
+daily_highscores is range-partitioned by date, one partition per month
+(daily_highscores_y2026m10 holds October 2026). A background task keeps
+SCORE_PARTITION_MONTHS_AHEAD months of partitions created in advance, so
+inserts never hit a missing partition, and detaches partitions that ended
+more than SCORE_RETENTION_MONTHS months ago. Detached partitions are kept
+as standalone archive tables until an operator dumps or drops them;
+weekly/monthly rollups, summaries and streaks are maintained on write and
+do not need the detached rows.
+
+Queries bounded by date (leaderboards, ranks, rollups) are pruned to the
+partitions they cover, and the per-user history (ORDER BY date DESC
+LIMIT n) reads the newest partitions first and stops early.
+"""
+import asyncio
+import logging
+import time
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import Connection
+
+from app.config import get_settings
+from app.database import engine
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "daily_highscores"
+
+# Arbitrary application-wide key for pg_try_advisory_lock
+PARTITION_LOCK_KEY = 4206902
+
+
+def add_months(month: date, months: int) -> date:
+    """First day of the month `months` after (or before, if negative) `month`."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    """Month of a partition named by partition_name (None for other tables)."""
+    prefix = f"{PARENT_TABLE}_y"
+    if not name.startswith(prefix):
+        return None
+    try:
+        year, month = name[len(prefix):].split("m")
+        return date(int(year), int(month), 1)
+    except ValueError:
+        return None
+
+
+def list_partitions(conn: Connection) -> List[str]:
+    """Names of the partitions currently attached to daily_highscores."""
+    rows = conn.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = CAST(:parent AS regclass)"
+    ), {"parent": PARENT_TABLE})
+    return [row[0] for row in rows]
+
+
+def _run_ddl(conn: Connection, statement: str) -> None:
+    """Run one DDL statement in its own transaction, giving up if the table stays locked."""
+    # Partition DDL locks the parent; don't queue score writes behind a long-running reader
+    conn.execute(text(f"SET LOCAL lock_timeout = '{int(settings.score_partition_lock_timeout_ms)}ms'"))
+    conn.execute(text(statement))
+    conn.commit()
+
+
+def create_partitions(conn: Connection, existing: List[str], first: date, months: int) -> List[str]:
+    """Create the missing partitions of `months` months from `first`. Returns the created names."""
+    created = []
+    for offset in range(months):
+        month = add_months(first, offset)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        _run_ddl(
+            conn,
+            f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        )
+        created.append(name)
+    return created
+
+
+def detach_partitions(conn: Connection, existing: List[str], before: date) -> List[str]:
+    """Detach partitions of months before `before`. Returns the detached names."""
+    detached = []
+    for name in sorted(existing):
+        month = partition_month(name)
+        if month is None or month >= before:
+            continue
+        _run_ddl(conn, f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}")
+        detached.append(name)
+    return detached
+
+
+def run_partition_maintenance() -> Optional[Dict[str, object]]:
+    """Run one maintenance pass. Returns its metrics, or None if another worker holds the lock."""
+    started = time.monotonic()
+    this_month = date.today().replace(day=1)
+    with engine.connect() as conn:
+        # Session-level lock: held across the per-statement commits on this connection
+        locked = conn.execute(select(func.pg_try_advisory_lock(PARTITION_LOCK_KEY))).scalar()
+        conn.commit()
+        if not locked:
+            logger.debug("Score partition maintenance already running in another worker, skipping")
+            return None
+        try:
+            existing = list_partitions(conn)
+            created = create_partitions(conn, existing, this_month, settings.score_partition_months_ahead + 1)
+            detached = []
+            if settings.score_retention_months > 0:
+                cutoff = add_months(this_month, -settings.score_retention_months)
+                detached = detach_partitions(conn, existing, cutoff)
+        finally:
+            conn.rollback()
+            conn.execute(select(func.pg_advisory_unlock(PARTITION_LOCK_KEY)))
+            conn.commit()
+
+    metrics = {
+        "finished_at": datetime.utcnow(),
+        "duration_ms": int((time.monotonic() - started) * 1000),
+        "created": created,
+        "detached": detached,
+    }
+    if created:
+        logger.info(f"Created score partitions {', '.join(created)}")
+    if detached:
+        logger.info(f"Detached expired score partitions {', '.join(detached)} (kept as archive tables)")
+    return metrics
+
+
+async def run_partition_maintenance_loop() -> None:
+    """Background loop: run a maintenance pass right away, then every interval."""
+    while True:
+        try:
+            await asyncio.to_thread(run_partition_maintenance)
+        except Exception as e:
+            logger.warning(f"Could not maintain score partitions: {e}")
+        await asyncio.sleep(settings.score_partition_maintenance_seconds)
@@ -0,0 +1,233 @@
+"""
+Weekly/monthly score rollups and play streaks.
+
+Both are maintained on score writes so that reading them is a single-row
+lookup. The streak row is upserted in the same statement as the daily
+score; the week and month rollups of the date are recomputed from that
+user's daily_highscores rows of the period (at most a few dozen rows),
+which keeps them exact even for concurrent or repeated submissions.
+
+Existing data is backfilled with:
+
+    python -m app.score_rollups
+"""
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import Date, String, and_, case, column, distinct, func, literal, select, text, union_all, values
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, insert as pg_insert
+
+from app.database import SessionLocal
+from app.models import DailyHighscore, UserScoreRollup, UserStreak
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_COLUMNS = ["id", "user_id", "period", "period_start", "total_score", "days_played", "best_score", "updated_at"]
+
+
+def period_bounds(day: date) -> Dict[str, Tuple[date, date]]:
+    """[start, end) of the week (starting Monday) and the month containing day."""
+    week_start = day - timedelta(days=day.weekday())
+    month_start = day.replace(day=1)
+    next_month = (month_start + timedelta(days=32)).replace(day=1)
+    return {
+        "week": (week_start, week_start + timedelta(days=7)),
+        "month": (month_start, next_month),
+    }
+
+
+def insert_rows(model, rows: List[dict]):
+    """Multi-row INSERT written as INSERT ... SELECT FROM (VALUES ...).
+
+    Unlike insert().values([...]) this also compiles inside a CTE.
+    """
+    names = list(rows[0])
+    table = model.__table__
+    data = values(*[column(name, table.c[name].type) for name in names], name="new_rows").data(
+        [tuple(row[name] for name in names) for row in rows]
+    )
+    return pg_insert(model).from_select(names, select(data))
+
+
+def _upsert_rollups(rows):
+    """INSERT ... SELECT of rollup rows that replaces existing rows of the same period."""
+    stmt = pg_insert(UserScoreRollup).from_select(ROLLUP_COLUMNS, rows)
+    return stmt.on_conflict_do_update(
+        constraint="uix_user_score_rollup_period",
+        set_={
+            "total_score": stmt.excluded.total_score,
+            "days_played": stmt.excluded.days_played,
+            "best_score": stmt.excluded.best_score,
+            "updated_at": stmt.excluded.updated_at,
+        }
+    )
+
+
+def refresh_rollups(user_id: UUID, day: date):
+    """Statement recomputing the user's week and month rollups around day."""
+    now = datetime.utcnow()
+    aggregates = [
+        select(
+            func.gen_random_uuid(),
+            literal(user_id, PG_UUID(as_uuid=True)),
+            literal(period),
+            literal(start, Date),
+            func.coalesce(func.sum(DailyHighscore.score), 0),
+            func.count(distinct(DailyHighscore.date)),
+            func.coalesce(func.max(DailyHighscore.score), 0),
+            literal(now),
+        ).where(
+            DailyHighscore.user_id == user_id,
+            DailyHighscore.date >= start,
+            DailyHighscore.date < end
+        )
+        for period, (start, end) in period_bounds(day).items()
+    ]
+    return _upsert_rollups(union_all(*aggregates))
+
+
+def refresh_rollups_bulk(user_days: Iterable[Tuple[UUID, date]]):
+    """Statement recomputing the week and month rollups around several (user, day) pairs.
+
+    Each (user, period) is recomputed once, however many of its days are given.
+    """
+    now = datetime.utcnow()
+    targets = sorted({
+        (user_id, period, start, end)
+        for user_id, day in user_days
+        for period, (start, end) in period_bounds(day).items()
+    })
+    periods = values(
+        column("user_id", PG_UUID(as_uuid=True)),
+        column("period", String),
+        column("period_start", Date),
+        column("period_end", Date),
+        name="periods",
+    ).data(targets)
+    aggregates = select(
+        func.gen_random_uuid(),
+        periods.c.user_id,
+        periods.c.period,
+        periods.c.period_start,
+        func.coalesce(func.sum(DailyHighscore.score), 0),
+        func.count(distinct(DailyHighscore.date)),
+        func.coalesce(func.max(DailyHighscore.score), 0),
+        literal(now),
+    ).select_from(
+        periods.outerjoin(DailyHighscore, and_(
+            DailyHighscore.user_id == periods.c.user_id,
+            DailyHighscore.date >= periods.c.period_start,
+            DailyHighscore.date < periods.c.period_end
+        ))
+    ).group_by(periods.c.user_id, periods.c.period, periods.c.period_start)
+    return _upsert_rollups(aggregates)
+
+
+def streak_upsert(user_ids: Iterable[UUID], today: date):
+    """INSERT ... ON CONFLICT statement extending the users' streaks with today.
+
+    ON CONFLICT DO UPDATE evaluates against the latest row version, so
+    concurrent submissions of the same day can't double-count it.
+    """
+    now = datetime.utcnow()
+    stmt = insert_rows(UserStreak, [
+        {
+            "id": uuid4(),
+            "user_id": user_id,
+            "current_streak": 1,
+            "longest_streak": 1,
+            "last_played_date": today,
+            "updated_at": now,
+        }
+        for user_id in user_ids
+    ])
+    current = case(
+        (UserStreak.last_played_date >= today, UserStreak.current_streak),
+        (UserStreak.last_played_date == today - timedelta(days=1), UserStreak.current_streak + 1),
+        else_=1
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[UserStreak.user_id],
+        set_={
+            "current_streak": current,
+            "longest_streak": func.greatest(UserStreak.longest_streak, current),
+            "last_played_date": func.greatest(UserStreak.last_played_date, today),
+            "updated_at": stmt.excluded.updated_at,
+        }
+    )
+
+
+def current_streak(streak: UserStreak, today: date) -> int:
+    """The streak only counts while the user played today or yesterday."""
+    if streak.last_played_date >= today - timedelta(days=1):
+        return streak.current_streak
+    return 0
+
+
+# Islands of consecutive dates: date minus its row number is constant within a run
+_BACKFILL_STREAKS = text("""
+    WITH days AS (
+        SELECT DISTINCT user_id, date FROM daily_highscores
+    ), runs AS (
+        SELECT user_id, COUNT(*) AS length, MAX(date) AS last_date
+        FROM (
+            SELECT user_id, date, date - (ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY date))::int AS island
+            FROM days
+        ) islands
+        GROUP BY user_id, island
+    ), per_user AS (
+        SELECT
+            user_id,
+            (ARRAY_AGG(length ORDER BY last_date DESC))[1] AS current_streak,
+            MAX(length) AS longest_streak,
+            MAX(last_date) AS last_played_date
+        FROM runs
+        GROUP BY user_id
+    )
+    INSERT INTO user_streaks (id, user_id, current_streak, longest_streak, last_played_date, updated_at)
+    SELECT gen_random_uuid(), user_id, current_streak, longest_streak, last_played_date, now()
+    FROM per_user
+    ON CONFLICT (user_id) DO UPDATE SET
+        current_streak = excluded.current_streak,
+        longest_streak = excluded.longest_streak,
+        last_played_date = excluded.last_played_date,
+        updated_at = excluded.updated_at
+""")
+
+
+def backfill() -> Tuple[int, int]:
+    """Rebuild all rollups and streaks from daily_highscores. Returns (rollup rows, streak rows)."""
+    db = SessionLocal()
+    try:
+        aggregates = []
+        for period in ("week", "month"):
+            start = func.date_trunc(period, DailyHighscore.date).cast(Date)
+            aggregates.append(
+                select(
+                    func.gen_random_uuid(),
+                    DailyHighscore.user_id,
+                    literal(period),
+                    start,
+                    func.sum(DailyHighscore.score),
+                    func.count(distinct(DailyHighscore.date)),
+                    func.max(DailyHighscore.score),
+                    func.now(),
+                ).group_by(DailyHighscore.user_id, start)
+            )
+        rollups = db.execute(_upsert_rollups(union_all(*aggregates))).rowcount
+        streaks = db.execute(_BACKFILL_STREAKS).rowcount
+        db.commit()
+        return rollups, streaks
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    rollup_rows, streak_rows = backfill()
+    logger.info(f"Backfilled {rollup_rows} score rollups and {streak_rows} streaks")
@@ -0,0 +1,288 @@
+"""
+Persisting daily scores, immediately or through a write-behind buffer.
+
+upsert_score writes one score with a single statement that also keeps the
+summary and streak rows current, then recomputes the affected rollups.
+upsert_scores does the same for many scores of one day.
+
+With SCORE_WRITE_MODE=buffered, /api/scores/update only records the
+per-(user, game, day) maximum in memory; a background task writes the
+buffered maxima every SCORE_FLUSH_INTERVAL_SECONDS in one transaction
+and once more on shutdown. Clients that post a running score many times
+per round then cost one write per flush instead of one per post: one
+multi-row upsert per buffered day plus one rollup refresh. If the
+database rejects a score (e.g. of a user deleted since), the flush is
+redone one user per savepoint and only the rejected users' scores are
+logged and dropped; a flush that fails otherwise is retried with backoff. Scores buffered
+since the last flush are lost if the process dies, so the interval
+bounds the data at risk. Score reads merge the buffered values.
+"""
+import asyncio
+import logging
+from datetime import date, datetime
+from typing import Dict, Optional, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import case, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models import DailyHighscore, UserScoreSummary
+from app.score_rollups import insert_rows, refresh_rollups, refresh_rollups_bulk, streak_upsert
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Longest wait between retries while flushes keep failing
+FLUSH_BACKOFF_MAX_SECONDS = 300.0
+
+# user id -> (game type, date) -> best buffered score
+_buffer: Dict[UUID, Dict[Tuple[str, date], int]] = {}
+_buffered_entries = 0
+# Scores taken by the running flush, still visible to reads until it has written them
+_flushing: Dict[UUID, Dict[Tuple[str, date], int]] = {}
+_flush_requested = asyncio.Event()
+_flush_failures = 0
+
+
+def summary_upsert(scores: Dict[Tuple[UUID, str], int], today: date):
+    """INSERT ... ON CONFLICT statement folding (user, game) scores of a day into the summary rows."""
+    now = datetime.utcnow()
+    stmt = insert_rows(UserScoreSummary, [
+        {
+            "id": uuid4(),
+            "user_id": user_id,
+            "game_type": game_type,
+            "best_score": score,
+            "today_score": score,
+            "today_date": today,
+            "days_played": 1,
+            "last_played_date": today,
+            "updated_at": now,
+        }
+        for (user_id, game_type), score in sorted(scores.items())
+    ])
+    same_day = UserScoreSummary.today_date == stmt.excluded.today_date
+    return stmt.on_conflict_do_update(
+        constraint="uix_user_score_summary_user_game",
+        set_={
+            "best_score": func.greatest(UserScoreSummary.best_score, stmt.excluded.best_score),
+            "today_score": case(
+                (same_day, func.greatest(UserScoreSummary.today_score, stmt.excluded.today_score)),
+                else_=stmt.excluded.today_score
+            ),
+            "today_date": stmt.excluded.today_date,
+            # One daily_highscores row per day: the first score of a new day adds a day
+            "days_played": UserScoreSummary.days_played + case(
+                (UserScoreSummary.last_played_date < stmt.excluded.last_played_date, 1), else_=0
+            ),
+            "last_played_date": func.greatest(UserScoreSummary.last_played_date, stmt.excluded.last_played_date),
+            "updated_at": stmt.excluded.updated_at,
+        }
+    )
+
+
+def _daily_upsert(scores: Dict[Tuple[UUID, str], int], day: date):
+    """INSERT ... ON CONFLICT statement raising (user, game) scores of a day, with the summary and streak CTEs."""
+    now = datetime.utcnow()
+    # One statement for insert-or-raise: concurrent submissions can't lose the
+    # higher score or collide on uix_user_game_date
+    stmt = pg_insert(DailyHighscore).values([
+        {
+            "id": uuid4(),
+            "user_id": user_id,
+            "game_type": game_type,
+            "date": day,
+            "score": score,
+            "updated_at": now,
+        }
+        for (user_id, game_type), score in sorted(scores.items())
+    ])
+    stmt = stmt.on_conflict_do_update(
+        constraint="uix_user_game_date",
+        set_={
+            "score": func.greatest(DailyHighscore.score, stmt.excluded.score),
+            # Only a new high score counts as an update
+            "updated_at": case(
+                (stmt.excluded.score > DailyHighscore.score, stmt.excluded.updated_at),
+                else_=DailyHighscore.updated_at
+            ),
+        }
+    )
+
+    # The summary and streak rows are maintained by data-modifying CTEs of the same statement
+    summary = summary_upsert(scores, day)
+    streak = streak_upsert(sorted({user_id for user_id, _ in scores}), day)
+    return stmt.add_cte(summary.cte("summary_upsert")).add_cte(streak.cte("streak_upsert"))
+
+
+def upsert_score(db: Session, user_id: UUID, game_type: str, score: int, day: date) -> DailyHighscore:
+    """Write a score without committing; returns the resulting daily row."""
+    stmt = _daily_upsert({(user_id, game_type): score}, day).returning(DailyHighscore)
+    row = db.scalars(stmt, execution_options={"populate_existing": True}).one()
+
+    # Rollups aggregate the daily rows, so they are recomputed once the upsert is visible
+    db.execute(refresh_rollups(user_id, day))
+    return row
+
+
+def buffer_score(user_id: UUID, game_type: str, day: date, score: int) -> int:
+    """Keep the best score per (user, game, day) until the next flush; returns the buffered best."""
+    global _buffered_entries
+    scores = _buffer.setdefault(user_id, {})
+    key = (game_type, day)
+    if key not in scores:
+        _buffered_entries += 1
+        scores[key] = score
+        if _buffered_entries >= settings.score_buffer_max_entries:
+            _flush_requested.set()
+    elif score > scores[key]:
+        scores[key] = score
+    return scores[key]
+
+
+def get_buffered_scores(user_id: UUID) -> Dict[Tuple[str, date], int]:
+    """Unflushed best scores of a user, to merge into reads."""
+    scores = dict(_flushing.get(user_id, {}))
+    for key, score in _buffer.get(user_id, {}).items():
+        if score > scores.get(key, -1):
+            scores[key] = score
+    return scores
+
+
+def buffered_best_scores(game_type: str, since: Optional[date] = None) -> Dict[UUID, int]:
+    """Best unflushed score per user of a game on or after `since` (any day if None)."""
+    best: Dict[UUID, int] = {}
+    for buffer in (_flushing, _buffer):
+        for user_id, scores in buffer.items():
+            for (buffered_game, day), score in scores.items():
+                if buffered_game == game_type and (since is None or day >= since) and score > best.get(user_id, -1):
+                    best[user_id] = score
+    return best
+
+
+def _take_buffer() -> Dict[UUID, Dict[Tuple[str, date], int]]:
+    """Swap out the buffered scores (called on the event loop, so no lock is needed)."""
+    global _buffer, _buffered_entries
+    taken = _buffer
+    _buffer = {}
+    _buffered_entries = 0
+    return taken
+
+
+def _restore_buffer(taken: Dict[UUID, Dict[Tuple[str, date], int]]) -> None:
+    """Merge scores of a failed flush back so the next flush retries them.
+
+    Doesn't request an early flush: run_score_flush backs off after a failure.
+    """
+    global _buffered_entries
+    for user_id, taken_scores in taken.items():
+        scores = _buffer.setdefault(user_id, {})
+        for key, score in taken_scores.items():
+            if key not in scores:
+                _buffered_entries += 1
+                scores[key] = score
+            elif score > scores[key]:
+                scores[key] = score
+
+
+def upsert_scores(db: Session, taken: Dict[UUID, Dict[Tuple[str, date], int]]) -> int:
+    """Write many scores without committing: one statement per day, then one rollup refresh.
+
+    Returns the number of scores written.
+    """
+    by_day: Dict[date, Dict[Tuple[UUID, str], int]] = {}
+    for user_id, scores in taken.items():
+        for (game_type, day), score in scores.items():
+            by_day.setdefault(day, {})[(user_id, game_type)] = score
+    if not by_day:
+        return 0
+    # Oldest day first so the summary and streak advance in order
+    for day in sorted(by_day):
+        db.execute(_daily_upsert(by_day[day], day))
+    # Rollups aggregate the daily rows, so they are recomputed once the upserts are visible
+    db.execute(refresh_rollups_bulk({(user_id, day) for day, scores in by_day.items() for user_id, _ in scores}))
+    return sum(len(scores) for scores in by_day.values())
+
+
+def _upsert_each_user(db: Session, taken: Dict[UUID, Dict[Tuple[str, date], int]]) -> int:
+    """Write scores one user per savepoint, dropping the users whose scores are rejected."""
+    written = 0
+    for user_id, scores in taken.items():
+        try:
+            with db.begin_nested():
+                written += upsert_scores(db, {user_id: scores})
+        except (IntegrityError, DataError) as e:
+            # Retrying can't fix these (e.g. the user was deleted since); don't hold up everyone else
+            logger.warning(f"Dropping {len(scores)} buffered score(s) of user {user_id}: {e.orig}")
+    return written
+
+
+def write_buffered_scores(taken: Dict[UUID, Dict[Tuple[str, date], int]]) -> int:
+    """Write buffered scores in a single transaction. Returns the number of scores written.
+
+    Scores the database rejects are dropped per user; any other error
+    rolls back the whole flush and is raised.
+    """
+    db = SessionLocal()
+    try:
+        try:
+            with db.begin_nested():
+                written = upsert_scores(db, taken)
+        except (IntegrityError, DataError):
+            written = _upsert_each_user(db, taken)
+        db.commit()
+        return written
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def flush_score_buffer() -> int:
+    """Write buffered scores without blocking the event loop."""
+    global _flush_failures, _flushing
+    taken = _take_buffer()
+    if not taken:
+        return 0
+    _flushing = taken
+    try:
+        written = await asyncio.to_thread(write_buffered_scores, taken)
+    except Exception as e:
+        _flush_failures += 1
+        logger.warning(f"Could not flush buffered scores (attempt {_flush_failures}), retrying later: {e}")
+        _restore_buffer(taken)
+        return 0
+    finally:
+        _flushing = {}
+    _flush_failures = 0
+    return written
+
+
+def _retry_delay() -> float:
+    """Wait before retrying a failed flush, doubling with every consecutive failure."""
+    delay = settings.score_flush_interval_seconds * 2 ** min(_flush_failures, 16)
+    return min(delay, FLUSH_BACKOFF_MAX_SECONDS)
+
+
+async def run_score_flush() -> None:
+    """Background loop: flush buffered scores periodically or when the buffer is full."""
+    try:
+        while True:
+            if _flush_failures:
+                # Don't let a full buffer trigger immediate retries while the database is failing
+                await asyncio.sleep(_retry_delay())
+            else:
+                try:
+                    await asyncio.wait_for(_flush_requested.wait(), timeout=settings.score_flush_interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+            _flush_requested.clear()
+            await flush_score_buffer()
+    finally:
+        # Persist whatever was buffered since the last flush on shutdown
+        await flush_score_buffer()
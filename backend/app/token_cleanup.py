@@ -0,0 +1,99 @@
+"""
+Periodic cleanup of expired MFA codes, verification tokens and invitations.
+
+Expired rows are deleted in bounded batches (a DELETE over a LIMITed id
+subquery, served by the expires_at indexes), each in its own short
+transaction, so cleanup never holds long locks or blocks startup. A
+Postgres advisory lock makes sure only one worker runs a pass at a time.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import delete, select, func
+from sqlalchemy.engine import Connection
+
+from app.config import get_settings
+from app.database import engine
+from app.models import MFACode, EmailVerificationToken, Invitation
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Arbitrary application-wide key for pg_try_advisory_lock
+CLEANUP_LOCK_KEY = 4206901
+
+# Metrics of the last pass run by this worker
+_last_run: Dict[str, object] = {}
+
+
+def _expired_conditions(now: datetime) -> Dict[str, tuple]:
+    return {
+        "mfa_codes": (MFACode, MFACode.expires_at < now),
+        "verification_tokens": (EmailVerificationToken, EmailVerificationToken.expires_at < now),
+        # Accepted invitations are kept as a record of who joined through whom
+        "invitations": (Invitation, (Invitation.expires_at < now) & (Invitation.accepted == False)),
+    }
+
+
+def delete_in_batches(conn: Connection, model, condition, batch_size: int) -> int:
+    """Delete rows matching condition, at most batch_size per transaction."""
+    deleted = 0
+    while True:
+        batch = select(model.id).where(condition).limit(batch_size).scalar_subquery()
+        result = conn.execute(delete(model).where(model.id.in_(batch)))
+        conn.commit()
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
+
+
+def run_token_cleanup() -> Optional[Dict[str, object]]:
+    """Run one cleanup pass. Returns its metrics, or None if another worker holds the lock."""
+    started = time.monotonic()
+    with engine.connect() as conn:
+        # Session-level lock: held across the per-batch commits on this connection
+        locked = conn.execute(select(func.pg_try_advisory_lock(CLEANUP_LOCK_KEY))).scalar()
+        conn.commit()
+        if not locked:
+            logger.debug("Token cleanup already running in another worker, skipping")
+            return None
+        try:
+            deleted = {}
+            for name, (model, condition) in _expired_conditions(datetime.utcnow()).items():
+                deleted[name] = delete_in_batches(conn, model, condition, settings.token_cleanup_batch_size)
+        finally:
+            conn.rollback()
+            conn.execute(select(func.pg_advisory_unlock(CLEANUP_LOCK_KEY)))
+            conn.commit()
+
+    metrics = {
+        "finished_at": datetime.utcnow(),
+        "duration_ms": int((time.monotonic() - started) * 1000),
+        "deleted": deleted,
+    }
+    _last_run.clear()
+    _last_run.update(metrics)
+    if any(deleted.values()):
+        logger.info(
+            f"Cleaned up {deleted['mfa_codes']} expired MFA codes, {deleted['verification_tokens']} expired "
+            f"verification tokens, and {deleted['invitations']} expired invitations in {metrics['duration_ms']} ms"
+        )
+    return metrics
+
+
+def get_cleanup_stats() -> Dict[str, object]:
+    """Metrics of the last cleanup pass run by this worker."""
+    return dict(_last_run)
+
+
+async def run_token_cleanup_loop() -> None:
+    """Background loop: run a cleanup pass right away, then every interval."""
+    while True:
+        try:
+            await asyncio.to_thread(run_token_cleanup)
+        except Exception as e:
+            logger.warning(f"Could not cleanup expired tokens: {e}")
+        await asyncio.sleep(settings.token_cleanup_interval_seconds)
@@ -0,0 +1,87 @@
+import io
+import logging
+import threading
+import time
+
+from app import audit_logger
+from app.audit_logger import AuditDatabaseHandler, BatchedStreamHandler, _stored_ip
+
+
+class FakeSession:
+    """Records inserted rows; fails any statement containing a row with a too long IP."""
+
+    def __init__(self, stored: list):
+        self.stored = stored
+        self._pending = []
+
+    def execute(self, statement, rows):
+        if any(len(row["ip_address"] or "") > 45 for row in rows):
+            raise ValueError("value too long for type character varying(45)")
+        self._pending.extend(rows)
+
+    def commit(self):
+        self.stored.extend(self._pending)
+        self._pending = []
+
+    def rollback(self):
+        self._pending = []
+
+    def close(self):
+        pass
+
+
+def _record(event: str, ip: str) -> logging.LogRecord:
+    record = logging.LogRecord("audit", logging.INFO, __file__, 0, event, None, None)
+    record.audit_record = {"event": event, "success": True, "ip_address": ip}
+    return record
+
+
+def test_stored_ip_is_normalized_or_truncated():
+    assert _stored_ip("2001:0db8:0000:0000:0000:0000:0000:0001") == "2001:db8::1"
+    assert _stored_ip("10.0.0.1") == "10.0.0.1"
+    assert _stored_ip("x" * 500) == "x" * 45
+    assert _stored_ip(None) is None
+
+
+def test_one_bad_row_does_not_drop_the_batch(monkeypatch):
+    stored = []
+    monkeypatch.setattr(audit_logger, "SessionLocal", lambda: FakeSession(stored))
+    handler = AuditDatabaseHandler()
+    handler.emit(_record("LOGIN_SUCCESS", "10.0.0.1"))
+    handler.emit(_record("LOGIN_FAILED", "x" * 500))
+    handler.emit(_record("LOGOUT", "10.0.0.2"))
+
+    handler.flush_batch()
+
+    assert [row["event"] for row in stored] == ["LOGIN_SUCCESS", "LOGOUT"]
+    assert handler.inserted == 2
+    assert handler.failed == 1
+
+
+def test_slow_database_does_not_hold_up_log_sinks(monkeypatch):
+    release = threading.Event()
+    stored = []
+
+    class SlowSession(FakeSession):
+        def commit(self):
+            release.wait(timeout=5)
+            super().commit()
+
+    lines = io.StringIO()
+    monkeypatch.setattr(audit_logger, "SessionLocal", lambda: SlowSession(stored))
+    monkeypatch.setattr(audit_logger, "_build_sinks", lambda: [BatchedStreamHandler(lines)])
+    monkeypatch.setattr(audit_logger.settings, "audit_log_database", True)
+    audit_logger.start_audit_logging()
+    try:
+        for i in range(3):
+            audit_logger.audit_logger.handle(_record(f"EVENT_{i}", "10.0.0.1"))
+        deadline = time.monotonic() + 5
+        while lines.getvalue().count("\n") < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        # The log sink got every event while the database insert is still blocked
+        assert lines.getvalue().count("\n") == 3
+        assert stored == []
+    finally:
+        release.set()
+        audit_logger.stop_audit_logging()
+    assert len(stored) == 3
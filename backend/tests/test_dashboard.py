@@ -0,0 +1,115 @@
+import asyncio
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from app import score_writes
+from app.auth import Principal
+from app.schemas import SettingUpdate
+from app.routers import dashboard
+from app.routers import settings as settings_router
+
+
+class FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def select_from(self, *args):
+        return self
+
+    def outerjoin(self, *args):
+        return self
+
+    def filter(self, *args):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def query(self, *columns):
+        return FakeQuery(self.rows)
+
+
+def _row(selected_tags=None, game_type=None, today_score=None, today_date=None, best_score=None):
+    return SimpleNamespace(
+        selected_tags=selected_tags, game_type=game_type,
+        today_score=today_score, today_date=today_date, best_score=best_score,
+    )
+
+
+def _principal():
+    return Principal(
+        id=uuid4(), username="alice", email="alice@example.com", is_email_verified=True,
+        mfa_enabled=False, is_admin=False, created_at=datetime.utcnow(), token_version=0,
+    )
+
+
+@pytest.fixture(autouse=True)
+def shared_data(monkeypatch):
+    site_settings = {"salad_time_limit": "120"}
+    monkeypatch.setattr(dashboard, "_shared_cache", None)
+    monkeypatch.setattr(settings_router, "_settings_cache", None)
+    monkeypatch.setattr(dashboard, "load_tags", lambda db: ["jlpt5"])
+    monkeypatch.setattr(settings_router, "load_settings", lambda db: dict(site_settings))
+    monkeypatch.setattr(score_writes, "_buffer", {})
+    return site_settings
+
+
+def test_user_without_preferences_or_scores():
+    # The outer joins yield one row of NULLs
+    response = asyncio.run(dashboard.get_dashboard(_principal(), FakeSession([_row()])))
+
+    assert response.preferences.selected_tags == []
+    assert response.today.model_dump() == response.best.model_dump()
+    assert not any(response.best.model_dump().values())
+    assert response.tags == ["jlpt5"]
+
+
+def test_today_only_counts_todays_summaries():
+    today = date.today()
+    rows = [
+        _row("jlpt5,jlpt4", "quiz", today_score=30, today_date=today, best_score=80),
+        _row("jlpt5,jlpt4", "salad", today_score=50, today_date=today - timedelta(days=1), best_score=60),
+    ]
+
+    response = asyncio.run(dashboard.get_dashboard(_principal(), FakeSession(rows)))
+
+    assert response.preferences.selected_tags == ["jlpt5", "jlpt4"]
+    assert response.today.quiz == 30
+    assert response.today.salad == 0
+    assert (response.best.quiz, response.best.salad) == (80, 60)
+
+
+def test_setting_update_clears_the_cached_settings(shared_data):
+    db = FakeSession([_row()])
+    assert asyncio.run(dashboard.get_dashboard(_principal(), db)).settings == {"salad_time_limit": "120"}
+    shared_data["salad_time_limit"] = "90"
+    # Still cached
+    assert asyncio.run(dashboard.get_dashboard(_principal(), db)).settings["salad_time_limit"] == "120"
+
+    class SettingsSession:
+        def query(self, model):
+            return self
+
+        def filter(self, *args):
+            return self
+
+        def first(self):
+            return SimpleNamespace(key="salad_time_limit", value="120")
+
+        def commit(self):
+            pass
+
+        def refresh(self, instance):
+            pass
+
+    asyncio.run(settings_router.update_setting("salad_time_limit", SettingUpdate(value="90"), SettingsSession(), _principal()))
+
+    assert asyncio.run(dashboard.get_dashboard(_principal(), db)).settings["salad_time_limit"] == "90"
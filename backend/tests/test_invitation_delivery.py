@@ -0,0 +1,42 @@
+import asyncio
+import logging
+
+from app import email_service
+from app.routers import admin
+
+
+def test_bulk_results_are_recorded_per_invitation(monkeypatch):
+    stored = []
+
+    async def fake_send(invitations, inviter_name, frontend_url):
+        return {"a@example.com": True, "b@example.com": False}
+
+    monkeypatch.setattr(admin, "send_invitation_emails_bulk", fake_send)
+    monkeypatch.setattr(admin, "_store_invitation_email_status", stored.append)
+
+    asyncio.run(admin._send_bulk_invitations(
+        [("a@example.com", "token-a"), ("b@example.com", "token-b"), ("c@example.com", "token-c")],
+        "admin",
+        "http://localhost:3000",
+    ))
+
+    # c@example.com never got a result (e.g. the batch was abandoned)
+    assert stored == [{"token-a": True, "token-b": False, "token-c": False}]
+
+
+def test_failed_bulk_addresses_are_logged(monkeypatch, caplog):
+    monkeypatch.setattr(email_service.settings, "smtp_host", "smtp.example.com")
+    monkeypatch.setattr(
+        email_service.mail_service,
+        "send_batch_blocking",
+        lambda mails: {mail.recipient: mail.recipient != "b@example.com" for mail in mails},
+    )
+
+    with caplog.at_level(logging.WARNING, logger="app.email_service"):
+        results = asyncio.run(email_service.send_invitation_emails_bulk(
+            [("a@example.com", "token-a"), ("b@example.com", "token-b")], "admin"
+        ))
+
+    assert results == {"a@example.com": True, "b@example.com": False}
+    assert "b@example.com" in caplog.text
+    assert "a@example.com" not in caplog.text
@@ -0,0 +1,93 @@
+import asyncio
+from datetime import date, timedelta
+from uuid import uuid4
+
+import pytest
+
+from app import leaderboard, score_writes
+from app.leaderboard import LeaderboardEntry, TopN, period_start
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(leaderboard, "_boards", {})
+    monkeypatch.setattr(leaderboard, "_ranks", {})
+    monkeypatch.setattr(score_writes, "_buffer", {})
+    monkeypatch.setattr(score_writes, "_buffered_entries", 0)
+
+
+def _ranked(board):
+    return [(rank, entry.username, entry.score) for rank, entry in board.ranked()]
+
+
+def test_reseed_keeps_unflushed_higher_scores(monkeypatch):
+    alice, bob, carol = uuid4(), uuid4(), uuid4()
+    monkeypatch.setattr(leaderboard.settings, "leaderboard_size", 2)
+    stored = [LeaderboardEntry(alice, "alice", 50), LeaderboardEntry(bob, "bob", 40)]
+    monkeypatch.setattr(leaderboard, "load_top_scores", lambda game_type, starts, size: list(stored))
+    monkeypatch.setattr(leaderboard, "load_usernames", lambda user_ids: {bob: "bob", carol: "carol"})
+
+    asyncio.run(leaderboard.get_leaderboard("quiz", "day"))
+    # Buffered: not written to daily_highscores yet
+    for user_id, username, score in ((bob, "bob", 70), (carol, "carol", 60)):
+        score_writes.buffer_score(user_id, "quiz", date.today(), score)
+        leaderboard.record_score(user_id, username, "quiz", score)
+
+    board = asyncio.run(leaderboard._seed("quiz", "day"))
+
+    assert _ranked(board) == [(1, "bob", 70), (2, "carol", 60)]
+
+
+def test_reseed_drops_entries_gone_from_the_database(monkeypatch):
+    alice, bob = uuid4(), uuid4()
+    stored = [LeaderboardEntry(alice, "alice", 50), LeaderboardEntry(bob, "bob", 40)]
+    monkeypatch.setattr(leaderboard, "load_top_scores", lambda game_type, starts, size: list(stored))
+
+    for period in ("day", "all"):
+        asyncio.run(leaderboard.get_leaderboard("quiz", period))
+    # Alice is deleted, Bob renamed
+    stored[:] = [LeaderboardEntry(bob, "robert", 40)]
+
+    for period in ("day", "all"):
+        board = asyncio.run(leaderboard._seed("quiz", period))
+        assert _ranked(board) == [(1, "robert", 40)]
+
+
+def test_buffered_scores_of_deleted_users_stay_off_the_board(monkeypatch):
+    deleted = uuid4()
+    monkeypatch.setattr(leaderboard, "load_top_scores", lambda game_type, starts, size: [])
+    monkeypatch.setattr(leaderboard, "load_usernames", lambda user_ids: {})
+    score_writes.buffer_score(deleted, "quiz", date.today(), 80)
+
+    board = asyncio.run(leaderboard._seed("quiz", "day"))
+
+    assert board.ranked() == []
+
+
+def test_reseed_of_a_new_period_drops_old_scores(monkeypatch):
+    user = uuid4()
+    monkeypatch.setattr(leaderboard, "_boards", {
+        ("quiz", "day"): TopN(10, period_start("day") - timedelta(days=1), [LeaderboardEntry(user, "old", 99)])
+    })
+    monkeypatch.setattr(leaderboard, "load_top_scores", lambda game_type, starts, size: [])
+
+    board = asyncio.run(leaderboard._seed("quiz", "day"))
+
+    assert board.ranked() == []
+
+
+def test_daily_ranks_reseed_drops_removed_users_and_keeps_buffered_scores(monkeypatch):
+    alice, bob, carol = uuid4(), uuid4(), uuid4()
+    stored = {alice: 50, bob: 40}
+    monkeypatch.setattr(leaderboard, "load_day_scores", lambda game_type, day: dict(stored))
+
+    asyncio.run(leaderboard.get_daily_ranks("quiz"))
+    del stored[alice]
+    score_writes.buffer_score(carol, "quiz", date.today(), 60)
+
+    ranks = asyncio.run(leaderboard._seed_ranks("quiz"))
+
+    assert ranks.score(alice) is None
+    assert len(ranks) == 2
+    assert ranks.rank(ranks.score(carol)) == 1
+    assert ranks.rank(ranks.score(bob)) == 2
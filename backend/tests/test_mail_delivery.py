@@ -0,0 +1,90 @@
+import smtplib
+import threading
+from email.message import EmailMessage
+
+from app import mail_delivery
+from app.mail_delivery import MailDeliveryService, OutgoingMail
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def _mails(count):
+    return [OutgoingMail(f"user{i}@example.com", EmailMessage(), "invitation email") for i in range(count)]
+
+
+def _service():
+    return MailDeliveryService(pool_size=1, queue_size=10, max_attempts=3, backoff_seconds=1.0)
+
+
+def _patch(monkeypatch, send):
+    clock = FakeClock()
+    monkeypatch.setattr(mail_delivery.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(mail_delivery.time, "sleep", clock.sleep)
+    monkeypatch.setattr(mail_delivery.SMTPConnection, "send", lambda self, mail: send(clock, mail))
+    return clock
+
+
+def test_unreachable_server_abandons_the_batch(monkeypatch):
+    calls = []
+
+    def send(clock, mail):
+        calls.append(mail.recipient)
+        clock.now += 10  # Connect timeout
+        raise ConnectionRefusedError("Connection refused")
+
+    _patch(monkeypatch, send)
+    service = _service()
+    results = service.send_batch_blocking(_mails(50))
+
+    assert calls == ["user0@example.com"] * 3
+    assert len(results) == 50
+    assert not any(results.values())
+    assert service.metrics.failed == 50
+
+
+def test_rejected_recipient_does_not_stop_the_batch(monkeypatch):
+    def send(clock, mail):
+        if mail.recipient == "user1@example.com":
+            raise smtplib.SMTPRecipientsRefused({mail.recipient: (550, b"No such user")})
+
+    _patch(monkeypatch, send)
+    results = _service().send_batch_blocking(_mails(3))
+
+    assert results == {"user0@example.com": True, "user1@example.com": False, "user2@example.com": True}
+
+
+def test_batch_time_is_capped(monkeypatch):
+    monkeypatch.setattr(mail_delivery.settings, "smtp_batch_max_seconds", 60.0)
+
+    def send(clock, mail):
+        clock.now += 25  # Slow but working server
+
+    _patch(monkeypatch, send)
+    results = _service().send_batch_blocking(_mails(10))
+
+    assert list(results.values()) == [True, True, True] + [False] * 7
+
+
+def test_metrics_count_concurrent_increments():
+    metrics = mail_delivery.MailMetrics()
+
+    def send_many():
+        for _ in range(10000):
+            metrics.increment("sent")
+
+    threads = [threading.Thread(target=send_many) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert metrics.as_dict()["sent"] == 80000
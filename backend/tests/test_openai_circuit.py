@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from app import openai_client
+from app.openai_client import CircuitBreaker, call_openai
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    monkeypatch.setattr(openai_client, "_circuit_breaker", breaker)
+    monkeypatch.setattr(openai_client, "_semaphores", {})
+    return breaker
+
+
+def _open(breaker: CircuitBreaker) -> None:
+    breaker.record_failure()
+    assert breaker.state == "half_open"  # reset_seconds=0: the next call is a trial
+
+
+def test_cancelled_half_open_trial_releases_the_slot(breaker):
+    _open(breaker)
+
+    async def scenario():
+        started = asyncio.Event()
+
+        async def slow_call():
+            started.set()
+            await asyncio.sleep(60)
+
+        task = asyncio.create_task(call_openai("hint", 120, slow_call))
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+
+    # Abandoned trial: no success or failure recorded, and a new trial is allowed
+    assert breaker.state == "half_open"
+    assert breaker.allow_request()
+
+
+def test_abandoned_stream_releases_the_trial(breaker):
+    _open(breaker)
+
+    async def stream():
+        async with openai_client._openai_slot("hint"):
+            yield "token"
+            yield "token"
+
+    async def scenario():
+        tokens = stream()
+        await tokens.__anext__()
+        await tokens.aclose()  # client disconnected after the first token
+
+    asyncio.run(scenario())
+
+    assert breaker.allow_request()
+
+
+def test_trial_outcome_closes_or_reopens_the_circuit(breaker):
+    _open(breaker)
+
+    async def ok():
+        return "hint"
+
+    assert asyncio.run(call_openai("hint", 5, ok)) == "hint"
+    assert breaker.state == "closed"
+
+    async def failing():
+        raise RuntimeError("upstream error")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(call_openai("hint", 5, failing))
+    assert breaker.opened_at is not None
@@ -0,0 +1,61 @@
+import pytest
+
+from app import rate_limit_storage
+from app.rate_limit_storage import SWEEP_INTERVAL_SECONDS, SharedMemoryStorage
+
+
+class FakeClock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock(1_000_000.0)
+    monkeypatch.setattr(rate_limit_storage.time, "time", clock.time)
+    return clock
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return SharedMemoryStorage(f"shm://{tmp_path / 'ratelimit.db'}")
+
+
+def _keys(storage: SharedMemoryStorage):
+    return [row[0] for row in storage._connection().execute("SELECT key FROM counters ORDER BY key")]
+
+
+def test_old_sliding_windows_are_evicted(storage, clock):
+    for _ in range(5):
+        assert storage.acquire_sliding_window_entry("login/1.2.3.4", limit=10, expiry=60)
+        clock.now += SWEEP_INTERVAL_SECONDS + 60
+
+    # Only the windows still needed as "current" or "previous" survive
+    assert len(_keys(storage)) == 1
+
+
+def test_expired_keys_of_clients_that_never_return_are_evicted(storage, clock):
+    for client in range(20):
+        storage.incr(f"hint/10.0.0.{client}", expiry=60)
+    assert len(_keys(storage)) == 20
+
+    clock.now += SWEEP_INTERVAL_SECONDS + 61
+    storage.incr("hint/10.0.0.99", expiry=60)
+
+    assert _keys(storage) == ["hint/10.0.0.99"]
+
+
+def test_sweep_is_throttled_and_keeps_live_counters(storage, clock):
+    storage.incr("a", expiry=10)
+    clock.now += 11
+    # Within the sweep interval: the expired key is not swept yet
+    storage.incr("b", expiry=600)
+    assert _keys(storage) == ["a", "b"]
+
+    clock.now += SWEEP_INTERVAL_SECONDS
+    storage.incr("b", expiry=600)
+    assert _keys(storage) == ["b"]
+    assert storage.get("b") == 2
@@ -0,0 +1,138 @@
+import asyncio
+from contextlib import contextmanager
+from datetime import date, timedelta
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app import score_writes
+
+
+class FakeSession:
+    """Keeps written scores per savepoint; commit() makes them visible in `stored`."""
+
+    def __init__(self, stored: list, failing_users=(), broken: bool = False):
+        self.stored = stored
+        self.failing_users = set(failing_users)
+        self.broken = broken
+        self.pending = []
+        self.statements = 0
+
+    @contextmanager
+    def begin_nested(self):
+        mark = len(self.pending)
+        try:
+            yield
+        except Exception:
+            del self.pending[mark:]
+            raise
+
+    def upsert(self, taken):
+        """Stands in for upsert_scores: all of `taken` in one statement."""
+        self.statements += 1
+        if self.broken:
+            raise OperationalError("INSERT", {}, Exception("server closed the connection unexpectedly"))
+        if self.failing_users & set(taken):
+            raise IntegrityError("INSERT", {}, Exception("violates foreign key constraint"))
+        for user_id, scores in taken.items():
+            for (game_type, day), score in scores.items():
+                self.pending.append((user_id, game_type, day, score))
+        return sum(len(scores) for scores in taken.values())
+
+    def commit(self):
+        self.stored.extend(self.pending)
+        self.pending = []
+
+    def rollback(self):
+        self.pending = []
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fresh_buffer(monkeypatch):
+    monkeypatch.setattr(score_writes, "_buffer", {})
+    monkeypatch.setattr(score_writes, "_buffered_entries", 0)
+    monkeypatch.setattr(score_writes, "_flush_failures", 0)
+    monkeypatch.setattr(score_writes, "_flush_requested", asyncio.Event())
+
+
+def _use_session(monkeypatch, session):
+    monkeypatch.setattr(score_writes, "SessionLocal", lambda: session)
+    monkeypatch.setattr(score_writes, "upsert_scores", lambda db, taken: db.upsert(taken))
+
+
+def test_flush_writes_all_users_at_once(monkeypatch, fresh_buffer):
+    users = [uuid4() for _ in range(5)]
+    stored = []
+    session = FakeSession(stored)
+    _use_session(monkeypatch, session)
+    for user_id in users:
+        score_writes.buffer_score(user_id, "quiz", date.today(), 10)
+
+    assert asyncio.run(score_writes.flush_score_buffer()) == 5
+    assert session.statements == 1
+    assert len(stored) == 5
+
+
+def test_rejected_user_is_dropped_and_the_rest_is_written(monkeypatch, fresh_buffer):
+    alive, deleted = uuid4(), uuid4()
+    stored = []
+    session = FakeSession(stored, failing_users=[deleted])
+    _use_session(monkeypatch, session)
+    today = date.today()
+    score_writes.buffer_score(alive, "quiz", today, 10)
+    score_writes.buffer_score(deleted, "quiz", today, 20)
+
+    written = asyncio.run(score_writes.flush_score_buffer())
+
+    assert written == 1
+    assert stored == [(alive, "quiz", today, 10)]
+    # The batch, then one savepoint per user
+    assert session.statements == 3
+    # The rejected score is not retried
+    assert score_writes._buffer == {}
+    assert score_writes._flush_failures == 0
+
+
+def test_failed_flush_is_restored_and_backs_off(monkeypatch, fresh_buffer):
+    monkeypatch.setattr(score_writes.settings, "score_buffer_max_entries", 1)
+    user = uuid4()
+    stored = []
+    _use_session(monkeypatch, FakeSession(stored, broken=True))
+    score_writes.buffer_score(user, "quiz", date.today(), 10)
+    score_writes._flush_requested.clear()
+
+    assert asyncio.run(score_writes.flush_score_buffer()) == 0
+    first_delay = score_writes._retry_delay()
+    asyncio.run(score_writes.flush_score_buffer())
+
+    assert stored == []
+    assert score_writes.get_buffered_scores(user) == {("quiz", date.today()): 10}
+    # Restoring a full buffer doesn't request another flush right away
+    assert not score_writes._flush_requested.is_set()
+    assert score_writes._retry_delay() == 2 * first_delay > score_writes.settings.score_flush_interval_seconds
+
+
+def test_upsert_scores_uses_one_statement_per_day_and_one_rollup_refresh():
+    class RecordingSession:
+        def __init__(self):
+            self.statements = []
+
+        def execute(self, statement):
+            self.statements.append(statement)
+
+    today = date.today()
+    yesterday = today - timedelta(days=1)
+    db = RecordingSession()
+    written = score_writes.upsert_scores(db, {
+        uuid4(): {("quiz", yesterday): 5, ("quiz", today): 7, ("memory", today): 3},
+        uuid4(): {("quiz", today): 9},
+    })
+
+    assert written == 4
+    assert len(db.statements) == 3
+    tables = [statement.table.name for statement in db.statements]
+    assert tables == ["daily_highscores", "daily_highscores", "user_score_rollups"]
@@ -19,6 +19,12 @@ import {
   Square
 } from 'lucide-react';
 
+function formatBytes(bytes: number): string {
+  if (bytes < 1024) return `${bytes} B`;
+  if (bytes < 1024 * 1024) return `${(bytes / 1024).toFixed(1)} KB`;
+  return `${(bytes / (1024 * 1024)).toFixed(1)} MB`;
+}
+
 export default function AdminCachePage() {
   const router = useRouter();
   const [isLoading, setIsLoading] = useState(true);
@@ -26,6 +32,8 @@ export default function AdminCachePage() {
   const [stats, setStats] = useState<CacheStats | null>(null);
   const [hints, setHints] = useState<HintCacheItem[]>([]);
   const [ttsItems, setTTSItems] = useState<TTSCacheItem[]>([]);
+  const [hintsCursor, setHintsCursor] = useState<string | null>(null);
+  const [ttsCursor, setTTSCursor] = useState<string | null>(null);
   const [editingHint, setEditingHint] = useState<string | null>(null);
   const [editValue, setEditValue] = useState('');
   const [message, setMessage] = useState<{ type: 'success' | 'error'; text: string } | null>(null);
@@ -67,13 +75,37 @@ export default function AdminCachePage() {
       ]);
       setStats(statsData);
       setHints(hintsData.items);
+      setHintsCursor(hintsData.next_cursor);
       setTTSItems(ttsData.items);
+      setTTSCursor(ttsData.next_cursor);
     } catch (err) {
       console.error('Failed to load cache data:', err);
       setMessage({ type: 'error', text: 'Failed to load cache data' });
     }
   };
 
+  const loadMoreHints = async () => {
+    if (!hintsCursor) return;
+    try {
+      const data = await adminAPI.getHintCache({ cursor: hintsCursor });
+      setHints([...hints, ...data.items]);
+      setHintsCursor(data.next_cursor);
+    } catch (err) {
+      setMessage({ type: 'error', text: 'Failed to load more hints' });
+    }
+  };
+
+  const loadMoreTTS = async () => {
+    if (!ttsCursor) return;
+    try {
+      const data = await adminAPI.getTTSCache({ cursor: ttsCursor });
+      setTTSItems([...ttsItems, ...data.items]);
+      setTTSCursor(data.next_cursor);
+    } catch (err) {
+      setMessage({ type: 'error', text: 'Failed to load more TTS entries' });
+    }
+  };
+
   const handleLogout = () => {
     removeToken();
     router.push('/');
@@ -216,6 +248,9 @@ export default function AdminCachePage() {
                 <div>
                   <p className="text-2xl font-bold text-nihongo-text">{stats.hint_count}</p>
                   <p className="text-sm text-nihongo-text-muted">Cached Hints</p>
+                  <p className="text-xs text-nihongo-text-muted">
+                    {formatBytes(stats.hint_bytes)} · {(stats.hint_hit_ratio * 100).toFixed(1)}% hit ratio
+                  </p>
                 </div>
               </div>
               <div className="card flex items-center gap-4">
@@ -225,6 +260,11 @@ export default function AdminCachePage() {
                 <div>
                   <p className="text-2xl font-bold text-nihongo-text">{stats.tts_count}</p>
                   <p className="text-sm text-nihongo-text-muted">Cached TTS</p>
+                  <p className="text-xs text-nihongo-text-muted">
+                    {formatBytes(stats.tts_bytes)}
+                    {stats.tts_max_bytes > 0 && ` of ${formatBytes(stats.tts_max_bytes)} (${stats.eviction_policy.toUpperCase()})`}
+                    {' · '}{(stats.tts_hit_ratio * 100).toFixed(1)}% hit ratio
+                  </p>
                 </div>
               </div>
             </div>
@@ -355,6 +395,11 @@ export default function AdminCachePage() {
                       </p>
                     </div>
                   ))}
+                  {hintsCursor && (
+                    <button onClick={loadMoreHints} className="btn btn-secondary w-full">
+                      Load more
+                    </button>
+                  )}
                 </div>
               )}
             </div>
@@ -424,6 +469,11 @@ export default function AdminCachePage() {
                       ))}
                     </tbody>
                   </table>
+                  {ttsCursor && (
+                    <button onClick={loadMoreTTS} className="btn btn-secondary w-full mt-4">
+                      Load more
+                    </button>
+                  )}
                 </div>
               )}
             </div>
@@ -126,6 +126,9 @@ export default function AdminInvitationsPage() {
     if (isExpired(invitation.expires_at)) {
       return { label: 'Expired', color: 'red', icon: XCircle };
     }
+    if (invitation.email_status === 'failed') {
+      return { label: 'Email failed', color: 'red', icon: XCircle };
+    }
     return { label: 'Pending', color: 'amber', icon: Clock };
   };
 
@@ -20,7 +20,7 @@ import {
   Tag,
   Grid3X3
 } from 'lucide-react';
-import { authAPI, scoresAPI, userPreferencesAPI, TodayScores } from '@/lib/api';
+import { dashboardAPI, scoresAPI, userPreferencesAPI, TodayScores } from '@/lib/api';
 import { getToken, removeToken } from '@/lib/auth';
 import AppFooter from '@/components/AppFooter';
 
@@ -33,7 +33,7 @@ interface UserInfo {
 }
 
 interface ScoreHistory {
-  id: string;
+  id: string | null;
   game_type: string;
   date: string;
   score: number;
@@ -71,6 +71,7 @@ export default function ProfilePage() {
   const [isLoading, setIsLoading] = useState(true);
   const [activeTab, setActiveTab] = useState<TabType>('highscores');
   const [selectedTags, setSelectedTags] = useState<string[]>([]);
+  const [availableTags, setAvailableTags] = useState<string[]>([]);
   const [isSavingTags, setIsSavingTags] = useState(false);
 
   useEffect(() => {
@@ -85,19 +86,17 @@ export default function ProfilePage() {
 
   const loadData = async () => {
     try {
-      const [userInfo, today, best, history, preferences] = await Promise.all([
-        authAPI.getCurrentUser(),
-        scoresAPI.getTodayScores(),
-        scoresAPI.getBestScores(),
+      const [dashboard, history] = await Promise.all([
+        dashboardAPI.get(),
         scoresAPI.getMyScores(),
-        userPreferencesAPI.get(),
       ]);
       
-      setUser(userInfo);
-      setTodayScores(today);
-      setBestScores(best);
+      setUser(dashboard.user);
+      setTodayScores(dashboard.today);
+      setBestScores(dashboard.best);
       setScoreHistory(history.scores || []);
-      setSelectedTags(preferences.selected_tags || []);
+      setSelectedTags(dashboard.preferences.selected_tags || []);
+      setAvailableTags(dashboard.tags);
     } catch (err) {
       console.error('Failed to load profile data:', err);
       // If unauthorized, redirect to login
@@ -305,7 +304,7 @@ export default function ProfilePage() {
                         
                         return (
                           <div 
-                            key={score.id} 
+                            key={`${score.game_type}-${score.date}`} 
                             className="flex items-center justify-between py-3 border-b border-nihongo-border last:border-0"
                           >
                             <div className="flex items-center gap-4">
@@ -365,6 +364,7 @@ export default function ProfilePage() {
                   <TagFilter
                     selectedTags={selectedTags}
                     onTagsChange={handleTagsChange}
+                    tags={availableTags}
                   />
                 </div>
                 
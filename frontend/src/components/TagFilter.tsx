@@ -7,15 +7,21 @@ import { Tag, X } from 'lucide-react';
 interface TagFilterProps {
   selectedTags: string[];
   onTagsChange: (tags: string[]) => void;
+  tags?: string[]; // Already loaded tags; fetched when omitted
 }
 
-export default function TagFilter({ selectedTags, onTagsChange }: TagFilterProps) {
-  const [availableTags, setAvailableTags] = useState<string[]>([]);
-  const [isLoading, setIsLoading] = useState(true);
+export default function TagFilter({ selectedTags, onTagsChange, tags }: TagFilterProps) {
+  const [availableTags, setAvailableTags] = useState<string[]>(tags || []);
+  const [isLoading, setIsLoading] = useState(!tags);
 
   useEffect(() => {
-    loadTags();
-  }, []);
+    if (tags) {
+      setAvailableTags(tags);
+      setIsLoading(false);
+    } else {
+      loadTags();
+    }
+  }, [tags]);
 
   const loadTags = async () => {
     try {
@@ -108,7 +108,9 @@ export function useQuizState(selectedTags: string[] = []): UseQuizStateReturn {
 
     setIsLoadingHint(true);
     try {
-      const response = await quizAPI.getHint(question.vocabulary_id, question.mode);
+      const response = typeof EventSource !== 'undefined'
+        ? await quizAPI.streamHint(question.vocabulary_id, question.mode, setHint)
+        : await quizAPI.getHint(question.vocabulary_id, question.mode);
       setHint(response.hint);
       setHintUsed(true);
     } catch (err) {
@@ -6,6 +6,35 @@ function getStoredToken(): string | null {
   return localStorage.getItem('nihongowow_token');
 }
 
+function authHeaders(): Record<string, string> {
+  const token = getStoredToken();
+  return token ? { Authorization: `Bearer ${token}` } : {};
+}
+
+// Reads a Server-Sent Events response, calling onEvent for each event until the stream ends
+async function readEventStream(response: Response, onEvent: (event: string, data: string) => void): Promise<void> {
+  if (!response.body) return;
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = '';
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) return;
+    buffer += value;
+    let end;
+    while ((end = buffer.indexOf('\n\n')) !== -1) {
+      const message = buffer.slice(0, end);
+      buffer = buffer.slice(end + 2);
+      let event = 'message';
+      let data = '';
+      for (const line of message.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data = line.slice(6);
+      }
+      if (data) onEvent(event, data);
+    }
+  }
+}
+
 interface FetchOptions extends RequestInit {
   token?: string;
 }
@@ -143,7 +172,7 @@ export interface TodayScores {
 }
 
 export interface ScoreEntry {
-  id: string;
+  id: string | null; // null while the score is buffered on the server
   game_type: string;
   date: string;
   score: number;
@@ -154,6 +183,59 @@ export interface ScoreHistory {
   scores: ScoreEntry[];
 }
 
+export interface GameSummary {
+  game_type: string;
+  best_score: number;
+  days_played: number;
+  last_played_date: string;
+}
+
+export interface ScoreSummary {
+  today: TodayScores;
+  best: TodayScores;
+  games: GameSummary[];
+}
+
+export interface ScoreRollup {
+  period: 'week' | 'month';
+  period_start: string;
+  total_score: number;
+  days_played: number;
+  best_score: number;
+}
+
+export interface ScoreStats {
+  current_streak: number;
+  longest_streak: number;
+  last_played_date: string | null;
+  week: ScoreRollup;
+  month: ScoreRollup;
+}
+
+export type GameType = 'quiz' | 'salad' | 'lines' | 'memory';
+export type LeaderboardPeriod = 'day' | 'week' | 'all';
+
+export interface LeaderboardEntry {
+  rank: number;
+  username: string;
+  score: number;
+}
+
+export interface Leaderboard {
+  game_type: GameType;
+  period: LeaderboardPeriod;
+  entries: LeaderboardEntry[];
+}
+
+export interface ScoreRank {
+  game_type: GameType;
+  date: string;
+  players: number;
+  score: number | null;
+  rank: number | null;
+  percentile: number | null;
+}
+
 // Scores API
 export const scoresAPI = {
   update: (gameType: 'quiz' | 'salad' | 'lines' | 'memory', score: number) =>
@@ -168,6 +250,18 @@ export const scoresAPI = {
   getBestScores: () =>
     fetchAPI<TodayScores>('/api/scores/best'),
   
+  getSummary: () =>
+    fetchAPI<ScoreSummary>('/api/scores/summary'),
+  
+  getStats: () =>
+    fetchAPI<ScoreStats>('/api/scores/stats'),
+  
+  getRollups: (period: 'week' | 'month' = 'week', limit?: number) => {
+    const params = new URLSearchParams({ period });
+    if (limit) params.set('limit', limit.toString());
+    return fetchAPI<{ rollups: ScoreRollup[] }>(`/api/scores/rollups?${params.toString()}`);
+  },
+  
   getMyScores: (gameType?: string, limit?: number) => {
     const params = new URLSearchParams();
     if (gameType) params.set('game_type', gameType);
@@ -175,6 +269,33 @@ export const scoresAPI = {
     const query = params.toString();
     return fetchAPI<ScoreHistory>(`/api/scores/me${query ? `?${query}` : ''}`);
   },
+  
+  getLeaderboard: (gameType: GameType, period: LeaderboardPeriod = 'day', limit?: number) => {
+    const params = new URLSearchParams({ game_type: gameType, period });
+    if (limit) params.set('limit', limit.toString());
+    return fetchAPI<Leaderboard>(`/api/scores/leaderboard?${params.toString()}`);
+  },
+  
+  getRank: (gameType: GameType) =>
+    fetchAPI<ScoreRank>(`/api/scores/rank?game_type=${gameType}`),
+  
+  // Live leaderboard over SSE; fetch instead of EventSource so the auth header can be sent.
+  // Returns a function that closes the stream.
+  watchLeaderboard: (gameType: GameType, period: LeaderboardPeriod, onUpdate: (board: Leaderboard) => void) => {
+    const controller = new AbortController();
+    const params = new URLSearchParams({ game_type: gameType, period });
+    
+    (async () => {
+      const response = await fetch(`${API_URL}/api/scores/live?${params}`, {
+        headers: authHeaders(),
+        signal: controller.signal,
+      });
+      if (!response.ok) return;
+      await readEventStream(response, (_event, data) => onUpdate(JSON.parse(data)));
+    })().catch(() => {});
+    
+    return () => controller.abort();
+  },
 };
 
 // Vocabulary types
@@ -326,11 +447,41 @@ export const quizAPI = {
       }),
     }),
   
+  // Streams the hint via Server-Sent Events, calling onToken with the text received so far.
+  // Uses fetch rather than EventSource so the auth header (and the user's AI quota) applies.
+  streamHint: async (vocabularyId: string, mode: string, onToken: (partial: string) => void): Promise<HintResponse> => {
+    const params = new URLSearchParams({ vocabulary_id: vocabularyId, mode });
+    const response = await fetch(`${API_URL}/api/quiz/hint/stream?${params}`, { headers: authHeaders() });
+    if (!response.ok) {
+      const error = await response.json().catch(() => ({ detail: 'Hint stream failed' }));
+      throw new Error(error.detail);
+    }
+    
+    let partial = '';
+    let result = null as HintResponse | null;
+    let failure = 'Hint stream failed';
+    await readEventStream(response, (event, data) => {
+      const payload = JSON.parse(data);
+      if (event === 'token') {
+        partial += payload.token;
+        onToken(partial);
+      } else if (event === 'done') {
+        result = { hint: payload.hint, available: payload.available };
+      } else if (event === 'error') {
+        failure = payload.detail;
+      }
+    });
+    
+    if (!result) throw new Error(failure);
+    return result;
+  },
+  
   getTTS: async (text: string): Promise<Blob> => {
     const response = await fetch(`${API_URL}/api/quiz/tts`, {
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
+        ...authHeaders(),
       },
       body: JSON.stringify({ text }),
     });
@@ -397,6 +548,7 @@ export interface Invitation {
   expires_at: string;
   created_at: string;
   invited_by_username: string;
+  email_status: string | null;
 }
 
 export interface InvitationListResponse {
@@ -420,6 +572,18 @@ export interface UserListResponse {
   total: number;
 }
 
+export interface InvitationBulkResult {
+  email: string;
+  status: 'invited' | 'invalid' | 'duplicate' | 'already_registered' | 'already_invited';
+  invitation_id: string | null;
+}
+
+export interface InvitationBulkResponse {
+  results: InvitationBulkResult[];
+  invited: number;
+  skipped: number;
+}
+
 // Admin types - Cache
 export interface HintCacheItem {
   id: string;
@@ -434,7 +598,14 @@ export interface HintCacheItem {
 
 export interface HintCacheListResponse {
   items: HintCacheItem[];
-  total: number;
+  total: number | null;
+  next_cursor: string | null;
+}
+
+export interface HintCacheWarmResponse {
+  requested: number;
+  generated: number;
+  failed: number;
 }
 
 export interface TTSCacheItem {
@@ -445,12 +616,36 @@ export interface TTSCacheItem {
 
 export interface TTSCacheListResponse {
   items: TTSCacheItem[];
-  total: number;
+  total: number | null;
+  next_cursor: string | null;
+}
+
+export interface CacheListParams {
+  search?: string;
+  cursor?: string | null;
+  limit?: number;
+}
+
+function cacheListQuery(params: CacheListParams = {}): string {
+  const query = new URLSearchParams();
+  if (params.search) query.set('search', params.search);
+  if (params.cursor) query.set('cursor', params.cursor);
+  if (params.limit) query.set('limit', String(params.limit));
+  const qs = query.toString();
+  return qs ? `?${qs}` : '';
 }
 
 export interface CacheStats {
   hint_count: number;
   tts_count: number;
+  hint_bytes: number;
+  tts_bytes: number;
+  hint_hits: number;
+  tts_hits: number;
+  hint_hit_ratio: number;
+  tts_hit_ratio: number;
+  tts_max_bytes: number;
+  eviction_policy: string;
 }
 
 // Admin API
@@ -462,6 +657,12 @@ export const adminAPI = {
       body: JSON.stringify({ email }),
     }),
   
+  createInvitationsBulk: (emails: string[], csv?: string) =>
+    fetchAPI<InvitationBulkResponse>('/api/admin/invitations/bulk', {
+      method: 'POST',
+      body: JSON.stringify({ emails, csv: csv || null }),
+    }),
+  
   getInvitations: () =>
     fetchAPI<InvitationListResponse>('/api/admin/invitations'),
   
@@ -493,8 +694,8 @@ export const adminAPI = {
   getCacheStats: () =>
     fetchAPI<CacheStats>('/api/admin/cache/stats'),
   
-  getHintCache: () =>
-    fetchAPI<HintCacheListResponse>('/api/admin/cache/hints'),
+  getHintCache: (params?: CacheListParams) =>
+    fetchAPI<HintCacheListResponse>(`/api/admin/cache/hints${cacheListQuery(params)}`),
   
   updateHintCache: (id: string, hint: string) =>
     fetchAPI<HintCacheItem>(`/api/admin/cache/hints/${id}`, {
@@ -502,6 +703,12 @@ export const adminAPI = {
       body: JSON.stringify({ hint }),
     }),
   
+  warmHintCache: (mode: string, tags?: string, limit: number = 200) =>
+    fetchAPI<HintCacheWarmResponse>('/api/admin/cache/hints/warm', {
+      method: 'POST',
+      body: JSON.stringify({ mode, tags: tags || null, limit }),
+    }),
+  
   deleteHintCache: (id: string) =>
     fetchAPI<void>(`/api/admin/cache/hints/${id}`, {
       method: 'DELETE',
@@ -512,8 +719,8 @@ export const adminAPI = {
       method: 'DELETE',
     }),
   
-  getTTSCache: () =>
-    fetchAPI<TTSCacheListResponse>('/api/admin/cache/tts'),
+  getTTSCache: (params?: CacheListParams) =>
+    fetchAPI<TTSCacheListResponse>(`/api/admin/cache/tts${cacheListQuery(params)}`),
   
   getTTSAudio: async (id: string): Promise<Blob> => {
     const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
@@ -560,3 +767,19 @@ export const userPreferencesAPI = {
       body: JSON.stringify({ selected_tags: selectedTags }),
     }),
 };
+
+// Dashboard types
+export interface Dashboard {
+  user: UserInfo;
+  today: TodayScores;
+  best: TodayScores;
+  preferences: UserPreferences;
+  tags: string[];
+  settings: Record<string, string>;
+}
+
+// Dashboard API: user, scores, preferences, tags and settings in one request
+export const dashboardAPI = {
+  get: () =>
+    fetchAPI<Dashboard>('/api/dashboard'),
+};